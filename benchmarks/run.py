@@ -0,0 +1,185 @@
+"""
+Runs the benchmark suite against local stand-ins for Dexscreener, pump.fun
+and rugcheck, and compares the results with a stored baseline.
+
+    python -m benchmarks.run [--rows 10000] [--update-baseline]
+"""
+import argparse
+import asyncio
+import contextlib
+import dataclasses
+import io
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+from src.config import DEFAULT_CONFIG_PATH, load_settings, set_settings
+from src.data.database import close_databases, create_tables, get_database, get_db_connection
+from src.data.fetcher import fetch_and_store_many_dexscreener_pairs
+from src.data.pump_fetcher import PumpFunListener
+from src.analysis.analyzer import analyze_all_coins
+from benchmarks.servers import DexscreenerStub, PumpFunReplayServer, make_fake_rugcheck
+from benchmarks.synthetic import generate_coins_db
+
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+# Metric name -> whether higher values are better
+METRICS = {
+    'ingest_msgs_per_sec': True,
+    'upsert_rows_per_sec': True,
+    'analyzer_coins_per_sec': True,
+    'peak_rss_mb': False,
+}
+
+def with_database(settings, db_name):
+    """Returns the settings pointed at another database file."""
+    return dataclasses.replace(settings, database=dataclasses.replace(settings.database, db_name=db_name))
+
+def with_api(settings, **urls):
+    """Returns the settings with some [api] URLs replaced."""
+    return dataclasses.replace(settings, api=dataclasses.replace(settings.api, **urls))
+
+async def bench_ingest(settings, events, rate, timeout=300):
+    """Replays `events` new-token events through the pump.fun listener. Returns stored msgs/sec."""
+    async with PumpFunReplayServer(events, rate) as server:
+        settings = with_api(settings, pumpportal_websocket_url=server.uri)
+        listener = PumpFunListener(settings, target=get_database(settings.database.db_name))
+        started = time.perf_counter()
+        task = asyncio.create_task(listener.run())
+        try:
+            while listener.writer.stats()['flushed'] < events:
+                if time.perf_counter() - started > timeout:
+                    raise RuntimeError(f"Ingest benchmark timed out with {listener.stats()}")
+                await asyncio.sleep(0.005)
+            elapsed = time.perf_counter() - started
+        finally:
+            await listener.stop()
+            await task
+    return events / elapsed
+
+async def bench_upsert(settings, queries, pairs_per_query):
+    """Fetches `queries` searches from the Dexscreener stub and stores them. Returns upserted rows/sec."""
+    with DexscreenerStub(pairs_per_query) as stub:
+        settings = with_api(settings, dexscreener_api_url=stub.api_url)
+        search_queries = [f"QUERY{i}" for i in range(queries)]
+        started = time.perf_counter()
+        await fetch_and_store_many_dexscreener_pairs(search_queries, settings=settings)
+        elapsed = time.perf_counter() - started
+    return queries * pairs_per_query / elapsed
+
+def bench_analyzer(settings, rows, rugcheck_latency):
+    """Analyzes a synthetic database of `rows` coins with a fake rugcheck. Returns coins/sec."""
+    generate_coins_db(settings.database.db_name, rows)
+    fake_rugcheck = make_fake_rugcheck(rugcheck_latency)
+    with patch('src.analysis.analyzer.perform_rugcheck', fake_rugcheck):
+        started = time.perf_counter()
+        analyzed = analyze_all_coins(settings=settings, incremental=False, requests_per_second=1e9)
+        elapsed = time.perf_counter() - started
+    return analyzed / elapsed
+
+def peak_rss_mb():
+    """Returns the process's memory high-water mark in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere.
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def run_benchmarks(settings, rows, events, event_rate, queries, pairs_per_query, rugcheck_latency, verbose=False):
+    """Runs every benchmark in a scratch directory and returns the metrics."""
+    results = {}
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with tempfile.TemporaryDirectory() as workdir, output:
+        def phase_settings(name):
+            phase = with_database(settings, os.path.join(workdir, f"{name}.db"))
+            set_settings(phase)
+            if name != 'analyzer':
+                conn = get_db_connection(phase.database.db_name)
+                create_tables(conn)
+                conn.close()
+            return phase
+
+        try:
+            results['ingest_msgs_per_sec'] = asyncio.run(bench_ingest(phase_settings('ingest'), events, event_rate))
+            close_databases()
+            results['upsert_rows_per_sec'] = asyncio.run(bench_upsert(phase_settings('upsert'), queries, pairs_per_query))
+            close_databases()
+            results['analyzer_coins_per_sec'] = bench_analyzer(phase_settings('analyzer'), rows, rugcheck_latency)
+        finally:
+            close_databases()
+    results['peak_rss_mb'] = peak_rss_mb()
+    return results
+
+def compare_to_baseline(results, baseline, tolerance):
+    """
+    Compares metrics with baseline metrics.
+    Returns (metric, value, baseline value, relative change, regressed) rows;
+    a metric regressed when it got worse by more than `tolerance`.
+    """
+    rows = []
+    for metric, higher_is_better in METRICS.items():
+        value = results.get(metric)
+        base = baseline.get(metric)
+        if value is None or not base:
+            rows.append((metric, value, base, None, False))
+            continue
+        change = (value - base) / base
+        regressed = change < -tolerance if higher_is_better else change > tolerance
+        rows.append((metric, value, base, change, regressed))
+    return rows
+
+def format_report(rows):
+    """Formats comparison rows as a table."""
+    lines = [f"{'metric':<24} {'value':>12} {'baseline':>12} {'change':>8}"]
+    for metric, value, base, change, regressed in rows:
+        value_text = '-' if value is None else f"{value:.1f}"
+        base_text = '-' if base is None else f"{base:.1f}"
+        change_text = '-' if change is None else f"{change:+.0%}"
+        lines.append(f"{metric:<24} {value_text:>12} {base_text:>12} {change_text:>8}{'  REGRESSION' if regressed else ''}")
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Crypto Coin Analyzer Bot benchmarks")
+    parser.add_argument('--config', default=DEFAULT_CONFIG_PATH, help='The configuration file to start from.')
+    parser.add_argument('--rows', type=int, default=10000, help='Coins in the synthetic analyzer database (10k to 1M).')
+    parser.add_argument('--events', type=int, default=5000, help='pump.fun events to replay.')
+    parser.add_argument('--event-rate', type=float, default=0, help='pump.fun events per second; 0 replays as fast as possible.')
+    parser.add_argument('--queries', type=int, default=50, help='Dexscreener searches to run.')
+    parser.add_argument('--pairs-per-query', type=int, default=30, help='Pairs returned by each search.')
+    parser.add_argument('--rugcheck-latency-ms', type=float, default=2.0, help='Latency of each fake rugcheck lookup.')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE_PATH, help='The baseline file to compare with.')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative slowdown before a metric counts as a regression.')
+    parser.add_argument('--update-baseline', action='store_true', help='Store the results as the new baseline.')
+    parser.add_argument('--verbose', action='store_true', help='Show the output of the code under test.')
+    args = parser.parse_args(argv)
+
+    parameters = {
+        'rows': args.rows, 'events': args.events, 'event_rate': args.event_rate, 'queries': args.queries,
+        'pairs_per_query': args.pairs_per_query, 'rugcheck_latency_ms': args.rugcheck_latency_ms,
+    }
+    results = run_benchmarks(
+        load_settings(args.config), args.rows, args.events, args.event_rate, args.queries,
+        args.pairs_per_query, args.rugcheck_latency_ms / 1000, args.verbose
+    )
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('parameters') != parameters:
+            print(f"Warning: the baseline was recorded with {baseline.get('parameters')}, not {parameters}.")
+
+    rows = compare_to_baseline(results, baseline.get('metrics', {}), args.tolerance)
+    print(format_report(rows))
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({'parameters': parameters, 'metrics': results}, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}.")
+        return 0
+    return 1 if any(row[4] for row in rows) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,127 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import parse_qs, unquote, urlparse
+import websockets
+from benchmarks.synthetic import synthetic_pair, synthetic_token_event
+
+class DexscreenerStub:
+    """
+    A local HTTP server that mimics Dexscreener's `dex/search` and
+    `dex/tokens` endpoints with synthetic pairs.
+
+    Every search returns `pairs_per_query` pairs derived from the query, so
+    repeated runs see the same data. `latency` seconds are added to every
+    response. Use `api_url` as the [api] dexscreener_api_url.
+    """
+    def __init__(self, pairs_per_query=30, latency=0.0):
+        self.pairs_per_query = pairs_per_query
+        self.latency = latency
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+                url = urlparse(self.path)
+                if url.path.endswith('/dex/search'):
+                    query = parse_qs(url.query).get('q', [''])[0]
+                    pairs = [synthetic_pair(query, i) for i in range(stub.pairs_per_query)]
+                elif '/dex/tokens/' in url.path:
+                    pairs = []
+                    for address in unquote(url.path.rsplit('/', 1)[1]).split(','):
+                        pair = synthetic_pair(address, 0)
+                        pair['baseToken']['address'] = address
+                        pairs.append(pair)
+                else:
+                    self.send_error(404)
+                    return
+                body = json.dumps({"schemaVersion": "1.0.0", "pairs": pairs}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def api_url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}/latest/"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+        self._thread.join()
+
+class PumpFunReplayServer:
+    """
+    A local WebSocket server that replays pump.fun new-token events.
+
+    After a client subscribes, `count` events are sent at `rate` events per
+    second (0 sends them as fast as possible). Use `uri` as the [api]
+    pumpportal_websocket_url.
+    """
+    def __init__(self, count, rate=0.0):
+        self.count = count
+        self.rate = rate
+        self.sent = 0
+        self._server = None
+
+    @property
+    def uri(self):
+        return f"ws://127.0.0.1:{self._server.sockets[0].getsockname()[1]}"
+
+    async def _handler(self, websocket):
+        await websocket.recv()
+        interval = 1 / self.rate if self.rate > 0 else 0
+        started = time.monotonic()
+        for i in range(self.count):
+            if interval:
+                await asyncio.sleep(max(started + i * interval - time.monotonic(), 0))
+            await websocket.send(json.dumps(synthetic_token_event(i)))
+            self.sent += 1
+        await websocket.wait_closed()
+
+    async def __aenter__(self):
+        self._server = await websockets.serve(self._handler, '127.0.0.1', 0)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._server.close()
+        await self._server.wait_closed()
+
+def make_fake_rugcheck(latency=0.0, danger_every=10):
+    """
+    Returns a stand-in for `perform_rugcheck` that sleeps `latency` seconds
+    and reports every `danger_every`-th lookup as dangerous.
+    """
+    calls = 0
+    lock = threading.Lock()
+
+    def fake_rugcheck(mint_address, governor=None):
+        nonlocal calls
+        with lock:
+            calls += 1
+            call = calls
+        if latency:
+            time.sleep(latency)
+        result = 'Danger' if danger_every and call % danger_every == 0 else 'Good'
+        return SimpleNamespace(token_address=mint_address, rugged=False, result=result, risks=[])
+
+    return fake_rugcheck
@@ -0,0 +1,65 @@
+import random
+from src.data.database import create_tables, get_db_connection
+
+def synthetic_mint(i):
+    """Returns a deterministic, address-like mint for row `i`."""
+    return f"Synth{i:039d}"
+
+def synthetic_coin(rng, i):
+    """
+    Returns one synthetic coins row. The distributions are loose but put a
+    share of coins under the filters and the fake-volume heuristics, like
+    real data does.
+    """
+    market_cap = rng.lognormvariate(10, 2)
+    liquidity = market_cap * rng.uniform(0.02, 0.5)
+    volume = liquidity * rng.lognormvariate(0, 1)
+    buys = int(rng.lognormvariate(4, 1.5))
+    sells = int(buys * rng.uniform(0.05, 1.5))
+    return (
+        synthetic_mint(i), f"Synthetic {i}", f"SYN{i}", "", "",
+        market_cap, liquidity, market_cap / 1e9, volume, buys, sells, 'synthetic'
+    )
+
+def generate_coins_db(path, rows, seed=0, batch_size=10000):
+    """Creates a coins database with `rows` synthetic coins at `path`."""
+    rng = random.Random(seed)
+    conn = get_db_connection(path)
+    create_tables(conn)
+    for start in range(0, rows, batch_size):
+        with conn:
+            conn.executemany("""
+                INSERT OR IGNORE INTO coins (mint_address, name, symbol, description, image_uri, market_cap, liquidity, price_usd, volume_h24, txns_h24_buys, txns_h24_sells, source)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (synthetic_coin(rng, i) for i in range(start, min(start + batch_size, rows))))
+    conn.close()
+
+def synthetic_pair(query, i):
+    """Returns a Dexscreener-shaped pair for the i-th result of a search query."""
+    rng = random.Random(f"{query}-{i}")
+    market_cap = rng.lognormvariate(12, 2)
+    liquidity = market_cap * rng.uniform(0.02, 0.5)
+    return {
+        "chainId": "solana",
+        "pairAddress": f"pair-{query}-{i}",
+        "baseToken": {"address": f"{query}-{i}", "name": f"{query} {i}", "symbol": f"{query[:4]}{i}"},
+        "priceUsd": str(market_cap / 1e9),
+        "marketCap": market_cap,
+        "liquidity": {"usd": liquidity},
+        "volume": {"h24": liquidity * rng.lognormvariate(0, 1)},
+        "txns": {"h24": {"buys": rng.randint(0, 5000), "sells": rng.randint(0, 5000)}},
+        "info": {"imageUrl": ""},
+    }
+
+def synthetic_token_event(i):
+    """Returns a pump.fun-shaped new token event."""
+    return {
+        "signature": f"sig{i}",
+        "mint": f"Pump{i:040d}",
+        "traderPublicKey": f"Dev{i % 1000:041d}",
+        "txType": "create",
+        "name": f"Pump Token {i}",
+        "symbol": f"PT{i}",
+        "description": "",
+        "image_uri": "",
+    }
@@ -1,70 +1,192 @@
 import argparse
 import asyncio
-from src.data.database import create_tables
-from src.data.fetcher import fetch_and_store_dexscreener_pairs
+import logging
+from src.logs import configure_logging
+from src.metrics import MetricsServer, dump_metrics_periodically
+from src.config import DEFAULT_CONFIG_PATH, load_settings, set_settings
+from src.data.database import create_tables, close_databases
+from src.data.fetcher import fetch_and_store_many_dexscreener_pairs, load_search_queries
 from src.data.pump_fetcher import listen_for_new_tokens
+from src.data.refresher import RefreshScheduler
+from src.data.export import DEFAULT_CHUNK_ROWS, EXPORT_TABLES, export_database
 from src.analysis.analyzer import analyze_all_coins
+from src.analysis.detectors import warm_detectors
+from src.analysis.realtime import RealtimeAnalyzer
+from src.analysis.workers import run_worker_processes
+from src.daemon import Daemon
 
-async def run_dexscreener_flow(search_query):
+logger = logging.getLogger('main')
+
+def positive_int(value):
+    """An argparse type for counts that must be at least 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+async def run_dexscreener_flow(search_queries, settings):
     """Runs the Dexscreener data fetching and analysis flow."""
-    print("Running Dexscreener flow...")
+    logger.info("Running Dexscreener flow")
 
     # Fetch new data
-    print(f"Fetching new data for query: {search_query}...")
-    # In a real async app, this would be an async function
-    fetch_and_store_dexscreener_pairs(search_query)
-    print("Data fetching complete.")
+    logger.info("Fetching new data for %d queries", len(search_queries), extra={'queries': ','.join(search_queries)})
+    await fetch_and_store_many_dexscreener_pairs(search_queries, settings=settings)
+    logger.info("Data fetching complete")
 
     # Analyze data
-    print("Analyzing data...")
-    # In a real async app, this would be an async function
-    analyze_all_coins()
-    print("Data analysis complete.")
+    logger.info("Analyzing data")
+    # The analyzer is blocking, so keep it off the event loop
+    await asyncio.to_thread(analyze_all_coins, settings=settings)
+    logger.info("Data analysis complete")
+
+async def run_pump_fun_flow(settings, realtime=False):
+    """
+    Runs the pump.fun real-time listener.
+    With `realtime`, every new token is also analyzed as soon as it arrives.
+    """
+    logger.info("Running pump.fun listener")
+    if not realtime:
+        await listen_for_new_tokens(settings)
+        return
+
+    analyzer = RealtimeAnalyzer(settings)
+    analyzer.start()
+    try:
+        await listen_for_new_tokens(settings, analyzer.submit)
+    finally:
+        await analyzer.close(drain=False)
+        logger.info("Real-time analysis finished", extra=analyzer.stats())
+
+async def run_refresh_flow(settings, once=False):
+    """Keeps the market data of tracked coins fresh, running a single cycle with `once`."""
+    logger.info("Running Dexscreener refresh scheduler")
+    scheduler = RefreshScheduler(settings=settings)
+    try:
+        await scheduler.run(cycles=1 if once else None)
+    finally:
+        scheduler.close()
+
+def add_search_query_arguments(parser):
+    """Adds the Dexscreener search query arguments to a subcommand parser."""
+    parser.add_argument('search_queries', type=str, nargs='*', metavar='search_query',
+                        help='The search queries for fetching new pairs (e.g., "PEPE/SOL"). Defaults to "PEPE/SOL".')
+    parser.add_argument('--queries-file', type=str,
+                        help='A file with one search query per line.')
+
+def add_realtime_argument(parser):
+    """Adds the option to analyze new pump.fun tokens as they arrive."""
+    parser.add_argument('--realtime', action='store_true',
+                        help='Analyze every new pump.fun token as soon as it is created.')
 
-async def run_pump_fun_flow():
-    """Runs the pump.fun real-time listener."""
-    print("Running pump.fun listener...")
-    await listen_for_new_tokens()
+def get_search_queries(args):
+    """Collects the search queries given on the command line and in a queries file."""
+    search_queries = list(args.search_queries)
+    if args.queries_file:
+        search_queries.extend(load_search_queries(args.queries_file))
+    return search_queries or ["PEPE/SOL"]
 
 async def main():
     """Main function to run the bot."""
     parser = argparse.ArgumentParser(description="Crypto Coin Analyzer Bot")
+    parser.add_argument('--config', type=str, default=DEFAULT_CONFIG_PATH,
+                        help='The configuration file to use.')
     subparsers = parser.add_subparsers(dest='source', required=True, help='The data source to use.')
 
     # Dexscreener parser
     parser_dex = subparsers.add_parser('dexscreener', help='Fetch data from Dexscreener.')
-    parser_dex.add_argument('search_query', type=str, nargs='?', default="PEPE/SOL",
-                           help='The search query for fetching new pairs (e.g., "PEPE/SOL").')
+    add_search_query_arguments(parser_dex)
 
     # pump.fun parser
     parser_pump = subparsers.add_parser('pumpfun', help='Listen for new coins on pump.fun.')
+    add_realtime_argument(parser_pump)
+
+    # Refresh parser
+    parser_refresh = subparsers.add_parser('refresh', help='Refresh the market data of tracked coins.')
+    parser_refresh.add_argument('--once', action='store_true',
+                                help='Run a single refresh cycle instead of refreshing continuously.')
+
+    # Analysis workers parser
+    parser_workers = subparsers.add_parser('workers', help='Analyze coins with several worker processes.')
+    parser_workers.add_argument('count', type=positive_int, help='The number of worker processes.')
+    parser_workers.add_argument('--once', action='store_true',
+                                help='Exit once no coin needs an analysis instead of waiting for more.')
+
+    # Export parser
+    parser_export = subparsers.add_parser('export', help='Export coins and their market history to columnar files.')
+    parser_export.add_argument('out_dir', type=str, help='The export directory.')
+    parser_export.add_argument('--full', action='store_true',
+                               help='Export every row again instead of appending the rows changed since the last export.')
+    parser_export.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS,
+                               help='The number of rows per exported part.')
+    parser_export.add_argument('--tables', nargs='+', choices=list(EXPORT_TABLES),
+                               help='The tables to export. Defaults to all of them.')
+
+    # Daemon parser
+    parser_daemon = subparsers.add_parser('daemon', help='Keep searching, refreshing, analyzing and maintaining the database on a schedule.')
+    add_search_query_arguments(parser_daemon)
+    add_realtime_argument(parser_daemon)
+    parser_daemon.add_argument('--no-pumpfun', action='store_true',
+                               help='Do not listen for new coins on pump.fun.')
 
     # All parser
     parser_all = subparsers.add_parser('all', help='Run all data sources concurrently.')
-    parser_all.add_argument('search_query', type=str, nargs='?', default="PEPE/SOL",
-                           help='The search query for fetching new pairs (e.g., "PEPE/SOL").')
+    add_search_query_arguments(parser_all)
+    add_realtime_argument(parser_all)
 
     args = parser.parse_args()
 
-    print("Starting the bot...")
+    # Parse the configuration once; everything else reuses it
+    settings = load_settings(args.config)
+    set_settings(settings)
+    configure_logging(settings.logging)
+    logger.info("Starting the bot")
 
     # Create database tables
-    print("Initializing database...")
+    logger.info("Initializing database")
     create_tables()
-    print("Database initialization complete.")
-
-    if args.source == 'dexscreener':
-        await run_dexscreener_flow(args.search_query)
-    elif args.source == 'pumpfun':
-        await run_pump_fun_flow()
-    elif args.source == 'all':
-        print("Running all data sources concurrently...")
-        await asyncio.gather(
-            run_dexscreener_flow(args.search_query),
-            run_pump_fun_flow()
-        )
-
-    print("Bot finished running.")
+    logger.info("Database initialization complete")
+
+    metrics_server = None
+    if settings.metrics.port:
+        metrics_server = MetricsServer(settings.metrics.host, settings.metrics.port)
+        metrics_server.start()
+    dump_task = None
+    if settings.metrics.dump_interval_seconds > 0:
+        dump_task = asyncio.create_task(dump_metrics_periodically(settings.metrics.dump_interval_seconds))
+
+    try:
+        if args.source in ('dexscreener', 'refresh', 'all'):
+            warm_detectors(settings)
+
+        if args.source == 'dexscreener':
+            await run_dexscreener_flow(get_search_queries(args), settings)
+        elif args.source == 'pumpfun':
+            await run_pump_fun_flow(settings, args.realtime)
+        elif args.source == 'refresh':
+            await run_refresh_flow(settings, args.once)
+        elif args.source == 'workers':
+            await asyncio.to_thread(run_worker_processes, args.config, args.count, args.once, settings)
+        elif args.source == 'export':
+            counts = await asyncio.to_thread(export_database, args.out_dir, settings.database.db_name,
+                                             args.tables, args.full, args.chunk_rows)
+            logger.info("Export complete", extra=counts)
+        elif args.source == 'daemon':
+            daemon = Daemon(settings, get_search_queries(args), pump_fun=not args.no_pumpfun, realtime=args.realtime)
+            await daemon.run()
+        elif args.source == 'all':
+            logger.info("Running all data sources concurrently")
+            await asyncio.gather(
+                run_dexscreener_flow(get_search_queries(args), settings),
+                run_pump_fun_flow(settings, args.realtime)
+            )
+    finally:
+        if dump_task is not None:
+            dump_task.cancel()
+        if metrics_server is not None:
+            metrics_server.close()
+        close_databases()
+
+    logger.info("Bot finished running")
 
 if __name__ == '__main__':
     try:
@@ -1,30 +1,37 @@
-import configparser
+import logging
 import time
-from src.data.database import get_db_connection
-from rugcheck import rugcheck as perform_rugcheck
-
-def get_config():
-    """Reads the configuration file."""
-    config = configparser.ConfigParser()
-    config.read('config/config.ini')
-    return config
-
-def is_coin_blacklisted(mint_address, config):
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from src import metrics
+from src.config import get_settings
+from src.data.database import get_database, get_db_path, recheck_modifier, write_transaction
+from src.analysis.detectors import get_momentum_scorer, get_rug_pull_detector
+from src.analysis.developers import blacklisted_developers
+from src.analysis.rugcheck_cache import RugcheckCache
+from src.analysis.rules import Rule, RuleContext, RulePipeline
+from src.analysis.vectorized import blacklist_mask, fake_volume_mask, filter_mask, load_numeric_columns
+from src.governor import Governor, get_governor, host_of
+from rugcheck.rugcheck import RugCheckData
+
+logger = logging.getLogger(__name__)
+
+RUGCHECK_SECONDS = metrics.histogram('rugcheck_request_seconds', 'Time spent in rugcheck calls.')
+RUGCHECK_LOOKUPS = metrics.counter('rugcheck_lookups_total', 'Rugcheck lookups by outcome.', ('outcome',))
+DB_WRITE_SECONDS = metrics.histogram('db_write_seconds', 'Time spent writing batches to the database.', ('writer',))
+COINS_ANALYZED = metrics.counter('coins_analyzed_total', 'Coins that went through an analysis sweep.')
+
+def is_coin_blacklisted(mint_address, settings):
     """Checks if a coin is in the blacklist."""
-    blacklisted_tokens = config['CoinBlacklist']['tokens'].split(',')
-    return mint_address in blacklisted_tokens
+    return mint_address in settings.blacklists.tokens
 
-def is_developer_blacklisted(developer_address, config):
-    """Checks if a developer is in the blacklist."""
-    # NOTE: Developer address is not available in Dexscreener data yet.
-    # This is a placeholder.
-    blacklisted_developers = config['DeveloperBlacklist']['developers'].split(',')
-    return developer_address in blacklisted_developers
+def is_developer_blacklisted(developer_address, settings):
+    """Checks if a developer is in the inline blacklist; see DeveloperBlacklist for the full one."""
+    return developer_address in settings.blacklists.developers
 
-def is_coin_filtered(coin, config):
+def is_coin_filtered(coin, settings):
     """Checks if a coin meets the filter criteria."""
-    min_market_cap = float(config['Filters']['min_market_cap'])
-    min_liquidity = float(config['Filters']['min_liquidity'])
+    min_market_cap = settings.filters.min_market_cap
+    min_liquidity = settings.filters.min_liquidity
 
     if coin['market_cap'] and coin['market_cap'] < min_market_cap:
         return True
@@ -33,18 +40,62 @@ def is_coin_filtered(coin, config):
 
     return False
 
-def get_rugcheck_data(mint_address):
+# The headers the rugcheck library sends, so the API sees the same client as before.
+RUGCHECK_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.3; Win64; x64; en-US) AppleWebKit/600.18 (KHTML, like Gecko) Chrome/49.0.1324.155 Safari/602',
+}
+
+def rugcheck_result(score):
+    """Turns a rugcheck risk score into the rugcheck library's 'Good', 'Warning' or 'Danger' result."""
+    if score is None:
+        return None
+    return 'Good' if score < 1e3 else 'Warning' if score < 5e3 else 'Danger'
+
+def perform_rugcheck(mint_address, governor=None):
+    """
+    Fetches a token's rugcheck report through the outbound governor, so
+    lookups are paced, retried and cut off while rugcheck is down.
+
+    The request carries the rugcheck library's headers, and the report is
+    wrapped like the library does it (attribute access to every field, plus
+    a `result` verdict). Unlike the library, failures raise a requests
+    exception instead of exiting the process, and a report without the
+    `rugged` or `risks` fields reads as not rugged, with no risks.
+    """
+    governor = governor or get_governor()
+    response = governor.get(requests, f"{governor.settings.api.rugcheck_api_url}tokens/{mint_address}/report", headers=RUGCHECK_HEADERS)
+    response.raise_for_status()
+    report = RugCheckData(response.json())
+    report.token_address = mint_address
+    report.rugged = report.get('rugged', False)
+    report.risks = report.get('risks') or []
+    report.result = rugcheck_result(report.get('score'))
+    return report
+
+def get_rugcheck_data(mint_address, cache=None, governor=None):
     """
     Gets the rugcheck data for a given mint address.
+    If a cache is given, a fresh cached result is returned without calling rugcheck.
+    Network calls go through `governor`, the process-wide one by default.
     """
+    if cache is not None:
+        hit, rugcheck_data = cache.get(mint_address)
+        if hit:
+            RUGCHECK_LOOKUPS.inc(outcome='cache_hit')
+            return rugcheck_data
+
     try:
-        return perform_rugcheck(mint_address)
-    except SystemExit:
-        print(f"Rugcheck library called exit() for {mint_address}. Treating as an error.")
-        return None
+        with RUGCHECK_SECONDS.time():
+            rugcheck_data = perform_rugcheck(mint_address, governor)
+        RUGCHECK_LOOKUPS.inc(outcome='fetched')
     except Exception as e:
-        print(f"Error getting rugcheck data for {mint_address}: {e}")
-        return None
+        RUGCHECK_LOOKUPS.inc(outcome='error')
+        logger.warning("Error getting rugcheck data: %s", e, extra={'mint_address': mint_address})
+        rugcheck_data = None
+
+    if cache is not None:
+        cache.put(mint_address, rugcheck_data)
+    return rugcheck_data
 
 def is_contract_good(rugcheck_data):
     """
@@ -53,10 +104,10 @@ def is_contract_good(rugcheck_data):
     if not rugcheck_data:
         return False
     if rugcheck_data.rugged:
-        print(f"Coin {rugcheck_data.token_address} is rugged.")
+        logger.debug("Coin %s is rugged", rugcheck_data.token_address)
         return False
     if rugcheck_data.result == 'Danger':
-        print(f"Coin {rugcheck_data.token_address} has a 'Danger' result.")
+        logger.debug("Coin %s has a 'Danger' result", rugcheck_data.token_address)
         return False
     return True
 
@@ -74,18 +125,19 @@ def has_bundled_supply(rugcheck_data):
     ]
 
     for risk in rugcheck_data.risks:
-        if risk.name in bundled_supply_risks:
-            print(f"Coin {rugcheck_data.token_address} has bundled supply risk: {risk.name}")
+        name = getattr(risk, 'name', None)
+        if name in bundled_supply_risks:
+            logger.debug("Coin %s has bundled supply risk: %s", rugcheck_data.token_address, name)
             return True
     return False
 
-def has_fake_volume_custom(coin, config):
+def has_fake_volume_custom(coin, settings):
     """
     Checks for signs of fake volume using custom heuristics.
     """
-    max_volume_to_liquidity_ratio = float(config['FakeVolume']['max_volume_to_liquidity_ratio'])
-    min_txns_24h = int(config['FakeVolume']['min_txns_24h'])
-    max_buy_sell_ratio = float(config['FakeVolume']['max_buy_sell_ratio'])
+    max_volume_to_liquidity_ratio = settings.fake_volume.max_volume_to_liquidity_ratio
+    min_txns_24h = settings.fake_volume.min_txns_24h
+    max_buy_sell_ratio = settings.fake_volume.max_buy_sell_ratio
 
     volume_h24 = coin['volume_h24']
     liquidity = coin['liquidity']
@@ -94,51 +146,47 @@ def has_fake_volume_custom(coin, config):
 
     if liquidity and volume_h24 and liquidity > 0:
         if (volume_h24 / liquidity) > max_volume_to_liquidity_ratio:
-            print(f"Coin {coin['symbol']} has high volume-to-liquidity ratio.")
+            logger.debug("Coin %s has high volume-to-liquidity ratio", coin['symbol'])
             return True
 
     if txns_buys is not None and txns_sells is not None:
         total_txns = txns_buys + txns_sells
         if total_txns < min_txns_24h:
-            print(f"Coin {coin['symbol']} has very few transactions in the last 24h.")
+            logger.debug("Coin %s has very few transactions in the last 24h", coin['symbol'])
             return True
 
         if txns_sells > 0 and (txns_buys / txns_sells) > max_buy_sell_ratio:
-            print(f"Coin {coin['symbol']} has a very high buy/sell ratio.")
+            logger.debug("Coin %s has a very high buy/sell ratio", coin['symbol'])
             return True
 
         if txns_buys > 0 and (txns_sells / txns_buys) > max_buy_sell_ratio:
-            print(f"Coin {coin['symbol']} has a very high sell/buy ratio.")
+            logger.debug("Coin %s has a very high sell/buy ratio", coin['symbol'])
             return True
 
     return False
 
-def is_rug_pull(coin_id):
-    """
-    Analyzes a coin to determine if it's a rug pull.
-    Placeholder function.
-    """
-    # TODO: Implement rug pull detection logic
-    print(f"Analyzing coin {coin_id} for rug pull...")
-    return False
-
-def is_pump(coin_id):
+def is_rug_pull(mint_address, detector=None):
     """
-    Analyzes a coin to determine if it's a pump.
-    Placeholder function.
+    Checks if a coin has been rugged, according to the rug pull detector fed
+    by the Dexscreener ingest.
+    Returns None for coins the detector has not observed.
     """
-    # TODO: Implement pump detection logic
-    print(f"Analyzing coin {coin_id} for pump...")
-    return False
+    if detector is None:
+        detector = get_rug_pull_detector()
+    return detector.is_rug_pull(mint_address)
 
-def is_tier1(coin_id):
+def momentum_scores(coins, settings, scorer=None):
     """
-    Analyzes a coin to determine if it has reached tier 1.
-    Placeholder function.
+    Scores a chunk of coins with the momentum scorer fed by the Dexscreener
+    ingest, in one pass. Returns {mint_address: (pump, tier1)} for the coins
+    the scorer has observed.
     """
-    # TODO: Implement tier 1 detection logic
-    print(f"Analyzing coin {coin_id} for tier 1 status...")
-    return False
+    if not settings.scoring.enabled:
+        return {}
+    if scorer is None:
+        scorer = get_momentum_scorer()
+    mint_addresses, pump, tier1 = scorer.score_all([coin['mint_address'] for coin in coins])
+    return {mint_address: (bool(p), bool(t)) for mint_address, p, t in zip(mint_addresses, pump, tier1)}
 
 def is_cex_listed(coin_id):
     """
@@ -146,71 +194,294 @@ def is_cex_listed(coin_id):
     Placeholder function.
     """
     # TODO: Implement CEX listing detection logic
-    print(f"Analyzing coin {coin_id} for CEX listing...")
+    logger.debug("Analyzing coin %s for CEX listing", coin_id)
     return False
 
-def analyze_all_coins():
+def rugcheck_governor(settings, requests_per_second=None):
+    """
+    Returns the governor for rugcheck lookups: the process-wide one, or
+    one of its own when a `requests_per_second` budget is given.
+    """
+    if requests_per_second is None:
+        return get_governor()
+    return Governor(settings, {host_of(settings.api.rugcheck_api_url): requests_per_second})
+
+def iter_coin_chunks(conn, incremental, chunk_size):
+    """
+    Streams the coins for an analysis sweep in chunks of `chunk_size` rows.
+
+    Chunks are read with keyset pagination, so no cursor is held open while
+    the caller writes its updates between chunks.
+    In incremental mode the pending coins (never analyzed, or whose market
+    data changed since their last analysis) come first, then the coins whose
+    recheck was due when the sweep started. Both are read through partial or
+    plain indexes, so a sweep never scans the whole table.
+    """
+    if not incremental:
+        yield from keyset_chunks(conn, "SELECT * FROM coins WHERE id > ? ORDER BY id LIMIT ?", ('id',), (0,), chunk_size)
+        return
+    yield from keyset_chunks(conn, """
+        SELECT * FROM coins WHERE analysis_status = 'pending' AND id > ? ORDER BY id LIMIT ?
+    """, ('id',), (0,), chunk_size)
+    now = conn.execute("SELECT datetime('now')").fetchone()[0]
+    # Coins analyzed above were rescheduled past `now`, so they are not read twice.
+    yield from keyset_chunks(conn, """
+        SELECT * FROM coins
+        WHERE (next_analysis_at, id) > (?, ?) AND next_analysis_at <= ? AND analysis_status != 'pending'
+        ORDER BY next_analysis_at, id LIMIT ?
+    """, ('next_analysis_at', 'id'), ('', 0), chunk_size, now)
+
+def keyset_chunks(conn, query, key_columns, start, chunk_size, *params):
+    """
+    Pages through `query`, whose first parameters are the previous chunk's
+    last `key_columns` values (`start` for the first chunk), followed by
+    `params` and the chunk size.
+    """
+    key = start
+    while True:
+        chunk = conn.execute(query, (*key, *params, chunk_size)).fetchall()
+        if not chunk:
+            return
+        yield chunk
+        key = tuple(chunk[-1][column] for column in key_columns)
+
+def skipped(score=(None, None)):
+    """
+    The flag update for a coin that was skipped before any verdict was
+    reached, carrying its (pump, tier1) `score` if it was scored.
+    """
+    return (False, None, *score, None)
+
+def blacklist_rule(coins, context):
+    """Eliminates blacklisted coins."""
+    return blacklist_mask(coins, context.settings)
+
+def developer_blacklist_rule(coins, context):
+    """
+    Eliminates coins created by a blacklisted developer: one listed in the
+    config or, when the database is at hand, marked in the developers table.
+    """
+    developers = [coin['developer_address'] if 'developer_address' in coin.keys() else None for coin in coins]
+    blacklisted = set(context.settings.blacklists.developers)
+    if context.conn is not None:
+        blacklisted |= blacklisted_developers(context.conn, developers)
+    return [developer is not None and developer in blacklisted for developer in developers]
+
+def numeric_columns(coins, context):
+    """
+    Returns the numeric columns of `coins`. They are loaded once per chunk,
+    by the first rule that needs them; later rules get the rows of the
+    coins still left in the pipeline.
+    """
+    if context.columns is None:
+        # The coins are kept with their row numbers so that their ids stay unique.
+        context.columns = (coins, {id(coin): row for row, coin in enumerate(coins)}, load_numeric_columns(coins))
+    _, rows_by_coin, columns = context.columns
+    rows = [rows_by_coin.get(id(coin)) for coin in coins]
+    if None in rows:
+        return load_numeric_columns(coins)
+    return {column: values[rows] for column, values in columns.items()}
+
+def filters_rule(coins, context):
+    """Eliminates coins below the market cap or liquidity minimums."""
+    return filter_mask(numeric_columns(coins, context), context.settings)
+
+def fake_volume_rule(coins, context):
+    """Eliminates coins with signs of fake volume."""
+    return fake_volume_mask(numeric_columns(coins, context), context.settings)
+
+def rugcheck_rule(coins, context):
+    """
+    Looks the coins up on rugcheck and eliminates those whose contract is not good.
+    The rugcheck data is kept in the context for the bundled supply check.
+    """
+    results = context.lookup_rugcheck([coin['mint_address'] for coin in coins])
+    eliminated = []
+    for coin, rugcheck_data in zip(coins, results):
+        context.rugcheck_data[coin['id']] = rugcheck_data
+        contract_good = is_contract_good(rugcheck_data)
+        if not contract_good:
+            logger.debug("Contract for coin %s (%s) is not good, skipping", coin['symbol'], coin['mint_address'])
+        eliminated.append(not contract_good)
+    return eliminated
+
+RULES = {
+    'blacklist': blacklist_rule,
+    'developer_blacklist': developer_blacklist_rule,
+    'filters': filters_rule,
+    'fake_volume': fake_volume_rule,
+    'rugcheck': rugcheck_rule,
+}
+
+def build_rule_pipeline(settings):
+    """Builds the pipeline of enabled rules with the costs from the [Rules] config section."""
+    unknown = set(settings.rules.costs) - set(RULES)
+    if unknown:
+        raise ValueError(f"Unknown rules in config: {', '.join(sorted(unknown))}")
+    return RulePipeline([Rule(name, cost, RULES[name]) for name, cost in settings.rules.costs.items()])
+
+def analyze_coin(coin, rugcheck_data, settings, score=(None, None)):
+    """
+    Computes the verdicts for a coin that passed every rule. `score` is the
+    coin's (pump, tier1) verdict from `momentum_scores`.
+
+    Returns the coin's flag update as a (bundled_supply, rug_pull, pump, tier1,
+    cex_listed) tuple.
+    """
+    bundled_supply = False
+
+    # Check for bundled supply
+    if has_bundled_supply(rugcheck_data):
+        bundled_supply = True
+        logger.debug("Coin %s (%s) is blacklisted due to bundled supply", coin['symbol'], coin['mint_address'])
+        # We might want to skip further analysis for bundled supply coins
+        # return (bundled_supply, None, None, None, None)
+
+    coin_id = coin['id']
+
+    rug_pull = is_rug_pull(coin['mint_address']) if settings.rug_pull.enabled else None
+    if rug_pull:
+        logger.info("Coin is a rug pull", extra={'symbol': coin['symbol'], 'mint_address': coin['mint_address']})
+    pump, tier1 = score
+    cex_listed = is_cex_listed(coin_id)
+
+    return (bundled_supply, rug_pull, pump, tier1, cex_listed)
+
+def analyze_chunk(chunk, pipeline, settings, lookup_rugcheck, conn=None):
+    """
+    Runs a chunk of coins through the rule pipeline and computes the verdicts
+    of the survivors. The whole chunk is scored for pumps and tier 1 in one
+    pass, and every scored coin gets those flags, even if a rule eliminated
+    it: a genuine pump often trips the fake volume rule.
+    Returns the chunk's flag updates for `write_coin_updates`.
+    """
+    scores = momentum_scores(chunk, settings)
+    context = RuleContext(settings, lookup_rugcheck, conn)
+    survivors = {coin['id'] for coin in pipeline.run(chunk, context)}
+    updates = []
+    for coin in chunk:
+        score = scores.get(coin['mint_address'], (None, None))
+        if coin['id'] in survivors:
+            flags = analyze_coin(coin, context.rugcheck_data.get(coin['id']), settings, score)
+        else:
+            flags = skipped(score)
+        updates.append((*flags, coin['id']))
+    return updates
+
+def write_coin_updates(target, updates, recheck_age_hours=None, owner=None, cache=None):
+    """
+    Applies a chunk of flag updates in a single transaction on a Database or connection.
+    Each update is a (bundled_supply, rug_pull, pump, tier1, cex_listed, id) tuple.
+    The coins are marked analyzed and due for a recheck in `recheck_age_hours`
+    (by default from the [Analysis] config section), and their leases are
+    released. The rug pull flag is sticky, so a detector that has not seen a
+    coin's drop, e.g. after a restart, never clears it.
+    With an `owner`, only the coins still leased to it are updated: a coin
+    whose lease expired and was claimed by another worker is left to that
+    worker. The rugcheck results buffered in `cache` are written in the same
+    transaction. Returns the number of coins updated.
+    """
+    if recheck_age_hours is None:
+        recheck_age_hours = get_settings().analysis.recheck_age_hours
+    recheck = recheck_modifier(recheck_age_hours)
+    query = """
+        UPDATE coins
+        SET bundled_supply = bundled_supply OR ?,
+            rug_pull = MAX(IFNULL(rug_pull, FALSE), IFNULL(?, FALSE)),
+            pump = COALESCE(?, pump),
+            tier1 = COALESCE(?, tier1),
+            cex_listed = COALESCE(?, cex_listed),
+            last_analyzed_timestamp = CURRENT_TIMESTAMP,
+            analysis_status = 'analyzed',
+            next_analysis_at = datetime('now', ?),
+            lease_owner = NULL,
+            lease_expires_at = NULL
+        WHERE id = ?
+    """
+    params = [(*update[:-1], recheck, update[-1]) for update in updates]
+    if owner is not None:
+        query += " AND lease_owner = ?"
+        params = [(*param, owner) for param in params]
+    with DB_WRITE_SECONDS.time(writer='analysis'), write_transaction(target) as conn:
+        updated = conn.executemany(query, params).rowcount
+        if cache is not None:
+            cache.flush(conn)
+        return updated
+
+def analyze_all_coins(conn=None, max_workers=None, requests_per_second=None, cache=None, incremental=None, chunk_size=None, settings=None, pipeline=None):
     """
     Analyzes all coins in the database and updates their status.
+
+    When `incremental` is set (the default comes from the [Analysis] config
+    section) only new, changed or stale coins are analyzed, see
+    `iter_coin_chunks`.
+
+    Coins are streamed in chunks of `chunk_size` rows and each chunk goes
+    through the rule pipeline (see `build_rule_pipeline`), cheapest rule
+    first, so the rugcheck lookup only runs for coins that survived the
+    local rules. Each chunk's flag updates are written with one
+    `executemany` in a single transaction.
+    Rugcheck lookups run in a pool of `max_workers` threads, which defaults
+    to the [Analysis] config section. They share the process-wide outbound
+    governor, or get their own budget of `requests_per_second`.
+    Results are served from the rugcheck cache while they are fresh, so only
+    cache misses count against the rate limit. New results are stored with
+    each chunk's flag updates. The cache lives in the database file, so with
+    an in-memory `conn` pass a `cache` or disable the rugcheck cache.
+    Without `conn`, reads use the shared database's read connection and
+    writes go through its single writer.
+    The checks and database writes stay on the calling thread.
+    Returns the number of coins analyzed.
     """
-    config = get_config()
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM coins")
-    coins = cursor.fetchall()
-
-    for coin in coins:
-        rugcheck_data = get_rugcheck_data(coin['mint_address'])
-        time.sleep(1) # To avoid rate limiting
-
-        # Check if the contract is good
-        if not is_contract_good(rugcheck_data):
-            print(f"Contract for coin {coin['symbol']} ({coin['mint_address']}) is not good. Skipping.")
-            continue
-
-        # Check for bundled supply
-        if has_bundled_supply(rugcheck_data):
-            cursor.execute("UPDATE coins SET bundled_supply = TRUE WHERE id = ?", (coin['id'],))
-            conn.commit()
-            print(f"Coin {coin['symbol']} ({coin['mint_address']}) is blacklisted due to bundled supply.")
-            # We might want to skip further analysis for bundled supply coins
-            # continue
-
-        # Check blacklists
-        if is_coin_blacklisted(coin['mint_address'], config):
-            print(f"Coin {coin['symbol']} ({coin['mint_address']}) is blacklisted. Skipping.")
-            continue
-
-        # NOTE: Developer address is not available yet.
-        # if is_developer_blacklisted(coin['developer_address'], config):
-        #     print(f"Developer of coin {coin['symbol']} is blacklisted. Skipping.")
-        #     continue
-
-        # Apply filters
-        if is_coin_filtered(coin, config):
-            print(f"Coin {coin['symbol']} is filtered out. Skipping.")
-            continue
-
-        # Check for fake volume
-        if has_fake_volume_custom(coin, config):
-            print(f"Coin {coin['symbol']} has signs of fake volume. Skipping.")
-            continue
-
-        coin_id = coin['id']
-
-        rug_pull = is_rug_pull(coin_id)
-        pump = is_pump(coin_id)
-        tier1 = is_tier1(coin_id)
-        cex_listed = is_cex_listed(coin_id)
-
-        cursor.execute("""
-            UPDATE coins
-            SET rug_pull = ?, pump = ?, tier1 = ?, cex_listed = ?, last_updated_timestamp = CURRENT_TIMESTAMP
-            WHERE id = ?
-        """, (rug_pull, pump, tier1, cex_listed, coin_id))
-        conn.commit()
-
-    conn.close()
+    settings = settings or get_settings()
+    max_workers = max_workers or settings.analysis.max_workers
+    if incremental is None:
+        incremental = settings.analysis.incremental
+    recheck_age_hours = settings.analysis.recheck_age_hours
+    chunk_size = chunk_size or settings.analysis.chunk_size
+
+    if conn is None:
+        database = get_database(settings.database.db_name)
+        read_conn, write_target = database.reader(), database
+    else:
+        database = None
+        read_conn, write_target = conn, conn
+
+    close_cache_after = False
+    if cache is None and settings.rugcheck_cache.enabled:
+        cache = RugcheckCache.from_settings(settings, get_db_path(read_conn), database)
+        close_cache_after = True
+
+    governor = rugcheck_governor(settings, requests_per_second)
+
+    pipeline = pipeline or build_rule_pipeline(settings)
+
+    def fetch_rugcheck_data(mint_address):
+        return get_rugcheck_data(mint_address, cache, governor)
+
+    analyzed = 0
+    start_time = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        def lookup_rugcheck(mint_addresses):
+            return executor.map(fetch_rugcheck_data, mint_addresses)
+
+        for chunk in iter_coin_chunks(read_conn, incremental, chunk_size):
+            updates = analyze_chunk(chunk, pipeline, settings, lookup_rugcheck, read_conn)
+            write_coin_updates(write_target, updates, recheck_age_hours, cache=cache)
+            analyzed += len(chunk)
+            COINS_ANALYZED.inc(len(chunk))
+    elapsed = time.monotonic() - start_time
+
+    rate = analyzed / elapsed if elapsed > 0 else 0.0
+    logger.info(
+        "Analyzed %d coins in %.2fs (%.2f coins/sec)", analyzed, elapsed, rate,
+        extra={'coins': analyzed, 'seconds': round(elapsed, 3), 'coins_per_sec': round(rate, 2)}
+    )
+    logger.info("Rule pipeline:\n%s", pipeline.report())
+
+    if close_cache_after:
+        cache.close()
+    return analyzed
 
 if __name__ == '__main__':
     analyze_all_coins()
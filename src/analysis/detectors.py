@@ -0,0 +1,453 @@
+import logging
+import math
+import threading
+import time
+from array import array
+import numpy as np
+from src.config import get_settings
+from src.data.database import get_database
+
+logger = logging.getLogger(__name__)
+
+NAN = math.nan
+
+class RugPullDetector:
+    """
+    Flags rug pulls from a stream of market observations.
+
+    For every coin the detector keeps its peak liquidity and price, the last
+    observed values and when the current drop started. Each observation
+    updates that state in O(1), so no history has to be rescanned. A coin is
+    flagged once its liquidity or price has fallen far enough below its peak
+    and stayed there for `min_drop_seconds`; coins whose liquidity never
+    reached `min_peak_liquidity` are ignored. Flags are sticky.
+
+    The state is stored column-wise in flat arrays indexed by a per-coin
+    slot, which takes about 50 bytes per coin plus the address index.
+    """
+    __slots__ = (
+        'liquidity_drop_ratio', 'price_drop_ratio', 'min_peak_liquidity', 'min_drop_seconds',
+        '_index', '_peak_liquidity', '_peak_price', '_liquidity', '_price',
+        '_drop_started_at', '_last_seen', '_flagged', '_lock',
+    )
+
+    def __init__(self, liquidity_drop_ratio=0.8, price_drop_ratio=0.9, min_peak_liquidity=1000.0, min_drop_seconds=60.0):
+        self.liquidity_drop_ratio = liquidity_drop_ratio
+        self.price_drop_ratio = price_drop_ratio
+        self.min_peak_liquidity = min_peak_liquidity
+        self.min_drop_seconds = min_drop_seconds
+        self._index = {}
+        self._peak_liquidity = array('d')
+        self._peak_price = array('d')
+        self._liquidity = array('d')
+        self._price = array('d')
+        self._drop_started_at = array('d')
+        self._last_seen = array('d')
+        self._flagged = array('b')
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Creates a detector with the [RugPull] settings."""
+        rug_pull = settings.rug_pull
+        return cls(
+            liquidity_drop_ratio=rug_pull.liquidity_drop_ratio,
+            price_drop_ratio=rug_pull.price_drop_ratio,
+            min_peak_liquidity=rug_pull.min_peak_liquidity,
+            min_drop_seconds=rug_pull.min_drop_seconds,
+        )
+
+    def __len__(self):
+        return len(self._index)
+
+    def _slot(self, mint_address):
+        slot = self._index.get(mint_address)
+        if slot is None:
+            slot = len(self._index)
+            self._index[mint_address] = slot
+            for column in (self._peak_liquidity, self._peak_price, self._liquidity, self._price, self._drop_started_at, self._last_seen):
+                column.append(NAN)
+            self._flagged.append(0)
+        return slot
+
+    def update(self, mint_address, price, liquidity, timestamp=None):
+        """
+        Feeds one observation of a coin and returns whether it is flagged.
+        Missing prices or liquidity leave the corresponding state unchanged.
+        """
+        timestamp = float(timestamp if timestamp is not None else time.time())
+        with self._lock:
+            slot = self._slot(mint_address)
+            if liquidity is not None:
+                liquidity = float(liquidity)
+                self._liquidity[slot] = liquidity
+                if not liquidity <= self._peak_liquidity[slot]:
+                    self._peak_liquidity[slot] = liquidity
+            if price is not None:
+                price = float(price)
+                self._price[slot] = price
+                if not price <= self._peak_price[slot]:
+                    self._peak_price[slot] = price
+            self._last_seen[slot] = timestamp
+
+            if self._flagged[slot]:
+                return True
+            if not self._in_drop(slot):
+                self._drop_started_at[slot] = NAN
+                return False
+            if math.isnan(self._drop_started_at[slot]):
+                self._drop_started_at[slot] = timestamp
+            if timestamp - self._drop_started_at[slot] >= self.min_drop_seconds:
+                self._flagged[slot] = 1
+                return True
+            return False
+
+    def _in_drop(self, slot):
+        if not self._peak_liquidity[slot] >= self.min_peak_liquidity:
+            return False
+        return (
+            self._drawdown(self._liquidity[slot], self._peak_liquidity[slot]) >= self.liquidity_drop_ratio
+            or self._drawdown(self._price[slot], self._peak_price[slot]) >= self.price_drop_ratio
+        )
+
+    @staticmethod
+    def _drawdown(value, peak):
+        """Returns the fractional drop from the peak, or 0 when unknown."""
+        if not peak > 0 or math.isnan(value):
+            return 0.0
+        return 1.0 - value / peak
+
+    def update_many(self, observations, timestamp=None):
+        """
+        Feeds (mint_address, price_usd, liquidity, ...) observations, the rows
+        the Dexscreener ingest records as snapshots.
+        Returns the mint addresses flagged by this batch.
+        """
+        flagged = []
+        for observation in observations:
+            mint_address = observation[0]
+            was_flagged = self.is_rug_pull(mint_address)
+            if self.update(mint_address, observation[1], observation[2], timestamp) and not was_flagged:
+                flagged.append(mint_address)
+        return flagged
+
+    def warm_from_snapshots(self, conn, since=None):
+        """
+        Rebuilds the state from stored market snapshots, oldest first.
+        Returns the number of observations replayed.
+        """
+        query = """
+            SELECT coins.mint_address, market_snapshots.price_usd, market_snapshots.liquidity, market_snapshots.timestamp
+            FROM market_snapshots JOIN coins ON coins.id = market_snapshots.coin_id
+        """
+        params = []
+        if since is not None:
+            query += " WHERE market_snapshots.timestamp >= ?"
+            params.append(int(since))
+        query += " ORDER BY market_snapshots.timestamp"
+        replayed = 0
+        for mint_address, price, liquidity, timestamp in conn.execute(query, params):
+            self.update(mint_address, price, liquidity, timestamp)
+            replayed += 1
+        return replayed
+
+    def is_rug_pull(self, mint_address):
+        """Returns whether a coin is flagged, or None if it has never been observed."""
+        slot = self._index.get(mint_address)
+        if slot is None:
+            return None
+        return bool(self._flagged[slot])
+
+    def state(self, mint_address):
+        """Returns a coin's rolling state as a dict, or None if it has never been observed."""
+        slot = self._index.get(mint_address)
+        if slot is None:
+            return None
+        drop_started_at = self._drop_started_at[slot]
+        return {
+            'peak_liquidity': self._peak_liquidity[slot],
+            'peak_price': self._peak_price[slot],
+            'liquidity_drawdown': self._drawdown(self._liquidity[slot], self._peak_liquidity[slot]),
+            'price_drawdown': self._drawdown(self._price[slot], self._peak_price[slot]),
+            'seconds_since_drop': None if math.isnan(drop_started_at) else self._last_seen[slot] - drop_started_at,
+            'flagged': bool(self._flagged[slot]),
+        }
+
+_detector = None
+_detector_lock = threading.Lock()
+
+def get_rug_pull_detector(settings=None):
+    """Returns the process-wide rug pull detector, creating it on first use."""
+    global _detector
+    with _detector_lock:
+        if _detector is None:
+            _detector = RugPullDetector.from_settings(settings or get_settings())
+        return _detector
+
+def set_rug_pull_detector(detector):
+    """Replaces the process-wide rug pull detector; None resets it."""
+    global _detector
+    with _detector_lock:
+        _detector = detector
+
+SCORE_COLUMNS = (
+    'observations', 'last_seen',
+    'price_mean', 'price_var', 'price_z',
+    'volume_mean', 'volume_var', 'volume_z',
+    'imbalance_mean', 'imbalance_var', 'imbalance_z',
+    'market_cap_mean', 'band_since',
+)
+_COLUMN = {column: i for i, column in enumerate(SCORE_COLUMNS)}
+# (mean, variance, z-score) column triples of the tracked metrics
+_METRICS = tuple(
+    (_COLUMN[f'{metric}_mean'], _COLUMN[f'{metric}_var'], _COLUMN[f'{metric}_z'])
+    for metric in ('price', 'volume', 'imbalance')
+)
+
+class MomentumScorer:
+    """
+    Scores coins for pumps and tier 1 status from a stream of market observations.
+
+    Per coin it keeps exponentially weighted means and variances of price,
+    24h volume and buy/sell imbalance, plus an exponentially weighted market
+    cap. Each observation updates them in O(1); the weights decay with a
+    half-life in seconds, so irregular polling intervals are handled.
+    Before an observation is folded in, its z-score against the running
+    mean and variance is kept as the coin's momentum.
+
+    A coin is a pump when its latest price and volume z-scores and its mean
+    buy/sell imbalance are above the pump thresholds. It is tier 1 once its
+    weighted market cap has stayed inside the tier 1 band for
+    `tier1_min_seconds`. Neither verdict is given before `min_observations`.
+
+    The state is one NumPy row per coin, so all tracked coins can be scored
+    at once, and it can be saved to and loaded from the coin_scores table.
+    """
+    __slots__ = (
+        'halflife_seconds', 'min_observations', 'pump_price_z', 'pump_volume_z', 'pump_min_imbalance',
+        'tier1_min_market_cap', 'tier1_max_market_cap', 'tier1_min_seconds',
+        '_index', '_mints', '_state', '_dirty', '_lock',
+    )
+
+    def __init__(self, halflife_seconds=3600.0, min_observations=5, pump_price_z=3.0, pump_volume_z=2.0,
+                 pump_min_imbalance=0.1, tier1_min_market_cap=1000000.0, tier1_max_market_cap=0.0,
+                 tier1_min_seconds=86400.0, capacity=1024):
+        self.halflife_seconds = halflife_seconds
+        self.min_observations = min_observations
+        self.pump_price_z = pump_price_z
+        self.pump_volume_z = pump_volume_z
+        self.pump_min_imbalance = pump_min_imbalance
+        self.tier1_min_market_cap = tier1_min_market_cap
+        self.tier1_max_market_cap = tier1_max_market_cap
+        self.tier1_min_seconds = tier1_min_seconds
+        self._index = {}
+        self._mints = []
+        self._state = np.full((capacity, len(SCORE_COLUMNS)), np.nan)
+        self._dirty = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Creates a scorer with the [Scoring] settings."""
+        scoring = settings.scoring
+        return cls(
+            halflife_seconds=scoring.halflife_minutes * 60,
+            min_observations=scoring.min_observations,
+            pump_price_z=scoring.pump_price_z,
+            pump_volume_z=scoring.pump_volume_z,
+            pump_min_imbalance=scoring.pump_min_imbalance,
+            tier1_min_market_cap=scoring.tier1_min_market_cap,
+            tier1_max_market_cap=scoring.tier1_max_market_cap,
+            tier1_min_seconds=scoring.tier1_min_hours * 3600,
+        )
+
+    def __len__(self):
+        return len(self._mints)
+
+    def _slot(self, mint_address):
+        slot = self._index.get(mint_address)
+        if slot is None:
+            slot = len(self._mints)
+            if slot == len(self._state):
+                grown = np.full((2 * len(self._state), len(SCORE_COLUMNS)), np.nan)
+                grown[:slot] = self._state
+                self._state = grown
+            self._index[mint_address] = slot
+            self._mints.append(mint_address)
+            self._state[slot, _COLUMN['observations']] = 0
+        return slot
+
+    def _in_band(self, market_cap):
+        return market_cap >= self.tier1_min_market_cap and (
+            self.tier1_max_market_cap <= 0 or market_cap <= self.tier1_max_market_cap
+        )
+
+    def update(self, mint_address, price, market_cap, volume, buys, sells, timestamp=None):
+        """Folds one observation of a coin into its running statistics. Missing values are skipped."""
+        timestamp = float(timestamp if timestamp is not None else time.time())
+        imbalance = None
+        if buys is not None and sells is not None and buys + sells > 0:
+            imbalance = (buys - sells) / (buys + sells)
+
+        with self._lock:
+            slot = self._slot(mint_address)
+            row = self._state[slot]
+            first = row[_COLUMN['observations']] == 0
+            elapsed = 0.0 if first else max(timestamp - row[_COLUMN['last_seen']], 0.0)
+            alpha = 1.0 - 0.5 ** (elapsed / self.halflife_seconds)
+
+            for (mean, var, z), value in zip(_METRICS, (price, volume, imbalance)):
+                if value is None:
+                    row[z] = np.nan
+                    continue
+                value = float(value)
+                if np.isnan(row[mean]):
+                    row[mean], row[var], row[z] = value, 0.0, 0.0
+                    continue
+                diff = value - row[mean]
+                row[z] = diff / np.sqrt(row[var]) if row[var] > 0 else 0.0
+                increment = alpha * diff
+                row[mean] += increment
+                row[var] = (1.0 - alpha) * (row[var] + diff * increment)
+
+            if market_cap is not None:
+                market_cap = float(market_cap)
+                mean = _COLUMN['market_cap_mean']
+                if np.isnan(row[mean]):
+                    row[mean] = market_cap
+                else:
+                    row[mean] += alpha * (market_cap - row[mean])
+                band_since = _COLUMN['band_since']
+                if not self._in_band(row[mean]):
+                    row[band_since] = np.nan
+                elif np.isnan(row[band_since]):
+                    row[band_since] = timestamp
+
+            row[_COLUMN['observations']] += 1
+            row[_COLUMN['last_seen']] = timestamp
+            self._dirty.add(slot)
+
+    def update_many(self, observations, timestamp=None):
+        """
+        Feeds (mint_address, price_usd, liquidity, market_cap, volume_h24,
+        txns_h24_buys, txns_h24_sells) observations, the rows the Dexscreener
+        ingest records as snapshots.
+        """
+        timestamp = timestamp if timestamp is not None else time.time()
+        for mint_address, price, _, market_cap, volume, buys, sells in observations:
+            self.update(mint_address, price, market_cap, volume, buys, sells, timestamp)
+
+    def _evaluate(self, state):
+        """Computes the pump and tier 1 masks for rows of state."""
+        column = lambda name: state[:, _COLUMN[name]]
+        warm = column('observations') >= self.min_observations
+        with np.errstate(invalid='ignore'):
+            pump = (
+                warm
+                & (column('price_z') >= self.pump_price_z)
+                & (column('volume_z') >= self.pump_volume_z)
+                & (column('imbalance_mean') >= self.pump_min_imbalance)
+            )
+            tier1 = warm & (column('last_seen') - column('band_since') >= self.tier1_min_seconds)
+        return pump, tier1
+
+    def score_all(self, mint_addresses=None):
+        """
+        Scores every tracked coin, or the observed ones of `mint_addresses`,
+        in one pass. Returns (mint_addresses, pump, tier1) with boolean arrays.
+        """
+        with self._lock:
+            if mint_addresses is None:
+                mints = list(self._mints)
+                state = self._state[:len(mints)].copy()
+            else:
+                mints = [mint_address for mint_address in mint_addresses if mint_address in self._index]
+                state = self._state[[self._index[mint_address] for mint_address in mints]]
+        pump, tier1 = self._evaluate(state.reshape(len(mints), len(SCORE_COLUMNS)))
+        return mints, pump, tier1
+
+    def score(self, mint_address):
+        """Returns a coin's (pump, tier1) verdicts, or (None, None) if it has never been observed."""
+        with self._lock:
+            slot = self._index.get(mint_address)
+            if slot is None:
+                return None, None
+            state = self._state[slot:slot + 1].copy()
+        pump, tier1 = self._evaluate(state)
+        return bool(pump[0]), bool(tier1[0])
+
+    def state(self, mint_address):
+        """Returns a coin's statistics as a dict, or None if it has never been observed."""
+        slot = self._index.get(mint_address)
+        if slot is None:
+            return None
+        return dict(zip(SCORE_COLUMNS, self._state[slot].tolist()))
+
+    def save(self, conn):
+        """
+        Writes the statistics of the coins updated since the last save to the
+        coin_scores table. Returns the number of rows written.
+        """
+        with self._lock:
+            slots = sorted(self._dirty)
+            rows = [(self._mints[slot], *self._state[slot].tolist()) for slot in slots]
+            self._dirty.clear()
+        if rows:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO coin_scores (mint_address, {', '.join(SCORE_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * (len(SCORE_COLUMNS) + 1))})",
+                rows
+            )
+        return len(rows)
+
+    def load(self, conn, mint_addresses=None, chunk_size=500):
+        """
+        Restores the statistics saved in the coin_scores table, for every coin
+        or only for `mint_addresses`. Returns the number of coins loaded.
+        """
+        query = f"SELECT mint_address, {', '.join(SCORE_COLUMNS)} FROM coin_scores"
+        if mint_addresses is None:
+            batches = [conn.execute(query)]
+        else:
+            mint_addresses = list(mint_addresses)
+            batches = (
+                conn.execute(f"{query} WHERE mint_address IN ({', '.join('?' * len(chunk))})", chunk)
+                for chunk in (mint_addresses[start:start + chunk_size] for start in range(0, len(mint_addresses), chunk_size))
+            )
+        loaded = 0
+        for rows in batches:
+            rows = rows.fetchall()
+            with self._lock:
+                for row in rows:
+                    slot = self._slot(row[0])
+                    self._state[slot] = [np.nan if value is None else value for value in row[1:]]
+                    loaded += 1
+        return loaded
+
+_scorer = None
+_scorer_lock = threading.Lock()
+
+def get_momentum_scorer(settings=None):
+    """Returns the process-wide momentum scorer, creating it on first use."""
+    global _scorer
+    with _scorer_lock:
+        if _scorer is None:
+            _scorer = MomentumScorer.from_settings(settings or get_settings())
+        return _scorer
+
+def set_momentum_scorer(scorer):
+    """Replaces the process-wide momentum scorer; None resets it."""
+    global _scorer
+    with _scorer_lock:
+        _scorer = scorer
+
+def warm_detectors(settings):
+    """Restores the rug pull detector and momentum scorer state from the database."""
+    reader = get_database(settings.database.db_name).reader()
+    if settings.rug_pull.enabled:
+        since = time.time() - settings.rug_pull.warmup_hours * 3600
+        replayed = get_rug_pull_detector(settings).warm_from_snapshots(reader, since)
+        logger.info("Rug pull detector warmed up from %d snapshots", replayed)
+    if settings.scoring.enabled:
+        loaded = get_momentum_scorer(settings).load(reader)
+        logger.info("Momentum scorer loaded scores for %d coins", loaded)
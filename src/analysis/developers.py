@@ -0,0 +1,200 @@
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from src.config import get_settings
+from src.data.database import Database, write_transaction
+
+logger = logging.getLogger(__name__)
+
+# Addresses per IN (...) query and per executemany when importing a file.
+CHUNK_SIZE = 500
+
+class BloomFilter:
+    """
+    A fixed-size set membership filter with no false negatives.
+
+    `capacity` items fit with a false positive rate of about `error_rate`,
+    at roughly 1.8 bytes per item for a 0.1% rate. Bit positions come from
+    one BLAKE2b digest split into two 64-bit hashes (double hashing).
+    """
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(int(capacity), 1)
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hashes = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def __len__(self):
+        return self.count
+
+def iter_blacklist_file(path):
+    """Streams the addresses in a blacklist file. Blank lines and # comments are skipped."""
+    with open(path) as f:
+        for line in f:
+            entry = line.split('#', 1)[0].strip().strip('"\'')
+            if entry:
+                yield entry
+
+def blacklist_developers(conn, addresses):
+    """Marks developers as blacklisted, adding the ones not seen yet."""
+    batch = []
+    for address in addresses:
+        batch.append((address,))
+        if len(batch) >= CHUNK_SIZE:
+            _blacklist_batch(conn, batch)
+            batch = []
+    if batch:
+        _blacklist_batch(conn, batch)
+
+def _blacklist_batch(conn, batch):
+    conn.executemany("""
+        INSERT INTO developers (address, blacklisted) VALUES (?, 1)
+        ON CONFLICT(address) DO UPDATE SET blacklisted = 1
+    """, batch)
+
+def record_launches(conn, launches, now=None):
+    """
+    Adds newly inserted coins to their developers' launch counts, adding the
+    developers not seen yet. `launches` maps developer addresses to counts.
+    """
+    now = now if now is not None else time.time()
+    conn.executemany("""
+        INSERT INTO developers (address, first_seen_at, coins_launched) VALUES (?, ?, ?)
+        ON CONFLICT(address) DO UPDATE SET coins_launched = coins_launched + excluded.coins_launched
+    """, [(developer, now, count) for developer, count in launches.items() if developer])
+
+def update_serial_ruggers(conn, max_rug_pulls):
+    """
+    Recounts the rug pulls of every developer with a rugged coin and, unless
+    `max_rug_pulls` is 0, blacklists those with at least that many.
+    Returns the number of newly blacklisted developers.
+    """
+    conn.execute("""
+        UPDATE developers SET rug_pulls = counts.rug_pulls
+        FROM (
+            SELECT developer_address, COUNT(*) AS rug_pulls FROM coins
+            WHERE rug_pull = 1 AND developer_address IS NOT NULL
+            GROUP BY developer_address
+        ) AS counts
+        WHERE developers.address = counts.developer_address
+    """)
+    if max_rug_pulls <= 0:
+        return 0
+    return conn.execute("""
+        UPDATE developers SET blacklisted = 1 WHERE rug_pulls >= ? AND NOT blacklisted
+    """, (max_rug_pulls,)).rowcount
+
+def blacklisted_developers(conn, addresses):
+    """Returns the blacklisted developers among `addresses`, with one indexed query per chunk."""
+    addresses = list({address for address in addresses if address})
+    found = set()
+    for start in range(0, len(addresses), CHUNK_SIZE):
+        chunk = addresses[start:start + CHUNK_SIZE]
+        rows = conn.execute(f"""
+            SELECT address FROM developers
+            WHERE blacklisted = 1 AND address IN ({', '.join('?' * len(chunk))})
+        """, chunk)
+        found.update(row[0] for row in rows)
+    return found
+
+class DeveloperBlacklist:
+    """
+    Fast membership checks against a developer blacklist of any size.
+
+    The developers table is the source of truth: it receives the [DeveloperBlacklist]
+    entries and file, and developers with `max_rug_pulls` rugged coins. A
+    Bloom filter of the blacklisted addresses sits in front of it, so the
+    common case, a developer who is not blacklisted, is answered from
+    memory, and only the filter's positives are confirmed with an indexed
+    lookup. `load()` picks up developers blacklisted since the last load and
+    is called once at startup, so configuration errors such as a missing
+    blacklist file fail fast; `reload_if_stale()` then reloads periodically
+    without blocking the event loop.
+    """
+    def __init__(self, target, settings=None):
+        self.settings = settings or get_settings()
+        self.target = target
+        self.bloom = BloomFilter(1)
+        self.loaded_at = None
+        self._imported = False
+        self._reload = None
+
+    def _reader(self):
+        return self.target.reader() if isinstance(self.target, Database) else self.target
+
+    def load(self):
+        """
+        Imports the configured blacklist on the first call, blacklists serial
+        ruggers and rebuilds the filter. Returns the number of blacklisted developers.
+        """
+        blacklists = self.settings.blacklists
+        with write_transaction(self.target) as conn:
+            if not self._imported:
+                blacklist_developers(conn, blacklists.developers)
+                if blacklists.developers_file:
+                    blacklist_developers(conn, iter_blacklist_file(blacklists.developers_file))
+            newly_blacklisted = update_serial_ruggers(conn, blacklists.max_developer_rug_pulls)
+        self._imported = True
+        if newly_blacklisted:
+            logger.info("Blacklisted %d serial rug pull developers", newly_blacklisted)
+
+        reader = self._reader()
+        count = reader.execute("SELECT COUNT(*) FROM developers WHERE blacklisted = 1").fetchone()[0]
+        # Leave room for the developers blacklisted until the next reload.
+        bloom = BloomFilter(max(count * 2, 1024), blacklists.developer_bloom_error_rate)
+        for (address,) in reader.execute("SELECT address FROM developers WHERE blacklisted = 1"):
+            bloom.add(address)
+        self.bloom = bloom
+        self.loaded_at = time.monotonic()
+        return count
+
+    @property
+    def stale(self):
+        """Whether the blacklist was never loaded or `developer_reload_minutes` have passed since."""
+        return self.loaded_at is None or time.monotonic() - self.loaded_at >= self.settings.blacklists.developer_reload_minutes * 60
+
+    async def reload_if_stale(self):
+        """
+        Reloads the blacklist in a background worker thread once it is stale.
+        Checks keep using the current filter, which is swapped for the new
+        one when it is complete; a failed reload is logged and the current
+        filter is kept.
+        """
+        if not self.stale or (self._reload is not None and not self._reload.done()):
+            return
+        self._reload = asyncio.create_task(self._reload_in_background())
+
+    async def _reload_in_background(self):
+        try:
+            await asyncio.to_thread(self.load)
+        except Exception:
+            # Keep the current filter and try again at the next reload.
+            self.loaded_at = time.monotonic()
+            logger.exception("Error reloading the developer blacklist")
+
+    async def wait_for_reload(self):
+        """Waits for a background reload in progress to finish."""
+        if self._reload is not None:
+            await self._reload
+            self._reload = None
+
+    def __contains__(self, address):
+        if not address or address not in self.bloom:
+            return False
+        return bool(blacklisted_developers(self._reader(), [address]))
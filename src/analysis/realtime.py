@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import time
+from collections import deque
+import numpy as np
+from src import metrics
+from src.config import get_settings
+from src.data.database import Database, get_database, recheck_modifier, write_transaction
+from src.analysis.analyzer import analyze_coin, build_rule_pipeline, momentum_scores, skipped, get_rugcheck_data, rugcheck_governor
+from src.analysis.developers import record_launches
+from src.analysis.rugcheck_cache import RugcheckCache
+from src.analysis.rules import RuleContext
+
+logger = logging.getLogger(__name__)
+
+VERDICT_SECONDS = metrics.histogram('realtime_verdict_seconds', 'Time from receiving a new pump.fun token to writing its verdict.')
+
+class RealtimeAnalyzer:
+    """
+    Analyzes freshly launched tokens as soon as they are seen.
+
+    The pump.fun listener submits each new token to a bounded asyncio queue;
+    when the queue is full, `submit` waits, which slows the listener down
+    instead of letting work pile up. A pool of worker tasks takes tokens off
+    the queue, runs the same rule pipeline and verdicts as a batch sweep in
+    a worker thread, and writes the flags back.
+
+    The time from receiving a token to writing its verdict is recorded and
+    reported as p50/p99 latencies.
+    """
+    def __init__(self, settings=None, target=None, workers=None, queue_size=None, cache=None, max_latency_samples=10000):
+        self.settings = settings or get_settings()
+        self.target = target if target is not None else get_database(self.settings.database.db_name)
+        self.workers = workers or self.settings.realtime.workers
+        self.queue = asyncio.Queue(maxsize=queue_size if queue_size is not None else self.settings.realtime.queue_size)
+        self.pipeline = build_rule_pipeline(self.settings)
+        self.governor = rugcheck_governor(self.settings)
+        self.cache = cache
+        self._owns_cache = False
+        if self.cache is None and self.settings.rugcheck_cache.enabled and isinstance(self.target, Database):
+            self.cache = RugcheckCache.from_settings(self.settings, database=self.target)
+            self._owns_cache = True
+        self.latencies = deque(maxlen=max_latency_samples)
+        self.analyzed = 0
+        self.failed = 0
+        self._tasks = []
+
+    def start(self):
+        """Starts the worker tasks."""
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def submit(self, row, received_at=None):
+        """
+        Queues a new token for analysis.
+        `row` is the (mint, name, symbol, description, image_uri, source) row
+        the listener stores; `received_at` is a time.monotonic() timestamp.
+        """
+        await self.queue.put((row, received_at if received_at is not None else time.monotonic()))
+
+    async def _worker(self):
+        while True:
+            row, received_at = await self.queue.get()
+            try:
+                await asyncio.to_thread(self.analyze_token, row)
+                latency = time.monotonic() - received_at
+                self.latencies.append(latency)
+                VERDICT_SECONDS.observe(latency)
+                self.analyzed += 1
+            except Exception:
+                self.failed += 1
+                logger.exception("Error analyzing new token", extra={'mint_address': row[0]})
+            finally:
+                self.queue.task_done()
+
+    def lookup_rugcheck(self, mint_addresses):
+        return [get_rugcheck_data(mint_address, self.cache, self.governor) for mint_address in mint_addresses]
+
+    def analyze_token(self, row):
+        """Runs the rule pipeline and verdicts for one new token and stores its flags."""
+        mint_address, name, symbol, description, image_uri, source, developer_address = row
+        reader = self.target.reader() if isinstance(self.target, Database) else self.target
+        coin = reader.execute("SELECT * FROM coins WHERE mint_address = ?", (mint_address,)).fetchone()
+        if coin is None:
+            # The batch writer may not have flushed this token yet.
+            coin = {
+                'id': None, 'mint_address': mint_address, 'name': name, 'symbol': symbol,
+                'developer_address': developer_address, 'market_cap': None, 'liquidity': None, 'volume_h24': None,
+                'txns_h24_buys': None, 'txns_h24_sells': None,
+            }
+
+        score = momentum_scores([coin], self.settings).get(mint_address, (None, None))
+        context = RuleContext(self.settings, self.lookup_rugcheck, reader)
+        survivors = self.pipeline.run([coin], context)
+        if survivors:
+            flags = analyze_coin(coin, context.rugcheck_data.get(coin['id']), self.settings, score)
+        else:
+            flags = skipped(score)
+        self.write_verdict(row, flags)
+        return flags
+
+    def write_verdict(self, row, flags):
+        """
+        Stores a token's flags, inserting the token first if it is not stored
+        yet, along with the buffered rugcheck results. Whichever of this and
+        the listener's batch writer inserts the token counts its launch.
+        """
+        bundled_supply, rug_pull, pump, tier1, cex_listed = flags
+        with write_transaction(self.target) as conn:
+            stored = conn.execute("SELECT 1 FROM coins WHERE mint_address = ?", (row[0],)).fetchone()
+            if stored is None:
+                record_launches(conn, {row[6]: 1})
+            conn.execute("""
+                INSERT INTO coins (mint_address, name, symbol, description, image_uri, source, developer_address,
+                    bundled_supply, rug_pull, pump, tier1, cex_listed, last_analyzed_timestamp,
+                    analysis_status, next_analysis_at)
+                VALUES (:mint, :name, :symbol, :description, :image_uri, :source, :developer_address,
+                    :bundled_supply, COALESCE(:rug_pull, FALSE), COALESCE(:pump, FALSE),
+                    COALESCE(:tier1, FALSE), COALESCE(:cex_listed, FALSE), CURRENT_TIMESTAMP,
+                    'analyzed', datetime('now', :recheck))
+                ON CONFLICT(mint_address) DO UPDATE SET
+                    bundled_supply = bundled_supply OR :bundled_supply,
+                    rug_pull = MAX(IFNULL(rug_pull, FALSE), IFNULL(:rug_pull, FALSE)),
+                    pump = COALESCE(:pump, pump),
+                    tier1 = COALESCE(:tier1, tier1),
+                    cex_listed = COALESCE(:cex_listed, cex_listed),
+                    last_analyzed_timestamp = CURRENT_TIMESTAMP,
+                    analysis_status = 'analyzed',
+                    next_analysis_at = datetime('now', :recheck)
+            """, {
+                'mint': row[0], 'name': row[1], 'symbol': row[2],
+                'description': row[3], 'image_uri': row[4], 'source': row[5], 'developer_address': row[6],
+                'bundled_supply': bundled_supply, 'rug_pull': rug_pull, 'pump': pump,
+                'tier1': tier1, 'cex_listed': cex_listed,
+                'recheck': recheck_modifier(self.settings.analysis.recheck_age_hours),
+            })
+            if self.cache is not None:
+                self.cache.flush(conn)
+
+    def latency_percentiles(self):
+        """Returns the p50 and p99 new-token-to-verdict latencies in seconds, or None without samples."""
+        if not self.latencies:
+            return None
+        p50, p99 = np.percentile(np.fromiter(self.latencies, dtype=float), [50, 99])
+        return {'p50': float(p50), 'p99': float(p99)}
+
+    def stats(self):
+        """Returns the analyzer's counters and latency percentiles."""
+        return {
+            'analyzed': self.analyzed,
+            'failed': self.failed,
+            'queued': self.queue.qsize(),
+            'latency': self.latency_percentiles(),
+        }
+
+    async def close(self, drain=True):
+        """Stops the workers, first waiting for queued tokens when `drain` is set."""
+        if drain and self._tasks:
+            await self.queue.join()
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        if self._owns_cache:
+            self.cache.close()
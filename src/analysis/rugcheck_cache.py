@@ -0,0 +1,151 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
+from src.data.database import Database
+
+OUTCOME_GOOD = 'good'
+OUTCOME_DANGER = 'danger'
+OUTCOME_ERROR = 'error'
+
+def get_outcome(rugcheck_data):
+    """Classifies rugcheck data as a good, danger or error outcome."""
+    if not rugcheck_data:
+        return OUTCOME_ERROR
+    if rugcheck_data.rugged or rugcheck_data.result == 'Danger':
+        return OUTCOME_DANGER
+    return OUTCOME_GOOD
+
+def serialize_risks(risks):
+    """Converts rugcheck risks into a JSON string."""
+    return json.dumps([
+        {
+            'name': getattr(risk, 'name', None),
+            'level': getattr(risk, 'level', None),
+            'description': getattr(risk, 'description', None),
+            'score': getattr(risk, 'score', None),
+        }
+        for risk in risks or []
+    ], default=str)
+
+def deserialize_risks(risks_json):
+    """Converts a JSON string back into risk objects with attribute access."""
+    return [SimpleNamespace(**risk) for risk in json.loads(risks_json or '[]')]
+
+class RugcheckCache:
+    """
+    A SQLite-backed cache of rugcheck results.
+
+    Only the fields the analyzer uses are stored (`rugged`, `result` and
+    `risks`), together with the time they were fetched. Each outcome has its
+    own TTL so that failed lookups are retried sooner than good or dangerous
+    verdicts. The cache may be shared between worker threads: lookups use the
+    calling thread's read connection. New results are buffered, and served
+    from the buffer, until `flush()` writes them all at once, ideally in the
+    transaction that stores the analysis results.
+    """
+    def __init__(self, db_name=None, good_ttl=3600, danger_ttl=86400, error_ttl=300, database=None):
+        if database is None and not db_name:
+            raise ValueError("The rugcheck cache needs a database file or a Database, not an in-memory connection")
+        self.db = database or Database(db_name)
+        self._owns_db = database is None
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.ttls = {
+            OUTCOME_GOOD: good_ttl,
+            OUTCOME_DANGER: danger_ttl,
+            OUTCOME_ERROR: error_ttl,
+        }
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_settings(cls, settings, db_name=None, database=None):
+        """Creates a cache using the TTLs from the rugcheck cache settings."""
+        return cls(
+            db_name,
+            good_ttl=settings.rugcheck_cache.good_ttl_seconds,
+            danger_ttl=settings.rugcheck_cache.danger_ttl_seconds,
+            error_ttl=settings.rugcheck_cache.error_ttl_seconds,
+            database=database,
+        )
+
+    def get(self, mint_address):
+        """
+        Looks up a cached result.
+        Returns a (hit, rugcheck_data) tuple; rugcheck_data is None for cached errors.
+        """
+        with self._lock:
+            row = self._pending.get(mint_address)
+        if row is None:
+            row = self.db.reader().execute(
+                "SELECT rugged, result, risks, outcome, fetched_at FROM rugcheck_cache WHERE mint_address = ?",
+                (mint_address,)
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return False, None
+        rugged, result, risks, outcome, fetched_at = row
+        if time.time() - fetched_at > self.ttls.get(outcome, 0):
+            self.misses += 1
+            return False, None
+        self.hits += 1
+
+        if outcome == OUTCOME_ERROR:
+            return True, None
+        return True, SimpleNamespace(
+            token_address=mint_address,
+            rugged=bool(rugged),
+            result=result,
+            risks=deserialize_risks(risks),
+        )
+
+    def put(self, mint_address, rugcheck_data):
+        """
+        Buffers a rugcheck result (or a failed lookup when rugcheck_data is
+        None) until the next flush().
+        """
+        outcome = get_outcome(rugcheck_data)
+        if rugcheck_data:
+            values = (bool(rugcheck_data.rugged), rugcheck_data.result, serialize_risks(rugcheck_data.risks))
+        else:
+            values = (None, None, None)
+        with self._lock:
+            self._pending[mint_address] = (*values, outcome, time.time())
+
+    def flush(self, conn=None):
+        """
+        Writes the buffered results with one executemany: on `conn`, inside
+        the caller's transaction, or else in a transaction of the cache's
+        own. Returns the number of results written.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        rows = [(mint_address, *values) for mint_address, values in pending.items()]
+        if conn is None:
+            with self.db.writer() as conn:
+                self._write(conn, rows)
+        else:
+            self._write(conn, rows)
+        return len(rows)
+
+    @staticmethod
+    def _write(conn, rows):
+        conn.executemany("""
+            INSERT INTO rugcheck_cache (mint_address, rugged, result, risks, outcome, fetched_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(mint_address) DO UPDATE SET
+                rugged = excluded.rugged,
+                result = excluded.result,
+                risks = excluded.risks,
+                outcome = excluded.outcome,
+                fetched_at = excluded.fetched_at
+        """, rows)
+
+    def close(self):
+        """Writes the buffered results and closes the cache's database connections unless the Database is shared."""
+        self.flush()
+        if self._owns_db:
+            self.db.close()
@@ -0,0 +1,50 @@
+import numpy as np
+
+NUMERIC_COLUMNS = ('market_cap', 'liquidity', 'volume_h24', 'txns_h24_buys', 'txns_h24_sells')
+
+def load_numeric_columns(coins):
+    """
+    Loads the numeric columns of a batch of coin rows into float64 arrays.
+    NULLs become NaN.
+    """
+    values = np.array([[coin[column] for column in NUMERIC_COLUMNS] for coin in coins], dtype=np.float64)
+    values = values.reshape(len(coins), len(NUMERIC_COLUMNS))
+    return {column: values[:, i] for i, column in enumerate(NUMERIC_COLUMNS)}
+
+def is_truthy(values):
+    """Mirrors Python truthiness for nullable numbers: not NULL and not zero."""
+    return ~np.isnan(values) & (values != 0)
+
+def blacklist_mask(coins, settings):
+    """Flags the coins whose mint address is blacklisted."""
+    tokens = settings.blacklists.tokens
+    return np.fromiter((coin['mint_address'] in tokens for coin in coins), dtype=bool, count=len(coins))
+
+def filter_mask(columns, settings):
+    """Vectorized is_coin_filtered: flags coins below the market cap or liquidity minimums."""
+    market_cap = columns['market_cap']
+    liquidity = columns['liquidity']
+    return (
+        (is_truthy(market_cap) & (market_cap < settings.filters.min_market_cap))
+        | (is_truthy(liquidity) & (liquidity < settings.filters.min_liquidity))
+    )
+
+def fake_volume_mask(columns, settings):
+    """Vectorized has_fake_volume_custom: flags coins whose volume looks fake."""
+    volume = columns['volume_h24']
+    liquidity = columns['liquidity']
+    buys = columns['txns_h24_buys']
+    sells = columns['txns_h24_sells']
+    fake_volume = settings.fake_volume
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        high_volume = (
+            is_truthy(liquidity) & is_truthy(volume) & (liquidity > 0)
+            & (volume / liquidity > fake_volume.max_volume_to_liquidity_ratio)
+        )
+        has_txns = ~np.isnan(buys) & ~np.isnan(sells)
+        few_txns = has_txns & (buys + sells < fake_volume.min_txns_24h)
+        high_buys = has_txns & (sells > 0) & (buys / sells > fake_volume.max_buy_sell_ratio)
+        high_sells = has_txns & (buys > 0) & (sells / buys > fake_volume.max_buy_sell_ratio)
+
+    return high_volume | few_txns | high_buys | high_sells
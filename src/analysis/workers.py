@@ -0,0 +1,189 @@
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src import metrics
+from src.config import get_settings, load_settings, set_settings
+from src.data.database import Database, close_databases, get_database, get_db_path, write_transaction
+from src.logs import configure_logging
+from src.analysis.detectors import get_momentum_scorer, warm_detectors
+from src.analysis.analyzer import analyze_chunk, build_rule_pipeline, get_rugcheck_data, rugcheck_governor, write_coin_updates
+from src.analysis.rugcheck_cache import RugcheckCache
+
+logger = logging.getLogger(__name__)
+
+COINS_CLAIMED = metrics.counter('analysis_coins_claimed_total', 'Coins leased by analysis workers.', ('kind',))
+LEASES_LOST = metrics.counter('analysis_leases_lost_total', 'Analysis results dropped because the lease had passed to another worker.')
+
+# Leases the claimable coins of one kind. Parameters: owner, lease expiry, now, limit.
+CLAIM_QUERIES = {
+    'pending': """
+        UPDATE coins SET lease_owner = ?, lease_expires_at = ?
+        WHERE id IN (
+            SELECT id FROM coins
+            WHERE analysis_status = 'pending' AND (lease_expires_at IS NULL OR lease_expires_at < ?)
+            ORDER BY id LIMIT ?
+        )
+        RETURNING *
+    """,
+    'due': """
+        UPDATE coins SET lease_owner = ?, lease_expires_at = ?
+        WHERE id IN (
+            SELECT id FROM coins
+            WHERE next_analysis_at <= datetime('now') AND analysis_status != 'pending'
+                AND (lease_expires_at IS NULL OR lease_expires_at < ?)
+            ORDER BY next_analysis_at LIMIT ?
+        )
+        RETURNING *
+    """,
+}
+
+def default_worker_id():
+    """Returns an id that is unique across the processes sharing a database."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def claim_coins(target, owner, limit, lease_seconds, now=None):
+    """
+    Atomically leases up to `limit` coins that need an analysis to `owner`
+    for `lease_seconds`: pending coins first, then coins due for a recheck.
+    Coins leased by another worker are skipped until their lease expires.
+    Returns the claimed rows ordered by id.
+    """
+    now = now if now is not None else time.time()
+    claimed = []
+    with write_transaction(target) as conn:
+        for kind, query in CLAIM_QUERIES.items():
+            if len(claimed) >= limit:
+                break
+            rows = conn.execute(query, (owner, now + lease_seconds, now, limit - len(claimed))).fetchall()
+            COINS_CLAIMED.inc(len(rows), kind=kind)
+            claimed.extend(rows)
+    return sorted(claimed, key=lambda coin: coin['id'])
+
+class AnalysisWorker:
+    """
+    Analyzes coins by leasing batches of them, so any number of workers, in
+    one or several processes, can share a database without analyzing the
+    same coin twice. SQLite's write-ahead log only works on one host, so all
+    the workers run on the host that stores the database.
+
+    Each batch is claimed with `claim_coins`, run through the rule pipeline
+    and written with `write_coin_updates`, which releases the leases. Results
+    for coins whose lease expired and passed to another worker are dropped.
+    The batch size and lease duration come from the [Workers] config section.
+
+    A worker in a process that does not run the Dexscreener ingest sets
+    `reload_scores`: the momentum statistics of each claimed batch are then
+    reloaded from the coin_scores table the ingest keeps up to date, so the
+    pump and tier 1 verdicts do not go stale. Rug pulls need no reload, the
+    ingest stores them on the coins themselves and the flag is sticky.
+    """
+    def __init__(self, owner=None, target=None, settings=None, requests_per_second=None, cache=None, reload_scores=False):
+        self.settings = settings or get_settings()
+        self.reload_scores = reload_scores
+        self.owner = owner or default_worker_id()
+        self.target = target if target is not None else get_database(self.settings.database.db_name)
+        self.pipeline = build_rule_pipeline(self.settings)
+        self.governor = rugcheck_governor(self.settings, requests_per_second)
+        self.cache = cache
+        self._owns_cache = False
+        if self.cache is None and self.settings.rugcheck_cache.enabled:
+            if isinstance(self.target, Database):
+                self.cache = RugcheckCache.from_settings(self.settings, database=self.target)
+            else:
+                self.cache = RugcheckCache.from_settings(self.settings, get_db_path(self.target))
+            self._owns_cache = True
+        self.executor = ThreadPoolExecutor(max_workers=self.settings.analysis.max_workers)
+        self.analyzed = 0
+
+    def lookup_rugcheck(self, mint_addresses):
+        return self.executor.map(lambda mint_address: get_rugcheck_data(mint_address, self.cache, self.governor), mint_addresses)
+
+    def run_once(self, now=None):
+        """Claims and analyzes one batch. Returns the number of coins analyzed."""
+        workers = self.settings.workers
+        coins = claim_coins(self.target, self.owner, workers.batch_size, workers.lease_seconds, now)
+        if not coins:
+            return 0
+        reader = self.target.reader() if isinstance(self.target, Database) else self.target
+        if self.reload_scores and self.settings.scoring.enabled:
+            get_momentum_scorer(self.settings).load(reader, [coin['mint_address'] for coin in coins])
+        updates = analyze_chunk(coins, self.pipeline, self.settings, self.lookup_rugcheck, reader)
+        written = write_coin_updates(self.target, updates, self.settings.analysis.recheck_age_hours, self.owner, self.cache)
+        if written < len(coins):
+            LEASES_LOST.inc(len(coins) - written)
+            logger.warning("Dropped %d results whose lease expired", len(coins) - written, extra={'worker': self.owner})
+        self.analyzed += written
+        return len(coins)
+
+    def run(self, once=False, stop_event=None):
+        """
+        Analyzes batches until no coin is left with `once`, or until
+        `stop_event` is set, polling every `poll_seconds` while idle.
+        """
+        stop_event = stop_event or threading.Event()
+        while not stop_event.is_set():
+            if self.run_once():
+                continue
+            if once:
+                break
+            stop_event.wait(self.settings.workers.poll_seconds)
+        logger.info("Analysis worker finished", extra={'worker': self.owner, 'coins': self.analyzed})
+        return self.analyzed
+
+    def close(self):
+        """Stops the rugcheck lookup threads and closes the cache it opened."""
+        self.executor.shutdown()
+        if self._owns_cache:
+            self.cache.close()
+
+def worker_process(config_path, index, requests_per_second, once):
+    """The entry point of an analysis worker process."""
+    settings = load_settings(config_path)
+    set_settings(settings)
+    configure_logging(settings.logging)
+    warm_detectors(settings)
+    worker = AnalysisWorker(f"{default_worker_id()}:{index}", settings=settings, requests_per_second=requests_per_second, reload_scores=True)
+    try:
+        worker.run(once)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        worker.close()
+        close_databases()
+
+def run_worker_processes(config_path, count, once=False, settings=None):
+    """
+    Runs `count` analysis worker processes and waits for them to exit.
+    The rugcheck request budget of the [Analysis] section is split between
+    them, so adding workers does not raise the load on rugcheck.
+    Returns the number of workers that failed.
+    """
+    if count < 1:
+        raise ValueError(f"At least one analysis worker is needed, got {count}")
+    settings = settings or get_settings()
+    requests_per_second = settings.analysis.rugcheck_requests_per_second / count
+    # Spawned rather than forked, so no thread or connection state is inherited.
+    context = multiprocessing.get_context('spawn')
+    processes = [
+        context.Process(target=worker_process, args=(config_path, index, requests_per_second, once), name=f"analysis-worker-{index}")
+        for index in range(count)
+    ]
+    for process in processes:
+        process.start()
+    logger.info("Started %d analysis workers", count)
+    try:
+        for process in processes:
+            process.join()
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+                process.join()
+    failed = sum(1 for process in processes if process.exitcode != 0)
+    if failed:
+        logger.warning("%d of %d analysis workers failed", failed, count)
+    return failed
@@ -0,0 +1,488 @@
+import configparser
+from dataclasses import dataclass, field
+
+DEFAULT_CONFIG_PATH = 'config/config.ini'
+
+def parse_list(value):
+    """
+    Parses a comma-separated config value into a frozenset.
+    Surrounding quotes and whitespace are stripped and empty entries dropped.
+    """
+    items = (item.strip().strip('"\'').strip() for item in (value or '').strip().strip('"\'').split(','))
+    return frozenset(item for item in items if item)
+
+def parse_bool(value):
+    """Parses a config boolean the same way configparser does."""
+    if isinstance(value, bool):
+        return value
+    return configparser.ConfigParser.BOOLEAN_STATES[str(value).strip().lower()]
+
+def load_list_file(path):
+    """Reads one entry per line from a file. Blank lines and # comments are skipped."""
+    with open(path) as f:
+        return frozenset(
+            entry for entry in (line.split('#', 1)[0].strip().strip('"\'') for line in f) if entry
+        )
+
+def get_section(parser, name):
+    """Returns a config section, or an empty mapping if it is missing."""
+    return parser[name] if parser.has_section(name) else {}
+
+def get_blacklist(parser, section_name, key):
+    """Builds a blacklist from an inline list plus an optional `<key>_file`."""
+    section = get_section(parser, section_name)
+    entries = parse_list(section.get(key, ''))
+    path = section.get(f'{key}_file', '').strip()
+    if path:
+        entries |= load_list_file(path)
+    return entries
+
+@dataclass(frozen=True)
+class ApiSettings:
+    dexscreener_api_url: str = 'https://api.dexscreener.com/latest/'
+    pump_fun_frontend_api_url: str = 'https://frontend-api.pump.fun/'
+    pumpportal_websocket_url: str = 'wss://pumpportal.fun/api/data'
+    rugcheck_api_url: str = 'https://api.rugcheck.xyz/v1/'
+
+    @classmethod
+    def from_parser(cls, parser):
+        section = get_section(parser, 'api')
+        return cls(
+            dexscreener_api_url=section.get('dexscreener_api_url', cls.dexscreener_api_url),
+            pump_fun_frontend_api_url=section.get('pump_fun_frontend_api_url', cls.pump_fun_frontend_api_url),
+            pumpportal_websocket_url=section.get('pumpportal_websocket_url', cls.pumpportal_websocket_url),
+            rugcheck_api_url=section.get('rugcheck_api_url', cls.rugcheck_api_url),
+        )
+
+@dataclass(frozen=True)
+class DatabaseSettings:
+    db_name: str = 'coins.db'
+    journal_mode: str = 'WAL'
+    synchronous: str = 'NORMAL'
+    busy_timeout_ms: int = 5000
+    cache_size_mb: int = 64
+    mmap_size_mb: int = 256
+
+    @classmethod
+    def from_parser(cls, parser):
+        section = get_section(parser, 'database')
+        return cls(
+            db_name=section.get('db_name', cls.db_name),
+            journal_mode=section.get('journal_mode', cls.journal_mode),
+            synchronous=section.get('synchronous', cls.synchronous),
+            busy_timeout_ms=int(section.get('busy_timeout_ms', cls.busy_timeout_ms)),
+            cache_size_mb=int(section.get('cache_size_mb', cls.cache_size_mb)),
+            mmap_size_mb=int(section.get('mmap_size_mb', cls.mmap_size_mb)),
+        )
+
+@dataclass(frozen=True)
+class FilterSettings:
+    min_market_cap: float = 0.0
+    min_liquidity: float = 0.0
+
+    @classmethod
+    def from_parser(cls, parser):
+        section = get_section(parser, 'Filters')
+        return cls(
+            min_market_cap=float(section.get('min_market_cap', cls.min_market_cap)),
+            min_liquidity=float(section.get('min_liquidity', cls.min_liquidity)),
+        )
+
+@dataclass(frozen=True)
+class BlacklistSettings:
+    tokens: frozenset = frozenset()
+    developers: frozenset = frozenset()
+    # Developer blacklist files can hold hundreds of thousands of wallets, so
+    # they are streamed into the developers table rather than kept here.
+    developers_file: str = ''
+    max_developer_rug_pulls: int = 0
+    developer_bloom_error_rate: float = 0.001
+    developer_reload_minutes: float = 10.0
+
+    @classmethod
+    def from_parser(cls, parser):
+        developers = get_section(parser, 'DeveloperBlacklist')
+        return cls(
+            tokens=get_blacklist(parser, 'CoinBlacklist', 'tokens'),
+            developers=parse_list(developers.get('developers', '')),
+            developers_file=developers.get('developers_file', '').strip(),
+            max_developer_rug_pulls=int(developers.get('max_rug_pulls', cls.max_developer_rug_pulls)),
+            developer_bloom_error_rate=float(developers.get('bloom_error_rate', cls.developer_bloom_error_rate)),
+            developer_reload_minutes=float(developers.get('reload_minutes', cls.developer_reload_minutes)),
+        )
+
+@dataclass(frozen=True)
+class FakeVolumeSettings:
+    max_volume_to_liquidity_ratio: float = float('inf')
+    min_txns_24h: int = 0
+    max_buy_sell_ratio: float = float('inf')
+
+    @classmethod
+    def from_parser(cls, parser):
+        section = get_section(parser, 'FakeVolume')
+        return cls(
+            max_volume_to_liquidity_ratio=float(section.get('max_volume_to_liquidity_ratio', cls.max_volume_to_liquidity_ratio)),
+            min_txns_24h=int(section.get('min_txns_24h', cls.min_txns_24h)),
+            max_buy_sell_ratio=float(section.get('max_buy_sell_ratio', cls.max_buy_sell_ratio)),
+        )
+
+@dataclass(frozen=True)
+class DexscreenerSettings:
+    concurrency: int = 8
+    pair_policy: str = 'liquidity'
+    requests_per_minute: float = 300.0
+
+    @classmethod
+    def from_parser(cls, parser):
+        section = get_section(parser, 'Dexscreener')
+        return cls(
+            concurrency=int(section.get('concurrency', cls.concurrency)),
+            pair_policy=section.get('pair_policy', cls.pair_policy).strip().lower(),
+            requests_per_minute=float(section.get('requests_per_minute', cls.requests_per_minute)),
+        )
+
+@dataclass(frozen=True)
+class RefreshSettings:
+    requests_per_minute: float = 60.0
+    cycle_seconds: float = 60.0
+    batch_size: int = 30
+    min_interval_seconds: float = 60.0
+    max_interval_seconds: float = 3600.0
+    volatility_weight: float = 10.0
+    backoff_factor: float = 2.0
+    dead_after_misses: int = 10
+    dead_interval_hours: float = 24.0
+
+    @classmethod
+    def from_parser(cls, parser):
+        section = get_section(parser, 'Refresh')
+        return cls(
+            requests_per_minute=float(section.get('requests_per_minute', cls.requests_per_minute)),
+            cycle_seconds=float(section.get('cycle_seconds', cls.cycle_seconds)),
+            batch_size=int(section.get('batch_size', cls.batch_size)),
+            min_interval_seconds=float(section.get('min_interval_seconds', cls.min_interval_seconds)),
+            max_interval_seconds=float(section.get('max_interval_seconds', cls.max_interval_seconds)),
+            volatility_weight=float(section.get('volatility_weight', cls.volatility_weight)),
+            backoff_factor=float(section.get('backoff_factor', cls.backoff_factor)),
+            dead_after_misses=int(section.get('dead_after_misses', cls.dead_after_misses)),
+            dead_interval_hours=float(section.get('dead_interval_hours', cls.dead_interval_hours)),
+        )
+
+@dataclass(frozen=True)
+class AnalysisSettings:
+    max_workers: int = 1
+    rugcheck_requests_per_second: float = 1.0
+    incremental: bool = False
+    recheck_age_hours: float = 24.0
+    chunk_size: int = 500
+
+    @classmethod
+    def from_parser(cls, parser):
+        section = get_section(parser, 'Analysis')
+        return cls(
+            max_workers=max(1, int(section.get('max_workers', cls.max_workers))),
+            rugcheck_requests_per_second=float(section.get('rugcheck_requests_per_second', cls.rugcheck_requests_per_second)),
+            incremental=parse_bool(section.get('incremental', cls.incremental)),
+            recheck_age_hours=float(section.get('recheck_age_hours', cls.recheck_age_hours)),
+            chunk_size=int(section.get('chunk_size', cls.chunk_size)),
+        )
+
+@dataclass(frozen=True)
+class WorkerSettings:
+    batch_size: int = 100
+    lease_seconds: float = 300.0
+    poll_seconds: float = 5.0
+
+    @classmethod
+    def from_parser(cls, parser):
+        section = get_section(parser, 'Workers')
+        return cls(
+            batch_size=max(1, int(section.get('batch_size', cls.batch_size))),
+            lease_seconds=float(section.get('lease_seconds', cls.lease_seconds)),
+            poll_seconds=float(section.get('poll_seconds', cls.poll_seconds)),
+        )
+
+@dataclass(frozen=True)
+class RugcheckCacheSettings:
+    enabled: bool = True
+    good_ttl_seconds: float = 3600.0
+    danger_ttl_seconds: float = 86400.0
+    error_ttl_seconds: float = 300.0
+
+    @classmethod
+    def from_parser(cls, parser):
+        section = get_section(parser, 'RugcheckCache')
+        return cls(
+            enabled=parse_bool(section.get('enabled', cls.enabled)),
+            good_ttl_seconds=float(section.get('good_ttl_seconds', cls.good_ttl_seconds)),
+            danger_ttl_seconds=float(section.get('danger_ttl_seconds', cls.danger_ttl_seconds)),
+            error_ttl_seconds=float(section.get('error_ttl_seconds', cls.error_ttl_seconds)),
+        )
+
+@dataclass(frozen=True)
+class PumpFunSettings:
+    batch_max_rows: int = 500
+    batch_max_delay_ms: float = 200.0
+    queue_size: int = 10000
+    overflow_policy: str = 'drop_oldest'
+    reconnect_min_delay: float = 1.0
+    reconnect_max_delay: float = 60.0
+
+    @classmethod
+    def from_parser(cls, parser):
+        section = get_section(parser, 'PumpFun')
+        return cls(
+            batch_max_rows=int(section.get('batch_max_rows', cls.batch_max_rows)),
+            batch_max_delay_ms=float(section.get('batch_max_delay_ms', cls.batch_max_delay_ms)),
+            queue_size=int(section.get('queue_size', cls.queue_size)),
+            overflow_policy=section.get('overflow_policy', cls.overflow_policy).strip().lower(),
+            reconnect_min_delay=float(section.get('reconnect_min_delay', cls.reconnect_min_delay)),
+            reconnect_max_delay=float(section.get('reconnect_max_delay', cls.reconnect_max_delay)),
+        )
+
+@dataclass(frozen=True)
+class SnapshotSettings:
+    enabled: bool = True
+    raw_retention_hours: float = 24.0
+    hourly_retention_days: float = 30.0
+
+    @classmethod
+    def from_parser(cls, parser):
+        section = get_section(parser, 'Snapshots')
+        return cls(
+            enabled=parse_bool(section.get('enabled', cls.enabled)),
+            raw_retention_hours=float(section.get('raw_retention_hours', cls.raw_retention_hours)),
+            hourly_retention_days=float(section.get('hourly_retention_days', cls.hourly_retention_days)),
+        )
+
+@dataclass(frozen=True)
+class RugPullSettings:
+    enabled: bool = True
+    liquidity_drop_ratio: float = 0.8
+    price_drop_ratio: float = 0.9
+    min_peak_liquidity: float = 1000.0
+    min_drop_seconds: float = 60.0
+    warmup_hours: float = 24.0
+
+    @classmethod
+    def from_parser(cls, parser):
+        section = get_section(parser, 'RugPull')
+        return cls(
+            enabled=parse_bool(section.get('enabled', cls.enabled)),
+            liquidity_drop_ratio=float(section.get('liquidity_drop_ratio', cls.liquidity_drop_ratio)),
+            price_drop_ratio=float(section.get('price_drop_ratio', cls.price_drop_ratio)),
+            min_peak_liquidity=float(section.get('min_peak_liquidity', cls.min_peak_liquidity)),
+            min_drop_seconds=float(section.get('min_drop_seconds', cls.min_drop_seconds)),
+            warmup_hours=float(section.get('warmup_hours', cls.warmup_hours)),
+        )
+
+@dataclass(frozen=True)
+class ScoringSettings:
+    enabled: bool = True
+    halflife_minutes: float = 60.0
+    min_observations: int = 5
+    pump_price_z: float = 3.0
+    pump_volume_z: float = 2.0
+    pump_min_imbalance: float = 0.1
+    tier1_min_market_cap: float = 1000000.0
+    tier1_max_market_cap: float = 0.0
+    tier1_min_hours: float = 24.0
+
+    @classmethod
+    def from_parser(cls, parser):
+        section = get_section(parser, 'Scoring')
+        return cls(
+            enabled=parse_bool(section.get('enabled', cls.enabled)),
+            halflife_minutes=float(section.get('halflife_minutes', cls.halflife_minutes)),
+            min_observations=int(section.get('min_observations', cls.min_observations)),
+            pump_price_z=float(section.get('pump_price_z', cls.pump_price_z)),
+            pump_volume_z=float(section.get('pump_volume_z', cls.pump_volume_z)),
+            pump_min_imbalance=float(section.get('pump_min_imbalance', cls.pump_min_imbalance)),
+            tier1_min_market_cap=float(section.get('tier1_min_market_cap', cls.tier1_min_market_cap)),
+            tier1_max_market_cap=float(section.get('tier1_max_market_cap', cls.tier1_max_market_cap)),
+            tier1_min_hours=float(section.get('tier1_min_hours', cls.tier1_min_hours)),
+        )
+
+@dataclass(frozen=True)
+class LoggingSettings:
+    level: str = 'INFO'
+    format: str = 'text'
+
+    @classmethod
+    def from_parser(cls, parser):
+        section = get_section(parser, 'Logging')
+        return cls(
+            level=section.get('level', cls.level).strip().upper(),
+            format=section.get('format', cls.format).strip().lower(),
+        )
+
+@dataclass(frozen=True)
+class MetricsSettings:
+    host: str = '127.0.0.1'
+    port: int = 0
+    dump_interval_seconds: float = 60.0
+
+    @classmethod
+    def from_parser(cls, parser):
+        section = get_section(parser, 'Metrics')
+        return cls(
+            host=section.get('host', cls.host).strip(),
+            port=int(section.get('port', cls.port)),
+            dump_interval_seconds=float(section.get('dump_interval_seconds', cls.dump_interval_seconds)),
+        )
+
+@dataclass(frozen=True)
+class GovernorSettings:
+    max_retries: int = 3
+    backoff_base_seconds: float = 0.5
+    backoff_max_seconds: float = 30.0
+    rate_increase: float = 0.05
+    rate_decrease: float = 0.5
+    min_rate_fraction: float = 0.05
+    burst_seconds: float = 1.0
+    failure_threshold: int = 5
+    open_seconds: float = 30.0
+
+    @classmethod
+    def from_parser(cls, parser):
+        section = get_section(parser, 'Governor')
+        return cls(
+            max_retries=max(0, int(section.get('max_retries', cls.max_retries))),
+            backoff_base_seconds=float(section.get('backoff_base_seconds', cls.backoff_base_seconds)),
+            backoff_max_seconds=float(section.get('backoff_max_seconds', cls.backoff_max_seconds)),
+            rate_increase=float(section.get('rate_increase', cls.rate_increase)),
+            rate_decrease=float(section.get('rate_decrease', cls.rate_decrease)),
+            min_rate_fraction=float(section.get('min_rate_fraction', cls.min_rate_fraction)),
+            burst_seconds=float(section.get('burst_seconds', cls.burst_seconds)),
+            failure_threshold=max(1, int(section.get('failure_threshold', cls.failure_threshold))),
+            open_seconds=float(section.get('open_seconds', cls.open_seconds)),
+        )
+
+@dataclass(frozen=True)
+class DaemonSettings:
+    search_interval_seconds: float = 300.0
+    analysis_interval_seconds: float = 60.0
+    maintenance_interval_seconds: float = 3600.0
+    vacuum_interval_hours: float = 24.0
+
+    @classmethod
+    def from_parser(cls, parser):
+        section = get_section(parser, 'Daemon')
+        return cls(
+            search_interval_seconds=float(section.get('search_interval_seconds', cls.search_interval_seconds)),
+            analysis_interval_seconds=float(section.get('analysis_interval_seconds', cls.analysis_interval_seconds)),
+            maintenance_interval_seconds=float(section.get('maintenance_interval_seconds', cls.maintenance_interval_seconds)),
+            vacuum_interval_hours=float(section.get('vacuum_interval_hours', cls.vacuum_interval_hours)),
+        )
+
+@dataclass(frozen=True)
+class RealtimeSettings:
+    workers: int = 4
+    queue_size: int = 1000
+
+    @classmethod
+    def from_parser(cls, parser):
+        section = get_section(parser, 'Realtime')
+        return cls(
+            workers=max(1, int(section.get('workers', cls.workers))),
+            queue_size=int(section.get('queue_size', cls.queue_size)),
+        )
+
+DEFAULT_RULE_COSTS = {
+    'blacklist': 1.0,
+    'developer_blacklist': 1.5,
+    'filters': 2.0,
+    'fake_volume': 3.0,
+    'rugcheck': 1000.0,
+}
+
+@dataclass(frozen=True)
+class RuleSettings:
+    # Maps every enabled rule to its declared cost; disabled rules are left out.
+    costs: dict = field(default_factory=lambda: dict(DEFAULT_RULE_COSTS))
+
+    @classmethod
+    def from_parser(cls, parser):
+        section = get_section(parser, 'Rules')
+        costs = dict(DEFAULT_RULE_COSTS)
+        for name, value in section.items():
+            if value.strip().lower() in ('off', 'disabled', 'false', 'no'):
+                costs.pop(name, None)
+            else:
+                costs[name] = float(value)
+        return cls(costs=costs)
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    The bot's configuration, parsed once.
+
+    Every section of config/config.ini maps to a frozen dataclass with its
+    values already converted to numbers, booleans and normalized sets.
+    """
+    api: ApiSettings = field(default_factory=ApiSettings)
+    database: DatabaseSettings = field(default_factory=DatabaseSettings)
+    filters: FilterSettings = field(default_factory=FilterSettings)
+    blacklists: BlacklistSettings = field(default_factory=BlacklistSettings)
+    fake_volume: FakeVolumeSettings = field(default_factory=FakeVolumeSettings)
+    dexscreener: DexscreenerSettings = field(default_factory=DexscreenerSettings)
+    refresh: RefreshSettings = field(default_factory=RefreshSettings)
+    analysis: AnalysisSettings = field(default_factory=AnalysisSettings)
+    workers: WorkerSettings = field(default_factory=WorkerSettings)
+    rugcheck_cache: RugcheckCacheSettings = field(default_factory=RugcheckCacheSettings)
+    pump_fun: PumpFunSettings = field(default_factory=PumpFunSettings)
+    snapshots: SnapshotSettings = field(default_factory=SnapshotSettings)
+    rules: RuleSettings = field(default_factory=RuleSettings)
+    realtime: RealtimeSettings = field(default_factory=RealtimeSettings)
+    rug_pull: RugPullSettings = field(default_factory=RugPullSettings)
+    scoring: ScoringSettings = field(default_factory=ScoringSettings)
+    logging: LoggingSettings = field(default_factory=LoggingSettings)
+    metrics: MetricsSettings = field(default_factory=MetricsSettings)
+    governor: GovernorSettings = field(default_factory=GovernorSettings)
+    daemon: DaemonSettings = field(default_factory=DaemonSettings)
+
+    @classmethod
+    def from_parser(cls, parser):
+        """Builds the settings from a ConfigParser."""
+        return cls(
+            api=ApiSettings.from_parser(parser),
+            database=DatabaseSettings.from_parser(parser),
+            filters=FilterSettings.from_parser(parser),
+            blacklists=BlacklistSettings.from_parser(parser),
+            fake_volume=FakeVolumeSettings.from_parser(parser),
+            dexscreener=DexscreenerSettings.from_parser(parser),
+            refresh=RefreshSettings.from_parser(parser),
+            analysis=AnalysisSettings.from_parser(parser),
+            workers=WorkerSettings.from_parser(parser),
+            rugcheck_cache=RugcheckCacheSettings.from_parser(parser),
+            pump_fun=PumpFunSettings.from_parser(parser),
+            snapshots=SnapshotSettings.from_parser(parser),
+            rules=RuleSettings.from_parser(parser),
+            realtime=RealtimeSettings.from_parser(parser),
+            rug_pull=RugPullSettings.from_parser(parser),
+            scoring=ScoringSettings.from_parser(parser),
+            logging=LoggingSettings.from_parser(parser),
+            metrics=MetricsSettings.from_parser(parser),
+            governor=GovernorSettings.from_parser(parser),
+            daemon=DaemonSettings.from_parser(parser),
+        )
+
+def load_settings(path=DEFAULT_CONFIG_PATH):
+    """Reads and parses a configuration file."""
+    parser = configparser.ConfigParser()
+    parser.read(path)
+    return Settings.from_parser(parser)
+
+_settings = None
+
+def get_settings():
+    """Returns the process-wide settings, loading them on first use."""
+    global _settings
+    if _settings is None:
+        _settings = load_settings()
+    return _settings
+
+def set_settings(settings):
+    """Replaces the process-wide settings, e.g. with ones loaded from another path."""
+    global _settings
+    _settings = settings
@@ -0,0 +1,246 @@
+import asyncio
+import logging
+import signal
+import threading
+import time
+from src import metrics
+from src.config import get_settings
+from src.data.database import get_database
+from src.data.fetcher import fetch_and_store_many_dexscreener_pairs
+from src.data.pump_fetcher import PumpFunListener
+from src.data.refresher import RefreshScheduler
+from src.data.snapshots import apply_retention_from_settings
+from src.analysis.detectors import warm_detectors
+from src.analysis.realtime import RealtimeAnalyzer
+from src.analysis.workers import AnalysisWorker
+
+logger = logging.getLogger(__name__)
+
+TASK_RUNS = metrics.counter('daemon_task_runs_total', 'Scheduled task runs by task and outcome.', ('task', 'outcome'))
+TASK_SECONDS = metrics.histogram('daemon_task_seconds', 'Time spent in scheduled task runs.', ('task',))
+
+class PeriodicTask:
+    """A coroutine function the scheduler runs every `interval` seconds, first after `delay` seconds."""
+    def __init__(self, name, interval, fn, delay=0.0):
+        self.name = name
+        self.interval = interval
+        self.fn = fn
+        self.delay = delay
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+
+class Scheduler:
+    """
+    Runs periodic tasks, each on its own interval, until stop() is called.
+
+    A task never overlaps itself: the ticks that pass while one of its runs
+    is still in flight are skipped and counted rather than queued, so a slow
+    run is followed by one run at the next tick, not a burst of catch-up
+    runs. A failed run is logged and the task runs again at its next tick.
+    Once stopped, no new run starts, and run() returns when the runs in
+    flight have finished.
+    """
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.tasks = []
+        self._stopping = asyncio.Event()
+
+    def add(self, name, interval, fn, delay=0.0):
+        """Adds a task. Tasks with an interval of 0 or less are disabled and left out."""
+        if interval <= 0:
+            logger.info("Scheduled task %s is disabled", name)
+            return None
+        task = PeriodicTask(name, interval, fn, delay)
+        self.tasks.append(task)
+        return task
+
+    def stop(self):
+        """Lets the runs in flight finish and starts no new ones."""
+        self._stopping.set()
+
+    @property
+    def stopping(self):
+        return self._stopping.is_set()
+
+    async def run(self):
+        """Runs every task until stop() is called."""
+        await asyncio.gather(*(self._loop(task) for task in self.tasks))
+
+    async def _loop(self, task):
+        next_run = self.clock() + task.delay
+        while not self.stopping:
+            wait = next_run - self.clock()
+            if wait > 0:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), wait)
+                    break
+                except asyncio.TimeoutError:
+                    pass
+            await self._run_task(task)
+            missed = int((self.clock() - next_run) // task.interval)
+            if missed > 0:
+                task.skipped += missed
+                TASK_RUNS.inc(missed, task=task.name, outcome='skipped')
+                logger.info("Task %s overran its interval; skipped %d runs", task.name, missed,
+                            extra={'task': task.name, 'skipped': missed})
+            next_run += (missed + 1) * task.interval
+
+    async def _run_task(self, task):
+        started = time.monotonic()
+        try:
+            await task.fn()
+        except Exception:
+            task.failures += 1
+            TASK_RUNS.inc(task=task.name, outcome='failed')
+            logger.exception("Scheduled task %s failed", task.name, extra={'task': task.name})
+        else:
+            TASK_RUNS.inc(task=task.name, outcome='ok')
+        finally:
+            task.runs += 1
+            elapsed = time.monotonic() - started
+            TASK_SECONDS.observe(elapsed, task=task.name)
+            logger.debug("Task %s took %.3fs", task.name, elapsed, extra={'task': task.name})
+
+def run_maintenance(database, settings):
+    """
+    Rolls up and expires market snapshots, refreshes the query planner's
+    statistics and truncates the WAL. Returns the snapshot rows (rolled up, deleted).
+    """
+    counts = database.write(apply_retention_from_settings, settings)
+    # PRAGMAs run outside of a transaction, while the write lock keeps other writers out.
+    with database.writer() as conn:
+        conn.execute("PRAGMA optimize")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    logger.info("Database maintenance complete", extra={'rolled_up': counts[0], 'deleted': counts[1]})
+    return counts
+
+def vacuum(database):
+    """Rebuilds the database file to give the space of deleted rows back."""
+    with database.writer() as conn:
+        conn.execute("VACUUM")
+    logger.info("Database vacuumed")
+
+class Daemon:
+    """
+    The long-running mode of the bot (`main.py daemon`).
+
+    Startup work (settings, detectors, the developer blacklist, the rule
+    pipeline and HTTP sessions) is done once. Then the [Daemon] tasks run
+    on a Scheduler, each on its own interval: Dexscreener searches for
+    `search_queries`, refreshes of tracked coins, incremental analysis
+    passes (through a leasing AnalysisWorker, so `main.py workers` can run
+    alongside), and database maintenance and vacuuming. With `pump_fun`, the
+    pump.fun listener runs the whole time, analyzing new tokens right away
+    with `realtime`.
+
+    stop(), which SIGTERM and SIGINT call, ends the daemon gracefully: the
+    tasks in flight finish their current batch, the listener drains its
+    queue and every buffered write is flushed before run() returns.
+    """
+    def __init__(self, settings=None, search_queries=(), pump_fun=True, realtime=False):
+        self.settings = settings or get_settings()
+        self.search_queries = list(search_queries)
+        self.pump_fun = pump_fun
+        self.realtime = realtime
+        self.database = get_database(self.settings.database.db_name)
+        self.scheduler = Scheduler()
+        # Lets the analysis task, which runs in a thread, stop between batches.
+        self.stop_event = threading.Event()
+        self.refresher = None
+        self.worker = None
+        self.listener = None
+        self.analyzer = None
+
+    def setup(self):
+        """Creates the long-lived components: HTTP sessions, the rule pipeline and thread pools."""
+        self.refresher = RefreshScheduler(self.database, self.settings)
+        self.worker = AnalysisWorker(target=self.database, settings=self.settings)
+        if self.pump_fun:
+            if self.realtime:
+                self.analyzer = RealtimeAnalyzer(self.settings, self.database)
+            self.listener = PumpFunListener(self.settings, self.analyzer.submit if self.analyzer else None, self.database)
+
+    def warm_up(self):
+        """Loads the detectors and the developer blacklist, so the first runs are as fast as the rest."""
+        warm_detectors(self.settings)
+        if self.listener is not None:
+            self.listener.developer_blacklist.load()
+
+    def stop(self):
+        """Starts a graceful shutdown."""
+        if not self.scheduler.stopping:
+            logger.info("Stopping the daemon")
+        self.stop_event.set()
+        self.scheduler.stop()
+
+    async def search(self):
+        await fetch_and_store_many_dexscreener_pairs(self.search_queries, self.database, settings=self.settings)
+
+    async def refresh(self):
+        stats = await asyncio.to_thread(self.refresher.run_once)
+        logger.info("Refreshed %d of %d due coins", stats['refreshed'], stats['due'], extra=stats)
+
+    async def analyze(self):
+        analyzed = self.worker.analyzed
+        await asyncio.to_thread(self.worker.run, True, self.stop_event)
+        logger.info("Analyzed %d coins", self.worker.analyzed - analyzed)
+
+    async def maintain(self):
+        await asyncio.to_thread(run_maintenance, self.database, self.settings)
+
+    async def vacuum(self):
+        await asyncio.to_thread(vacuum, self.database)
+
+    def schedule(self):
+        """Adds the [Daemon] tasks to the scheduler."""
+        daemon = self.settings.daemon
+        if self.search_queries:
+            self.scheduler.add('search', daemon.search_interval_seconds, self.search)
+        self.scheduler.add('refresh', self.settings.refresh.cycle_seconds, self.refresh)
+        self.scheduler.add('analysis', daemon.analysis_interval_seconds, self.analyze)
+        # Maintenance is not urgent at startup; run it once the daemon has settled.
+        self.scheduler.add('maintenance', daemon.maintenance_interval_seconds, self.maintain, daemon.maintenance_interval_seconds)
+        vacuum_seconds = daemon.vacuum_interval_hours * 3600
+        self.scheduler.add('vacuum', vacuum_seconds, self.vacuum, vacuum_seconds)
+
+    async def run(self):
+        """Runs until stop() is called, then shuts down gracefully."""
+        loop = asyncio.get_running_loop()
+        signals = []
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(signum, self.stop)
+                signals.append(signum)
+            except (NotImplementedError, RuntimeError):
+                pass  # Not supported on this platform or outside the main thread
+
+        listener_task = None
+        try:
+            self.setup()
+            await asyncio.to_thread(self.warm_up)
+            if self.scheduler.stopping:
+                return
+            self.schedule()
+            if self.analyzer is not None:
+                self.analyzer.start()
+            if self.listener is not None:
+                listener_task = asyncio.create_task(self.listener.run())
+            logger.info("Daemon started", extra={'tasks': ','.join(task.name for task in self.scheduler.tasks)})
+            await self.scheduler.run()
+        finally:
+            self.stop()
+            if listener_task is not None:
+                await self.listener.stop()
+                await listener_task
+            if self.analyzer is not None:
+                await self.analyzer.close()
+            if self.worker is not None:
+                self.worker.close()
+            if self.refresher is not None:
+                self.refresher.close()
+            for signum in signals:
+                loop.remove_signal_handler(signum)
+            logger.info("Daemon stopped", extra={
+                task.name: f"runs={task.runs} failures={task.failures} skipped={task.skipped}" for task in self.scheduler.tasks
+            })
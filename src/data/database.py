@@ -1,18 +1,237 @@
 import sqlite3
-import configparser
+import threading
+from contextlib import contextmanager
+from src.config import get_settings
+from src.data.snapshots import create_snapshot_tables
 
-def get_db_connection(db_name=None):
-    """Gets a database connection."""
+def apply_pragmas(conn, database_settings):
+    """Tunes a connection: journal mode, durability, cache, mmap and lock waiting."""
+    conn.execute(f"PRAGMA busy_timeout = {int(database_settings.busy_timeout_ms)}")
+    conn.execute(f"PRAGMA journal_mode = {database_settings.journal_mode}")
+    conn.execute(f"PRAGMA synchronous = {database_settings.synchronous}")
+    # A negative cache_size is in KiB rather than pages.
+    conn.execute(f"PRAGMA cache_size = {-int(database_settings.cache_size_mb) * 1024}")
+    conn.execute(f"PRAGMA mmap_size = {int(database_settings.mmap_size_mb) * 1024 * 1024}")
+
+def get_db_connection(db_name=None, check_same_thread=True):
+    """Gets a tuned database connection."""
+    database_settings = get_settings().database
     if not db_name:
-        config = configparser.ConfigParser()
-        config.read('config/config.ini')
-        db_name = config['database']['db_name']
-    conn = sqlite3.connect(db_name)
+        db_name = database_settings.db_name
+    conn = sqlite3.connect(db_name, check_same_thread=check_same_thread)
     conn.row_factory = sqlite3.Row
+    apply_pragmas(conn, database_settings)
     return conn
 
+class Database:
+    """
+    Hands out shared connections to one SQLite database.
+
+    Every thread gets its own reused read connection, while all writes go
+    through a single writer connection guarded by a lock. With WAL enabled,
+    readers never block the writer, and serializing writes inside the process
+    avoids `database is locked` errors between ingestion and analysis.
+    """
+    def __init__(self, db_name=None):
+        self.db_name = db_name or get_settings().database.db_name
+        self._local = threading.local()
+        self._readers = []
+        self._readers_lock = threading.Lock()
+        self._writer = None
+        self._write_lock = threading.RLock()
+
+    def reader(self):
+        """Returns the calling thread's read connection."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = get_db_connection(self.db_name, check_same_thread=False)
+            self._local.conn = conn
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+
+    @contextmanager
+    def writer(self):
+        """
+        Yields the writer connection inside a transaction.
+        The transaction is committed on success and rolled back on error.
+        """
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = get_db_connection(self.db_name, check_same_thread=False)
+            with self._writer:
+                yield self._writer
+
+    def write(self, fn, *args, **kwargs):
+        """Runs fn(conn, *args, **kwargs) in a write transaction and returns its result."""
+        with self.writer() as conn:
+            return fn(conn, *args, **kwargs)
+
+    def close(self):
+        """Closes the writer and every read connection."""
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers = []
+        self._local = threading.local()
+
+_databases = {}
+_databases_lock = threading.Lock()
+
+def get_database(db_name=None):
+    """Returns the process-wide Database for a file, creating it on first use."""
+    db_name = db_name or get_settings().database.db_name
+    with _databases_lock:
+        if db_name not in _databases:
+            _databases[db_name] = Database(db_name)
+        return _databases[db_name]
+
+def close_databases():
+    """Closes every process-wide Database."""
+    with _databases_lock:
+        for database in _databases.values():
+            database.close()
+        _databases.clear()
+
+def write_transaction(target):
+    """
+    Returns a write transaction context manager for either a Database or a
+    plain connection. Both yield a connection and commit on success.
+    """
+    if isinstance(target, Database):
+        return target.writer()
+    return target
+
+def get_db_path(conn):
+    """Returns the file path of the main database behind a connection."""
+    for row in conn.execute("PRAGMA database_list"):
+        if row[1] == 'main':
+            return row[2]
+    return None
+
+def ensure_column(cursor, table, column, definition):
+    """Adds a column to an existing table if it is missing."""
+    cursor.execute(f"PRAGMA table_info({table})")
+    if column not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+def recheck_modifier(recheck_age_hours):
+    """Returns the SQLite datetime modifier that schedules a coin's next analysis."""
+    return f"+{float(recheck_age_hours) * 3600} seconds"
+
+def add_last_analyzed_timestamp(cursor):
+    """Databases created before incremental analysis lack this column."""
+    ensure_column(cursor, 'coins', 'last_analyzed_timestamp', 'DATETIME')
+
+def add_analysis_state(cursor):
+    """
+    Tracks each coin's analysis state so the analyzer's working set comes
+    from indexes instead of a table scan: `analysis_status` is 'pending'
+    until the coin is analyzed and again whenever its market data changes,
+    and `next_analysis_at` is when an analyzed coin is due for a recheck.
+    Also indexes the columns dashboards filter on, with partial indexes
+    covering only the pending and flagged coins.
+    """
+    ensure_column(cursor, 'coins', 'analysis_status', "TEXT NOT NULL DEFAULT 'pending'")
+    ensure_column(cursor, 'coins', 'next_analysis_at', 'DATETIME')
+    # Coins analyzed before this migration keep their incremental-mode state.
+    cursor.execute("""
+        UPDATE coins
+        SET next_analysis_at = datetime(last_analyzed_timestamp, ?),
+            analysis_status = CASE WHEN last_updated_timestamp > last_analyzed_timestamp
+                THEN 'pending' ELSE 'analyzed' END
+        WHERE last_analyzed_timestamp IS NOT NULL
+    """, (recheck_modifier(get_settings().analysis.recheck_age_hours),))
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_coins_source ON coins (source)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_coins_last_updated_timestamp ON coins (last_updated_timestamp)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_coins_next_analysis_at ON coins (next_analysis_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_coins_pending ON coins (id) WHERE analysis_status = 'pending'")
+    for flag in ('rug_pull', 'pump', 'tier1', 'bundled_supply'):
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_coins_{flag} ON coins (last_updated_timestamp) WHERE {flag} = 1")
+
+def add_analysis_leases(cursor):
+    """
+    Lets several analyzer processes share the work: a worker leases the
+    coins it analyzes by writing its id to `lease_owner` until
+    `lease_expires_at` (a Unix timestamp). Coins whose lease expired, e.g.
+    because their worker crashed, can be claimed again.
+    """
+    ensure_column(cursor, 'coins', 'lease_owner', 'TEXT')
+    ensure_column(cursor, 'coins', 'lease_expires_at', 'REAL')
+
+def add_developers(cursor):
+    """
+    Stores the wallet that created each coin, as reported by pump.fun, and a
+    developers table with how many coins each one launched and rugged and
+    whether it is blacklisted.
+    """
+    ensure_column(cursor, 'coins', 'developer_address', 'TEXT')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_coins_developer_address ON coins (developer_address)")
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS developers (
+        address TEXT PRIMARY KEY,
+        first_seen_at REAL,
+        coins_launched INTEGER NOT NULL DEFAULT 0,
+        rug_pulls INTEGER NOT NULL DEFAULT 0,
+        blacklisted BOOLEAN NOT NULL DEFAULT FALSE
+    ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_developers_blacklisted ON developers (address) WHERE blacklisted = 1")
+
+def add_refresh_schedule_rows(cursor):
+    """
+    Gives every coin a refresh_schedule row from the moment it is inserted,
+    whichever writer inserts it, so the refresh scheduler finds due coins
+    through indexes instead of scanning coins for unscheduled ones. Rows of
+    coins never refreshed have no `last_refreshed_at` and a partial index.
+    """
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_refresh_schedule_never_refreshed
+    ON refresh_schedule (coin_id) WHERE last_refreshed_at IS NULL
+    """)
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS coins_refresh_schedule AFTER INSERT ON coins
+    BEGIN
+        INSERT OR IGNORE INTO refresh_schedule (coin_id, next_refresh_at) VALUES (NEW.id, 0);
+    END
+    """)
+    cursor.execute("INSERT OR IGNORE INTO refresh_schedule (coin_id, next_refresh_at) SELECT id, 0 FROM coins")
+
+# Schema migrations in order. A database's PRAGMA user_version is the
+# number of migrations applied to it, so each one runs exactly once.
+MIGRATIONS = [
+    add_last_analyzed_timestamp,
+    add_analysis_state,
+    add_analysis_leases,
+    add_developers,
+    add_refresh_schedule_rows,
+]
+
+def schema_version(conn):
+    """Returns the number of migrations applied to a database."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn):
+    """
+    Applies the pending migrations, each in its own transaction together
+    with the user_version bump. Returns the number of migrations applied.
+    """
+    version = schema_version(conn)
+    for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        with conn:
+            cursor = conn.cursor()
+            if not conn.in_transaction:
+                cursor.execute("BEGIN")
+            migration(cursor)
+            cursor.execute(f"PRAGMA user_version = {number}")
+    return max(len(MIGRATIONS) - version, 0)
+
 def create_tables(conn=None):
-    """Creates the necessary tables in the database."""
+    """Creates the necessary tables in the database and brings its schema up to date."""
     close_conn_after = False
     if conn is None:
         conn = get_db_connection()
@@ -30,6 +249,7 @@ def create_tables(conn=None):
         image_uri TEXT,
         created_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
         last_updated_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        last_analyzed_timestamp DATETIME,
         market_cap REAL,
         liquidity REAL,
         price_usd REAL,
@@ -45,8 +265,55 @@ def create_tables(conn=None):
     )
     """)
 
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS rugcheck_cache (
+        mint_address TEXT PRIMARY KEY,
+        rugged BOOLEAN,
+        result TEXT,
+        risks TEXT,
+        outcome TEXT NOT NULL,
+        fetched_at REAL NOT NULL
+    )
+    """)
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS coin_scores (
+        mint_address TEXT PRIMARY KEY,
+        observations INTEGER NOT NULL,
+        last_seen REAL,
+        price_mean REAL,
+        price_var REAL,
+        price_z REAL,
+        volume_mean REAL,
+        volume_var REAL,
+        volume_z REAL,
+        imbalance_mean REAL,
+        imbalance_var REAL,
+        imbalance_z REAL,
+        market_cap_mean REAL,
+        band_since REAL
+    ) WITHOUT ROWID
+    """)
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS refresh_schedule (
+        coin_id INTEGER PRIMARY KEY,
+        next_refresh_at REAL NOT NULL,
+        last_refreshed_at REAL,
+        misses INTEGER NOT NULL DEFAULT 0
+    )
+    """)
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_refresh_schedule_next_refresh_at
+    ON refresh_schedule (next_refresh_at)
+    """)
+
+    create_snapshot_tables(cursor)
+
     conn.commit()
 
+    migrate(conn)
+
     if close_conn_after:
         conn.close()
 
@@ -0,0 +1,211 @@
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import time
+import numpy as np
+from src.config import get_settings
+from src.data.snapshots import HOURLY_RESOLUTION, RAW_RESOLUTION
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+DEFAULT_CHUNK_ROWS = 100000
+
+# Column name -> NumPy dtype of every exported table. Timestamps are
+# exported as datetime64[s] (NaT for NULL), REAL and nullable INTEGER columns
+# as float64 (NaN for NULL), flags as int8 (-1 for NULL) and text as
+# fixed-width unicode, so every column file can be memory-mapped.
+EXPORT_TABLES = {
+    'coins': {
+        'id': 'int64',
+        'mint_address': 'U',
+        'name': 'U',
+        'symbol': 'U',
+        'source': 'U',
+        'developer_address': 'U',
+        'created_timestamp': 'datetime64[s]',
+        'last_updated_timestamp': 'datetime64[s]',
+        'last_analyzed_timestamp': 'datetime64[s]',
+        'market_cap': 'float64',
+        'liquidity': 'float64',
+        'price_usd': 'float64',
+        'volume_h24': 'float64',
+        'txns_h24_buys': 'float64',
+        'txns_h24_sells': 'float64',
+        'rug_pull': 'int8',
+        'pump': 'int8',
+        'tier1': 'int8',
+        'cex_listed': 'int8',
+        'bundled_supply': 'int8',
+        'analysis_status': 'U',
+    },
+    'market_snapshots': {
+        'coin_id': 'int64',
+        'timestamp': 'datetime64[s]',
+        'resolution': 'int64',
+        'price_usd': 'float64',
+        'liquidity': 'float64',
+        'market_cap': 'float64',
+        'volume_h24': 'float64',
+        'txns_h24_buys': 'float64',
+        'txns_h24_sells': 'float64',
+    },
+}
+
+def select_columns(table):
+    """Returns the SELECT list of a table's export, with timestamps as Unix seconds."""
+    expressions = []
+    for column, dtype in EXPORT_TABLES[table].items():
+        if dtype.startswith('datetime64') and table == 'coins':
+            expressions.append(f"CAST(strftime('%s', {column}) AS INTEGER)")
+        else:
+            expressions.append(column)
+    return ', '.join(expressions)
+
+# Each export selects the rows changed at or after the :watermark (Unix
+# seconds). Readers keep the last exported version of a row, see load_table.
+# Hourly rollups of old raw snapshots are not exported again: the raw
+# snapshots they summarize already were. The resolution list lets the
+# snapshot query use the (resolution, timestamp) index.
+EXPORT_QUERIES = {
+    'coins': f"""
+        SELECT {select_columns('coins')} FROM coins
+        WHERE last_updated_timestamp >= datetime(:watermark, 'unixepoch')
+            OR last_analyzed_timestamp >= datetime(:watermark, 'unixepoch')
+    """,
+    'market_snapshots': f"""
+        SELECT {select_columns('market_snapshots')} FROM market_snapshots
+        WHERE resolution IN ({RAW_RESOLUTION}, {HOURLY_RESOLUTION}) AND timestamp >= :watermark
+    """,
+}
+
+# The columns whose latest value becomes a table's next watermark.
+WATERMARK_COLUMNS = {
+    'coins': ('last_updated_timestamp', 'last_analyzed_timestamp'),
+    'market_snapshots': ('timestamp',),
+}
+
+def open_read_only(db_name):
+    """
+    Opens a database read-only, so an export can never lock out or modify it.
+    Transactions are left to the caller.
+    """
+    return sqlite3.connect(f"file:{os.path.abspath(db_name)}?mode=ro", uri=True, isolation_level=None)
+
+def to_column(values, dtype):
+    """Converts one column of a chunk to a NumPy array of `dtype`, mapping NULLs."""
+    if dtype == 'U':
+        return np.array(['' if value is None else str(value) for value in values], dtype=str)
+    if dtype == 'int8':
+        return np.array([-1 if value is None else value for value in values], dtype=np.int8)
+    if dtype == 'float64':
+        return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+    return np.array(values, dtype=dtype)
+
+def read_manifest(out_dir):
+    """Returns an export directory's manifest, or an empty one."""
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {'tables': {}}
+    with open(path) as f:
+        return json.load(f)
+
+def write_manifest(out_dir, manifest):
+    """Replaces the manifest atomically, so readers never see a half-written export."""
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+def export_table(conn, out_dir, table, entry, chunk_rows):
+    """
+    Streams the rows of `table` changed since the entry's watermark into new
+    part directories of one .npy file per column. Returns the rows exported.
+    """
+    columns = EXPORT_TABLES[table]
+    positions = [list(columns).index(column) for column in WATERMARK_COLUMNS[table]]
+    cursor = conn.execute(EXPORT_QUERIES[table], {'watermark': entry.get('watermark', 0)})
+    exported = 0
+    while True:
+        rows = cursor.fetchmany(chunk_rows)
+        if not rows:
+            break
+        part = f"part-{len(entry['parts']):05d}"
+        part_dir = os.path.join(out_dir, table, part)
+        # A part left behind by an interrupted export is not in the manifest.
+        shutil.rmtree(part_dir, ignore_errors=True)
+        os.makedirs(part_dir)
+        for values, (column, dtype) in zip(zip(*rows), columns.items()):
+            np.save(os.path.join(part_dir, f"{column}.npy"), to_column(values, dtype))
+        entry['parts'].append({'name': part, 'rows': len(rows)})
+        exported += len(rows)
+        latest = max((row[i] for row in rows for i in positions if row[i] is not None), default=None)
+        if latest is not None:
+            entry['watermark'] = max(entry.get('watermark', 0), latest)
+    return exported
+
+def export_database(out_dir, db_name=None, tables=None, full=False, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Exports the coins table and the market snapshot history to `out_dir`.
+
+    Every table gets a directory of parts, each holding one .npy file per
+    column for up to `chunk_rows` rows, so memory use does not grow with the
+    table. The manifest records the parts, the column dtypes and each
+    table's watermark: later exports only append the rows changed since
+    then, unless `full` starts over. The database is read through a
+    read-only connection inside one read transaction, which with WAL never
+    blocks the bot's writers. Returns the rows exported per table.
+    """
+    db_name = db_name or get_settings().database.db_name
+    tables = list(tables or EXPORT_TABLES)
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = read_manifest(out_dir)
+
+    conn = open_read_only(db_name)
+    counts = {}
+    try:
+        conn.execute("BEGIN")
+        for table in tables:
+            if full or table not in manifest['tables']:
+                shutil.rmtree(os.path.join(out_dir, table), ignore_errors=True)
+                manifest['tables'][table] = {'columns': EXPORT_TABLES[table], 'parts': []}
+            started = time.monotonic()
+            counts[table] = export_table(conn, out_dir, table, manifest['tables'][table], chunk_rows)
+            logger.info("Exported %d %s rows", counts[table], table,
+                        extra={'table': table, 'rows': counts[table], 'seconds': round(time.monotonic() - started, 3)})
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+    manifest['exported_at'] = time.time()
+    write_manifest(out_dir, manifest)
+    return counts
+
+def load_table(out_dir, table, columns=None, latest=True):
+    """
+    Loads an exported table as a dict of column arrays, e.g. in a notebook.
+
+    Column files are memory-mapped and concatenated. With `latest`, only the
+    last exported version of each coin (or snapshot) is kept, since
+    incremental exports append rows that changed again.
+    """
+    entry = read_manifest(out_dir)['tables'][table]
+    columns = list(columns or entry['columns'])
+    key_columns = ['id'] if table == 'coins' else ['coin_id', 'timestamp']
+    needed = columns + [column for column in key_columns if column not in columns] if latest else columns
+    parts = [os.path.join(out_dir, table, part['name']) for part in entry['parts']]
+    data = {}
+    for column in needed:
+        arrays = [np.load(os.path.join(part, f"{column}.npy"), mmap_mode='r') for part in parts]
+        if arrays:
+            data[column] = np.concatenate(arrays)
+        else:
+            data[column] = np.array([], dtype=entry['columns'][column] if entry['columns'][column] != 'U' else str)
+    if latest and parts:
+        keys = np.stack([data[column].astype(np.int64) for column in key_columns])
+        # np.unique keeps the first occurrence, so search from the end.
+        _, last = np.unique(keys[:, ::-1], axis=1, return_index=True)
+        keep = np.sort(len(data[key_columns[0]]) - 1 - last)
+        data = {column: data[column][keep] for column in needed}
+    return {column: data[column] for column in columns}
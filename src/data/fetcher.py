@@ -1,71 +1,320 @@
+import asyncio
+import logging
 import requests
-import configparser
-from src.data.database import get_db_connection
+from requests.adapters import HTTPAdapter
+from src import metrics
+from src.config import get_settings
+from src.data.database import get_db_connection, get_database, write_transaction
+from src.data.snapshots import apply_retention_from_settings, record_snapshots
+from src.governor import get_governor
+from src.analysis.detectors import get_momentum_scorer, get_rug_pull_detector
 
-def get_api_url(service):
-    """Gets the API URL from the config file."""
-    config = configparser.ConfigParser()
-    config.read('config/config.ini')
-    return config['api'][service]
+logger = logging.getLogger(__name__)
 
-def fetch_and_store_dexscreener_pairs(search_query, conn=None):
-    """Fetches new pairs from Dexscreener and stores them in the database."""
-    api_url = get_api_url('dexscreener_api_url')
+# The multi-token endpoint accepts up to 30 comma-separated addresses.
+MAX_TOKENS_PER_REQUEST = 30
+
+REQUEST_SECONDS = metrics.histogram('dexscreener_request_seconds', 'Time spent in Dexscreener HTTP requests.', ('endpoint',))
+REQUEST_ERRORS = metrics.counter('dexscreener_request_errors_total', 'Failed Dexscreener requests.', ('endpoint',))
+JSON_DECODE_SECONDS = metrics.histogram('json_decode_seconds', 'Time spent decoding JSON payloads.', ('source',))
+DB_WRITE_SECONDS = metrics.histogram('db_write_seconds', 'Time spent writing batches to the database.', ('writer',))
+PAIRS_UPSERTED = metrics.counter('dexscreener_pairs_upserted_total', 'Dexscreener pairs upserted into the coins table.')
+PAIRS_SKIPPED = metrics.counter('dexscreener_pairs_skipped_total', 'Dexscreener pairs not written to the coins table.', ('reason',))
+PAIR_ERRORS = metrics.counter('dexscreener_pair_errors_total', 'Dexscreener pairs that could not be stored.')
+
+def create_http_session(pool_size):
+    """Creates a requests session that keeps up to `pool_size` connections alive per host."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def load_search_queries(path):
+    """Reads search queries from a file, one per line. Blank lines and # comments are skipped."""
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+
+def get_json(http, url, endpoint):
+    """
+    GETs a Dexscreener endpoint through the outbound governor, which paces
+    and retries it, and decodes its JSON body, timing both stages.
+    """
+    with REQUEST_SECONDS.time(endpoint=endpoint):
+        response = get_governor().get(http, url)
+        response.raise_for_status()  # Raise an exception for bad status codes
+    with JSON_DECODE_SECONDS.time(source='dexscreener'):
+        return response.json()
+
+def fetch_dexscreener_pairs(search_query, session=None, settings=None):
+    """
+    Fetches the pairs matching a search query from Dexscreener.
+    Uses `session` when given so that connections are reused.
+    """
+    api_url = (settings or get_settings()).api.dexscreener_api_url
     search_url = f"{api_url}dex/search?q={search_query}"
+    http = session or requests
 
     try:
-        response = requests.get(search_url)
-        response.raise_for_status()  # Raise an exception for bad status codes
-        data = response.json()
-
-        if 'pairs' in data and data['pairs']:
-            close_conn_after = False
-            if conn is None:
-                conn = get_db_connection()
-                close_conn_after = True
-
-            cursor = conn.cursor()
-
-            for pair in data['pairs']:
-                try:
-                    cursor.execute("""
-                        INSERT INTO coins (mint_address, name, symbol, description, image_uri, market_cap, liquidity, price_usd, volume_h24, txns_h24_buys, txns_h24_sells, source)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        ON CONFLICT(mint_address) DO UPDATE SET
-                            name = excluded.name,
-                            symbol = excluded.symbol,
-                            description = excluded.description,
-                            image_uri = excluded.image_uri,
-                            market_cap = excluded.market_cap,
-                            liquidity = excluded.liquidity,
-                            price_usd = excluded.price_usd,
-                            volume_h24 = excluded.volume_h24,
-                            txns_h24_buys = excluded.txns_h24_buys,
-                            txns_h24_sells = excluded.txns_h24_sells,
-                            last_updated_timestamp = CURRENT_TIMESTAMP
-                    """, (
-                        pair.get('baseToken', {}).get('address'),
-                        pair.get('baseToken', {}).get('name'),
-                        pair.get('baseToken', {}).get('symbol'),
-                        pair.get('info', {}).get('description', ''), # Dexscreener doesn't provide a top-level description
-                        pair.get('info', {}).get('imageUrl', ''),
-                        pair.get('marketCap'),
-                        pair.get('liquidity', {}).get('usd'),
-                        pair.get('priceUsd'),
-                        pair.get('volume', {}).get('h24'),
-                        pair.get('txns', {}).get('h24', {}).get('buys'),
-                        pair.get('txns', {}).get('h24', {}).get('sells'),
-                        'dexscreener'
-                    ))
-                    print(f"Inserted or updated pair: {pair.get('baseToken', {}).get('symbol')}")
-                except Exception as e:
-                    print(f"Error inserting pair {pair.get('baseToken', {}).get('address')}: {e}")
-
-            conn.commit()
-            if close_conn_after:
-                conn.close()
+        data = get_json(http, search_url, 'search')
     except requests.exceptions.RequestException as e:
-        print(f"Error fetching data from Dexscreener: {e}")
+        REQUEST_ERRORS.inc(endpoint='search')
+        logger.warning("Error fetching data from Dexscreener: %s", e, extra={'query': search_query})
+        return []
+
+    return data.get('pairs') or []
+
+def fetch_dexscreener_tokens(mint_addresses, session=None, settings=None):
+    """
+    Fetches the pairs of up to MAX_TOKENS_PER_REQUEST tokens from Dexscreener
+    in a single request. Returns None if the request failed.
+    """
+    if len(mint_addresses) > MAX_TOKENS_PER_REQUEST:
+        raise ValueError(f"Dexscreener accepts at most {MAX_TOKENS_PER_REQUEST} addresses per request")
+    api_url = (settings or get_settings()).api.dexscreener_api_url
+    tokens_url = f"{api_url}dex/tokens/{','.join(mint_addresses)}"
+    http = session or requests
+
+    try:
+        data = get_json(http, tokens_url, 'tokens')
+    except requests.exceptions.RequestException as e:
+        REQUEST_ERRORS.inc(endpoint='tokens')
+        logger.warning("Error fetching tokens from Dexscreener: %s", e, extra={'tokens': len(mint_addresses)})
+        return None
+
+    return data.get('pairs') or []
+
+MARKET_COLUMNS = ('price_usd', 'market_cap', 'liquidity', 'volume_h24', 'txns_h24_buys', 'txns_h24_sells')
+
+def pair_market_data(pair):
+    """Returns a pair's market data as floats (or None) in MARKET_COLUMNS order."""
+    values = (
+        pair.get('priceUsd'),
+        pair.get('marketCap'),
+        (pair.get('liquidity') or {}).get('usd'),
+        (pair.get('volume') or {}).get('h24'),
+        ((pair.get('txns') or {}).get('h24') or {}).get('buys'),
+        ((pair.get('txns') or {}).get('h24') or {}).get('sells'),
+    )
+    return tuple(None if value is None else float(value) for value in values)
+
+# How to rank the pairs of one base token; the highest ranked pair is kept.
+PAIR_POLICIES = {
+    'liquidity': lambda pair: (pair.get('liquidity') or {}).get('usd') or 0,
+    'volume': lambda pair: (pair.get('volume') or {}).get('h24') or 0,
+    'first': None,
+}
+
+def select_pairs(pairs, policy='liquidity', mint_addresses=None):
+    """
+    Picks one pair per base token according to `policy` (see PAIR_POLICIES),
+    optionally only for the tokens in `mint_addresses`. Returns a dict from
+    mint address to pair, in the order the tokens first appear.
+    """
+    if policy not in PAIR_POLICIES:
+        raise ValueError(f"Unknown pair policy '{policy}'; expected one of {', '.join(PAIR_POLICIES)}")
+    rank = PAIR_POLICIES[policy]
+    selected = {}
+    for pair in pairs:
+        mint_address = (pair.get('baseToken') or {}).get('address')
+        if not mint_address or (mint_addresses is not None and mint_address not in mint_addresses):
+            continue
+        current = selected.get(mint_address)
+        if current is None or (rank is not None and float(rank(pair)) > float(rank(current))):
+            selected[mint_address] = pair
+    return selected
+
+def normalize_pair(pair):
+    """
+    Turns a Dexscreener pair into a coins row: (mint_address, name, symbol,
+    description, image_uri, *market data in MARKET_COLUMNS order).
+    """
+    base_token = pair.get('baseToken') or {}
+    info = pair.get('info') or {}
+    return (
+        base_token['address'],
+        base_token.get('name'),
+        base_token.get('symbol'),
+        info.get('description', ''),  # Dexscreener doesn't provide a top-level description
+        info.get('imageUrl', ''),
+        *pair_market_data(pair),
+    )
+
+def stored_market_data(conn, mint_addresses, chunk_size=500):
+    """Returns the stored market data of the coins among `mint_addresses` by mint address."""
+    mint_addresses = list(mint_addresses)
+    stored = {}
+    for start in range(0, len(mint_addresses), chunk_size):
+        chunk = mint_addresses[start:start + chunk_size]
+        rows = conn.execute(f"""
+            SELECT mint_address, {', '.join(MARKET_COLUMNS)} FROM coins
+            WHERE mint_address IN ({', '.join('?' * len(chunk))})
+        """, chunk)
+        for row in rows:
+            stored[row[0]] = tuple(row[1:])
+    return stored
+
+def store_dexscreener_pairs(pairs, conn, settings=None):
+    """
+    Upserts Dexscreener pairs into the coins table and, unless disabled,
+    appends their market data to the snapshot history and feeds it to the
+    rug pull detector and the momentum scorer. Coins the detector flags get
+    `rug_pull` set in the same transaction.
+
+    The pairs are deduplicated by base token with the [Dexscreener]
+    `pair_policy`, coins whose market data did not change are left alone,
+    and the remaining rows are written with one `executemany`.
+    Everything is written in the caller's transaction, e.g. a
+    `write_transaction`, so it is committed or rolled back as a whole.
+    """
+    settings = settings or get_settings()
+    with DB_WRITE_SECONDS.time(writer='dexscreener'):
+        _store_dexscreener_pairs(pairs, conn, settings)
+
+def _store_dexscreener_pairs(pairs, conn, settings):
+    selected = select_pairs(pairs, settings.dexscreener.pair_policy)
+    PAIRS_SKIPPED.inc(len(pairs) - len(selected), reason='duplicate')
+
+    rows = []
+    for mint_address, pair in selected.items():
+        try:
+            rows.append(normalize_pair(pair))
+        except (KeyError, TypeError, ValueError) as e:
+            PAIR_ERRORS.inc()
+            logger.warning("Error normalizing pair %s: %s", mint_address, e)
+
+    stored = stored_market_data(conn, (row[0] for row in rows))
+    changed = [row for row in rows if stored.get(row[0]) != row[5:]]
+    PAIRS_SKIPPED.inc(len(rows) - len(changed), reason='unchanged')
+
+    # The WHERE clause keeps rows written concurrently by another process
+    # from being rewritten with identical data.
+    conn.executemany("""
+        INSERT INTO coins (mint_address, name, symbol, description, image_uri, price_usd, market_cap, liquidity, volume_h24, txns_h24_buys, txns_h24_sells, source)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'dexscreener')
+        ON CONFLICT(mint_address) DO UPDATE SET
+            name = excluded.name,
+            symbol = excluded.symbol,
+            description = excluded.description,
+            image_uri = excluded.image_uri,
+            market_cap = excluded.market_cap,
+            liquidity = excluded.liquidity,
+            price_usd = excluded.price_usd,
+            volume_h24 = excluded.volume_h24,
+            txns_h24_buys = excluded.txns_h24_buys,
+            txns_h24_sells = excluded.txns_h24_sells,
+            last_updated_timestamp = CURRENT_TIMESTAMP,
+            analysis_status = 'pending'
+        WHERE coins.market_cap IS NOT excluded.market_cap
+            OR coins.liquidity IS NOT excluded.liquidity
+            OR coins.price_usd IS NOT excluded.price_usd
+            OR coins.volume_h24 IS NOT excluded.volume_h24
+            OR coins.txns_h24_buys IS NOT excluded.txns_h24_buys
+            OR coins.txns_h24_sells IS NOT excluded.txns_h24_sells
+    """, changed)
+    PAIRS_UPSERTED.inc(len(changed))
+    logger.debug("Stored Dexscreener pairs", extra={'pairs': len(pairs), 'coins': len(rows), 'written': len(changed)})
+
+    # Unchanged coins are still observations for the history and detectors.
+    observations = [(row[0], row[5], row[7], row[6], row[8], row[9], row[10]) for row in rows]
+    if settings.snapshots.enabled and observations:
+        record_snapshots(conn, observations)
+    if settings.rug_pull.enabled and observations:
+        flagged = get_rug_pull_detector(settings).update_many(observations)
+        for mint_address in flagged:
+            logger.info("Coin lost its liquidity or price, flagging as a rug pull", extra={'mint_address': mint_address})
+        # Stored right away: a rugged coin usually fails the filters, so the analysis never reaches its verdict.
+        conn.executemany("UPDATE coins SET rug_pull = TRUE WHERE mint_address = ?", [(mint_address,) for mint_address in flagged])
+    if settings.scoring.enabled and observations:
+        scorer = get_momentum_scorer(settings)
+        scorer.update_many(observations)
+        scorer.save(conn)
+
+def expire_snapshots(target, settings=None):
+    """
+    Downsamples and expires the snapshot history with the [Snapshots]
+    retention, in its own write transaction on a Database or connection.
+    Does nothing while snapshots are disabled.
+    Returns the number of (rolled up, deleted) rows.
+    """
+    settings = settings or get_settings()
+    if not settings.snapshots.enabled:
+        return 0, 0
+    with write_transaction(target) as conn:
+        rolled_up, deleted = apply_retention_from_settings(conn, settings)
+    if rolled_up or deleted:
+        logger.info("Applied snapshot retention", extra={'rolled_up': rolled_up, 'deleted': deleted})
+    return rolled_up, deleted
+
+def fetch_and_store_dexscreener_pairs(search_query, conn=None, session=None, settings=None):
+    """Fetches new pairs from Dexscreener and stores them in the database."""
+    pairs = fetch_dexscreener_pairs(search_query, session, settings)
+    if not pairs:
+        return
+
+    if conn is None:
+        get_database().write(store_dexscreener_pairs, pairs, settings)
+    else:
+        with write_transaction(conn):
+            store_dexscreener_pairs(pairs, conn, settings)
+
+class AsyncDexscreenerClient:
+    """
+    An asyncio Dexscreener client.
+
+    Requests go through one pooled keep-alive session and run in worker
+    threads, so they never block the event loop. At most `concurrency`
+    requests are in flight at once.
+    """
+    def __init__(self, concurrency=None, settings=None):
+        self.settings = settings or get_settings()
+        self.concurrency = concurrency or self.settings.dexscreener.concurrency
+        self.session = create_http_session(self.concurrency)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    async def search(self, search_query):
+        """Returns the pairs matching a search query."""
+        async with self._semaphore:
+            return await asyncio.to_thread(fetch_dexscreener_pairs, search_query, self.session, self.settings)
+
+    async def search_many(self, search_queries):
+        """Runs many searches concurrently and returns their pairs in query order."""
+        return await asyncio.gather(*(self.search(query) for query in search_queries))
+
+    def close(self):
+        """Closes the underlying HTTP session."""
+        self.session.close()
+
+async def fetch_and_store_many_dexscreener_pairs(search_queries, conn=None, concurrency=None, settings=None):
+    """
+    Fetches the pairs for many search queries concurrently and stores them.
+
+    Each response is written as soon as it arrives. Writes run one at a time
+    in a worker thread, through the shared database writer unless a
+    connection is passed in; such a connection must be opened with
+    `check_same_thread=False`. Once every query is stored, the snapshot
+    retention is applied, so the history does not grow without bound.
+    """
+    settings = settings or get_settings()
+    target = conn if conn is not None else get_database()
+    client = AsyncDexscreenerClient(concurrency, settings)
+    write_lock = asyncio.Lock()
+
+    def store(pairs):
+        with write_transaction(target) as write_conn:
+            store_dexscreener_pairs(pairs, write_conn, settings)
+
+    async def fetch_and_store(search_query):
+        pairs = await client.search(search_query)
+        if pairs:
+            async with write_lock:
+                await asyncio.to_thread(store, pairs)
+
+    try:
+        await asyncio.gather(*(fetch_and_store(query) for query in search_queries))
+        await asyncio.to_thread(expire_snapshots, target, settings)
+    finally:
+        client.close()
 
 if __name__ == '__main__':
     conn = get_db_connection()
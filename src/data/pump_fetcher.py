@@ -1,64 +1,355 @@
 import asyncio
+import logging
+import random
+import time
 import websockets
 import json
-import configparser
-from src.data.database import get_db_connection
+from collections import Counter
+from src import metrics
+from src.config import get_settings
+from src.data.database import get_database, write_transaction
+from src.analysis.developers import CHUNK_SIZE, DeveloperBlacklist, record_launches
 
-async def listen_for_new_tokens():
+logger = logging.getLogger(__name__)
+
+MESSAGES = metrics.counter('pumpfun_messages_total', 'pump.fun WebSocket messages by outcome.', ('outcome',))
+RECONNECTS = metrics.counter('pumpfun_reconnects_total', 'Reconnections to the pump.fun WebSocket.')
+QUEUE_DEPTH = metrics.gauge('pumpfun_queue_depth', 'pump.fun messages waiting to be processed.')
+JSON_DECODE_SECONDS = metrics.histogram('json_decode_seconds', 'Time spent decoding JSON payloads.', ('source',))
+DB_WRITE_SECONDS = metrics.histogram('db_write_seconds', 'Time spent writing batches to the database.', ('writer',))
+TOKENS_WRITTEN = metrics.counter('pumpfun_tokens_written_total', 'New pump.fun tokens written to the database.', ('outcome',))
+
+def stored_mints(conn, mint_addresses):
+    """Returns the mint addresses among `mint_addresses` that are already stored, with one query per chunk."""
+    mint_addresses = list(mint_addresses)
+    stored = set()
+    for start in range(0, len(mint_addresses), CHUNK_SIZE):
+        chunk = mint_addresses[start:start + CHUNK_SIZE]
+        rows = conn.execute(f"""
+            SELECT mint_address FROM coins
+            WHERE mint_address IN ({', '.join('?' * len(chunk))})
+        """, chunk)
+        stored.update(row[0] for row in rows)
+    return stored
+
+class TokenBatchWriter:
     """
-    Connects to the pumpportal.fun WebSocket and listens for new token creation events.
+    Buffers new-token rows and writes them to the database in batches.
+
+    A batch is flushed in a single transaction once it holds
+    `max_rows` rows or `max_delay` seconds have passed, whichever comes first.
+    Writes run in a worker thread so they never block the event loop. `target`
+    is a Database, whose shared writer is used, or a connection opened with
+    `check_same_thread=False`.
     """
-    print("Starting pump.fun fetcher...")
-    config = configparser.ConfigParser()
-    config.read('config/config.ini')
-    uri = config['api']['pumpportal_websocket_url']
+    def __init__(self, target, max_rows=500, max_delay=0.2):
+        self.target = target
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.buffer = []
+        self.queued = 0
+        self.flushed = 0
+        self.failed = 0
+        self.flushes = 0
+        self._full = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task = None
 
-    conn = get_db_connection()
-    try:
-        async with websockets.connect(uri) as websocket:
-            # Subscribe to new token creation events
-            payload = {
-                "method": "subscribeNewToken",
-            }
-            await websocket.send(json.dumps(payload))
-            print("Subscribed to new token events on pump.fun.")
-
-            cursor = conn.cursor()
-            async for message in websocket:
+    @property
+    def pending(self):
+        """The number of rows waiting to be written."""
+        return len(self.buffer)
+
+    def start(self):
+        """Starts the background task that flushes on the time threshold."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def add(self, row):
+        """Queues a (mint, name, symbol, description, image_uri, source, developer_address) row."""
+        self.buffer.append(row)
+        self.queued += 1
+        if len(self.buffer) >= self.max_rows:
+            self._full.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), self.max_delay)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            await self.flush()
+
+    async def flush(self):
+        """Writes all buffered rows in one transaction."""
+        async with self._lock:
+            rows, self.buffer = self.buffer, []
+            if not rows:
+                return
+            try:
+                await asyncio.to_thread(self._write, rows)
+                self.flushed += len(rows)
+                TOKENS_WRITTEN.inc(len(rows), outcome='written')
+            except Exception as e:
+                self.failed += len(rows)
+                TOKENS_WRITTEN.inc(len(rows), outcome='failed')
+                logger.error("Error writing new tokens from pump.fun: %s", e, extra={'tokens': len(rows)})
+            self.flushes += 1
+
+    def _write(self, rows):
+        with DB_WRITE_SECONDS.time(writer='pumpfun'), write_transaction(self.target) as conn:
+            # Only the coins actually inserted count as launches, so replayed
+            # or duplicate messages do not inflate the developers' counts.
+            seen = stored_mints(conn, {row[0] for row in rows})
+            conn.executemany("""
+                INSERT INTO coins (mint_address, name, symbol, description, image_uri, source, developer_address)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(mint_address) DO NOTHING
+            """, rows)
+            launches = Counter()
+            for row in rows:
+                if row[0] not in seen:
+                    seen.add(row[0])
+                    launches[row[6]] += 1
+            record_launches(conn, launches)
+
+    async def close(self):
+        """Stops the background task and flushes whatever is still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self):
+        """Returns the writer's counters."""
+        return {
+            'queued': self.queued,
+            'flushed': self.flushed,
+            'failed': self.failed,
+            'pending': self.pending,
+            'flushes': self.flushes,
+        }
+
+OVERFLOW_POLICIES = ('block', 'drop_newest', 'drop_oldest')
+
+class PumpFunListener:
+    """
+    A supervised pump.fun WebSocket listener.
+
+    The connection is re-established after any error or close, after a
+    random delay whose upper bound doubles with every failed attempt, from
+    `reconnect_min_delay` up to `reconnect_max_delay` seconds. The new-token
+    subscription is sent again on every connection.
+
+    Receiving is decoupled from processing: the receive loop only puts raw
+    messages on a bounded queue, and a separate task parses them and hands
+    the rows to a TokenBatchWriter and `on_new_token`. When the queue is
+    full, `overflow_policy` decides what happens: 'block' stops reading
+    from the socket, 'drop_newest' discards the incoming message and
+    'drop_oldest' discards the oldest queued one. Dropped messages are
+    counted.
+
+    Tokens created by a blacklisted developer (see DeveloperBlacklist) are
+    rejected before they are stored or analyzed.
+    """
+    def __init__(self, settings=None, on_new_token=None, target=None, connect=None, developer_blacklist=None):
+        self.settings = settings or get_settings()
+        pump_fun = self.settings.pump_fun
+        if pump_fun.overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{pump_fun.overflow_policy}'; expected one of {', '.join(OVERFLOW_POLICIES)}")
+        self.uri = self.settings.api.pumpportal_websocket_url
+        self.on_new_token = on_new_token
+        self.overflow_policy = pump_fun.overflow_policy
+        self.queue = asyncio.Queue(maxsize=pump_fun.queue_size)
+        self.writer = TokenBatchWriter(
+            target if target is not None else get_database(self.settings.database.db_name),
+            pump_fun.batch_max_rows,
+            pump_fun.batch_max_delay_ms / 1000
+        )
+        self.connect = connect or websockets.connect
+        self.developer_blacklist = developer_blacklist or DeveloperBlacklist(self.writer.target, self.settings)
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self.invalid = 0
+        self.rejected = 0
+        self.reconnects = 0
+        self.max_queue_depth = 0
+        self._stopping = None
+        self._websocket = None
+
+    def reconnect_delay(self, attempt):
+        """Returns a jittered delay before reconnect attempt `attempt` (starting at 0)."""
+        pump_fun = self.settings.pump_fun
+        ceiling = min(pump_fun.reconnect_max_delay, pump_fun.reconnect_min_delay * 2 ** attempt)
+        return random.uniform(pump_fun.reconnect_min_delay, max(ceiling, pump_fun.reconnect_min_delay))
+
+    async def enqueue(self, message, received_at):
+        """Queues a raw message according to the overflow policy."""
+        self.received += 1
+        MESSAGES.inc(outcome='received')
+        item = (message, received_at)
+        if self.overflow_policy == 'block':
+            await self.queue.put(item)
+        elif not self.queue.full():
+            self.queue.put_nowait(item)
+        elif self.overflow_policy == 'drop_newest':
+            self.dropped += 1
+            MESSAGES.inc(outcome='dropped')
+        else:
+            self.queue.get_nowait()
+            self.queue.task_done()
+            self.queue.put_nowait(item)
+            self.dropped += 1
+            MESSAGES.inc(outcome='dropped')
+        self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+        QUEUE_DEPTH.set(self.queue.qsize())
+
+    async def process(self, message, received_at):
+        """Parses one message and stores the new token it announces."""
+        try:
+            with JSON_DECODE_SECONDS.time(source='pumpfun'):
+                data = json.loads(message)
+        except json.JSONDecodeError:
+            self.invalid += 1
+            MESSAGES.inc(outcome='invalid')
+            logger.warning("Received non-JSON message: %.200s", message)
+            return
+        if not isinstance(data, dict) or 'mint' not in data:
+            return
+        developer_address = data.get('traderPublicKey')
+        await self.developer_blacklist.reload_if_stale()
+        if developer_address in self.developer_blacklist:
+            self.rejected += 1
+            MESSAGES.inc(outcome='rejected')
+            logger.info("Rejected token from a blacklisted developer",
+                        extra={'mint_address': data.get('mint'), 'developer_address': developer_address})
+            return
+        logger.debug("New token created: %s (%s)", data.get('name'), data.get('symbol'))
+        row = (
+            data.get('mint'),
+            data.get('name'),
+            data.get('symbol'),
+            data.get('description'),
+            data.get('image_uri'),
+            'pump.fun',
+            developer_address,
+        )
+        self.writer.add(row)
+        if self.on_new_token is not None:
+            await self.on_new_token(row, received_at)
+
+    async def _process_queue(self):
+        while True:
+            message, received_at = await self.queue.get()
+            try:
+                await self.process(message, received_at)
+            except Exception:
+                logger.exception("An error occurred processing a pump.fun message")
+            finally:
+                self.processed += 1
+                MESSAGES.inc(outcome='processed')
+                QUEUE_DEPTH.set(self.queue.qsize())
+                self.queue.task_done()
+
+    async def _receive(self):
+        """Connects, subscribes and queues messages until the connection ends."""
+        async with self.connect(self.uri) as websocket:
+            self._websocket = websocket
+            try:
+                await websocket.send(json.dumps({"method": "subscribeNewToken"}))
+                logger.info("Subscribed to new token events on pump.fun")
+                async for message in websocket:
+                    await self.enqueue(message, time.monotonic())
+            finally:
+                self._websocket = None
+
+    async def run(self):
+        """
+        Listens until stop() is called, reconnecting whenever the connection is lost.
+        The developer blacklist is loaded first unless it already is, so a
+        broken blacklist configuration stops the listener before it starts.
+        """
+        self._stopping = asyncio.Event()
+        if self.developer_blacklist.loaded_at is None:
+            await asyncio.to_thread(self.developer_blacklist.load)
+        self.writer.start()
+        processor = asyncio.create_task(self._process_queue())
+        attempt = 0
+        try:
+            while not self._stopping.is_set():
+                received_before = self.received
                 try:
-                    data = json.loads(message)
-                    if 'mint' in data:
-                        print(f"New token created: {data.get('name')} ({data.get('symbol')})")
-
-                        try:
-                            cursor.execute("""
-                                INSERT INTO coins (mint_address, name, symbol, description, image_uri, source)
-                                VALUES (?, ?, ?, ?, ?, ?)
-                                ON CONFLICT(mint_address) DO NOTHING
-                            """, (
-                                data.get('mint'),
-                                data.get('name'),
-                                data.get('symbol'),
-                                data.get('description'),
-                                data.get('image_uri'),
-                                'pump.fun'
-                            ))
-                            conn.commit()
-                        except Exception as e:
-                            print(f"Error inserting new token from pump.fun: {e}")
-                except json.JSONDecodeError:
-                    print(f"Received non-JSON message: {message}")
+                    await self._receive()
+                    if not self._stopping.is_set():
+                        logger.warning("pump.fun WebSocket closed")
                 except Exception as e:
-                    print(f"An error occurred in the message loop: {e}")
-    except Exception as e:
-        print(f"Failed to connect to WebSocket: {e}")
-    finally:
-        if conn:
-            conn.close()
+                    logger.warning("pump.fun WebSocket error: %s", e)
+                if self._stopping.is_set():
+                    break
+                # A connection that delivered messages was healthy; start the backoff over.
+                attempt = 0 if self.received > received_before else attempt + 1
+                delay = self.reconnect_delay(attempt)
+                logger.info("Reconnecting to pump.fun in %.1fs", delay, extra={'attempt': attempt})
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), delay)
+                except asyncio.TimeoutError:
+                    self.reconnects += 1
+                    RECONNECTS.inc()
+        finally:
+            if not processor.done():
+                try:
+                    await asyncio.wait_for(self.queue.join(), 5)
+                except asyncio.TimeoutError:
+                    logger.warning("Gave up processing queued pump.fun messages", extra={'queued': self.queue.qsize()})
+            processor.cancel()
+            try:
+                await processor
+            except asyncio.CancelledError:
+                pass
+            await self.developer_blacklist.wait_for_reload()
+            await self.writer.close()
+            logger.info("pump.fun listener stopped", extra=self.stats())
+
+    async def stop(self):
+        """Stops listening; run() then drains the queue and flushes the writer."""
+        if self._stopping is not None:
+            self._stopping.set()
+        if self._websocket is not None:
+            await self._websocket.close()
+
+    def stats(self):
+        """Returns the listener's message counters, queue depth and writer counters."""
+        return {
+            'received': self.received,
+            'processed': self.processed,
+            'dropped': self.dropped,
+            'invalid': self.invalid,
+            'rejected': self.rejected,
+            'reconnects': self.reconnects,
+            'queue_depth': self.queue.qsize(),
+            'max_queue_depth': self.max_queue_depth,
+            'writer': self.writer.stats(),
+        }
+
+async def listen_for_new_tokens(settings=None, on_new_token=None):
+    """
+    Listens for new token creation events on pumpportal.fun until cancelled.
+    New tokens are stored through a TokenBatchWriter. If `on_new_token` is
+    given, it is awaited with each token's row and the time.monotonic() time
+    it was received, e.g. to analyze it right away.
+    """
+    logger.info("Starting pump.fun fetcher")
+    await PumpFunListener(settings, on_new_token).run()
 
 if __name__ == '__main__':
     try:
-        asyncio.get_event_loop().run_until_complete(listen_for_new_tokens())
+        asyncio.run(listen_for_new_tokens())
     except KeyboardInterrupt:
         print("Fetcher stopped by user.")
     except Exception as e:
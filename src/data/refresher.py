@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import math
+import time
+from src import metrics
+from src.config import get_settings
+from src.data.database import Database, get_database, write_transaction
+from src.data.fetcher import MARKET_COLUMNS, MAX_TOKENS_PER_REQUEST, create_http_session, expire_snapshots, fetch_dexscreener_tokens, pair_market_data, select_pairs, store_dexscreener_pairs
+
+logger = logging.getLogger(__name__)
+
+REFRESHED_COINS = metrics.counter('refresh_coins_total', 'Coins handled by the refresh scheduler by outcome.', ('outcome',))
+
+def next_interval(age_seconds, price_change, misses, refresh_settings):
+    """
+    Returns the seconds until a coin's next refresh.
+
+    Young coins are refreshed every `min_interval_seconds`, and the interval
+    grows with every hour of age. Volatile coins are refreshed sooner: a
+    relative price change of 1 / `volatility_weight` halves the interval.
+    Every consecutive refresh that returned no new data multiplies it by
+    `backoff_factor`, and coins missing for `dead_after_misses` refreshes in
+    a row are only retried every `dead_interval_hours`.
+    """
+    if misses >= refresh_settings.dead_after_misses:
+        return refresh_settings.dead_interval_hours * 3600
+    interval = refresh_settings.min_interval_seconds * (1 + max(age_seconds or 0, 0) / 3600)
+    interval /= 1 + refresh_settings.volatility_weight * price_change
+    interval *= refresh_settings.backoff_factor ** misses
+    return min(max(interval, refresh_settings.min_interval_seconds), refresh_settings.max_interval_seconds)
+
+class RefreshScheduler:
+    """
+    Keeps the market data of tracked coins fresh.
+
+    Every cycle, the coins that are due are looked up with Dexscreener's
+    multi-token endpoint, `batch_size` addresses per request, within a
+    budget of `requests_per_minute`. The requests themselves are paced and
+    retried by the outbound governor. Coins never refreshed come first,
+    newest first, then the most overdue ones. After each refresh a coin's
+    next due time is set by `next_interval`, so young and volatile coins
+    are polled often while stale and dead ones back off. Each cycle ends
+    with the snapshot retention, as the refreshes keep adding snapshots.
+    """
+    def __init__(self, target=None, settings=None, session=None):
+        self.settings = settings or get_settings()
+        self.target = target if target is not None else get_database(self.settings.database.db_name)
+        self.batch_size = min(self.settings.refresh.batch_size, MAX_TOKENS_PER_REQUEST)
+        self.session = session or create_http_session(1)
+
+    @property
+    def requests_per_cycle(self):
+        """The request budget of one cycle."""
+        refresh = self.settings.refresh
+        return max(1, int(refresh.requests_per_minute * refresh.cycle_seconds / 60))
+
+    def due_coins(self, limit, now=None):
+        """
+        Returns up to `limit` coins due for a refresh, most urgent first:
+        coins never refreshed, newest first, then the most overdue ones.
+        Both are read through refresh_schedule indexes, so a cycle never
+        scans the coins table.
+        """
+        now = now if now is not None else time.time()
+        reader = self.target.reader() if isinstance(self.target, Database) else self.target
+        query = f"""
+            SELECT coins.id, coins.mint_address, {', '.join(f'coins.{column}' for column in MARKET_COLUMNS)},
+                ? - CAST(strftime('%s', coins.created_timestamp) AS REAL) AS age_seconds,
+                refresh_schedule.misses AS misses
+            FROM refresh_schedule JOIN coins ON coins.id = refresh_schedule.coin_id
+        """
+        coins = reader.execute(query + """
+            WHERE refresh_schedule.last_refreshed_at IS NULL
+            ORDER BY refresh_schedule.coin_id DESC LIMIT ?
+        """, (now, limit)).fetchall()
+        if len(coins) < limit:
+            coins += reader.execute(query + """
+                WHERE refresh_schedule.next_refresh_at <= ? AND refresh_schedule.last_refreshed_at IS NOT NULL
+                ORDER BY refresh_schedule.next_refresh_at LIMIT ?
+            """, (now, now, limit - len(coins))).fetchall()
+        return coins
+
+    def refresh_batch(self, coins, now=None):
+        """
+        Refreshes up to `batch_size` coins with one request and reschedules them.
+        Returns the number of coins Dexscreener returned, or None if the request failed.
+        """
+        now = now if now is not None else time.time()
+        mint_addresses = [coin['mint_address'] for coin in coins]
+        pairs = fetch_dexscreener_tokens(mint_addresses, self.session, self.settings)
+        if pairs is None:
+            return None
+        selected = select_pairs(pairs, self.settings.dexscreener.pair_policy, set(mint_addresses))
+
+        schedule = []
+        for coin in coins:
+            pair = selected.get(coin['mint_address'])
+            misses = coin['misses'] + 1
+            price_change = 0.0
+            if pair is not None:
+                market_data = pair_market_data(pair)
+                if market_data != tuple(coin[column] for column in MARKET_COLUMNS):
+                    misses = 0
+                old_price, new_price = coin['price_usd'], market_data[0]
+                if old_price and new_price is not None and not math.isnan(new_price):
+                    price_change = abs(new_price - old_price) / old_price
+            interval = next_interval(coin['age_seconds'], price_change, misses, self.settings.refresh)
+            schedule.append((coin['id'], now + interval, now, misses))
+
+        with write_transaction(self.target) as conn:
+            if selected:
+                store_dexscreener_pairs(list(selected.values()), conn, self.settings)
+            conn.executemany("""
+                INSERT OR REPLACE INTO refresh_schedule (coin_id, next_refresh_at, last_refreshed_at, misses)
+                VALUES (?, ?, ?, ?)
+            """, schedule)
+        return len(selected)
+
+    def run_once(self, now=None):
+        """Runs one refresh cycle within the request budget and returns its counts."""
+        coins = self.due_coins(self.requests_per_cycle * self.batch_size, now)
+        stats = {'due': len(coins), 'requests': 0, 'refreshed': 0, 'failed': 0}
+        for start in range(0, len(coins), self.batch_size):
+            batch = coins[start:start + self.batch_size]
+            stats['requests'] += 1
+            refreshed = self.refresh_batch(batch, now)
+            if refreshed is None:
+                stats['failed'] += len(batch)
+                REFRESHED_COINS.inc(len(batch), outcome='failed')
+            else:
+                stats['refreshed'] += refreshed
+                REFRESHED_COINS.inc(refreshed, outcome='refreshed')
+                REFRESHED_COINS.inc(len(batch) - refreshed, outcome='missing')
+        expire_snapshots(self.target, self.settings)
+        return stats
+
+    async def run(self, cycles=None):
+        """Runs a refresh cycle every `cycle_seconds`, forever or for `cycles` cycles."""
+        completed = 0
+        while True:
+            started = time.monotonic()
+            stats = await asyncio.to_thread(self.run_once)
+            logger.info("Refreshed %d of %d due coins", stats['refreshed'], stats['due'], extra=stats)
+            completed += 1
+            if cycles is not None and completed >= cycles:
+                break
+            await asyncio.sleep(max(self.settings.refresh.cycle_seconds - (time.monotonic() - started), 0))
+
+    def close(self):
+        """Closes the underlying HTTP session."""
+        self.session.close()
@@ -0,0 +1,130 @@
+import math
+import time
+from array import array
+from src.config import get_settings
+
+RAW_RESOLUTION = 60
+HOURLY_RESOLUTION = 3600
+
+SERIES_COLUMNS = ('price_usd', 'liquidity', 'market_cap', 'volume_h24', 'txns_h24_buys', 'txns_h24_sells')
+
+def create_snapshot_tables(cursor):
+    """
+    Creates the market snapshot table.
+
+    The table is keyed by (coin_id, timestamp) and stored WITHOUT ROWID, so the
+    primary key is the table itself: reading one coin's series is a single
+    range scan with no extra lookups. A second index serves retention.
+    """
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS market_snapshots (
+        coin_id INTEGER NOT NULL,
+        timestamp INTEGER NOT NULL,
+        resolution INTEGER NOT NULL,
+        price_usd REAL,
+        liquidity REAL,
+        market_cap REAL,
+        volume_h24 REAL,
+        txns_h24_buys INTEGER,
+        txns_h24_sells INTEGER,
+        PRIMARY KEY (coin_id, timestamp)
+    ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_market_snapshots_resolution_timestamp
+    ON market_snapshots (resolution, timestamp)
+    """)
+
+def record_snapshots(conn, rows, timestamp=None, resolution=RAW_RESOLUTION):
+    """
+    Appends market observations to the snapshot table.
+
+    `rows` are (mint_address, price_usd, liquidity, market_cap, volume_h24,
+    txns_h24_buys, txns_h24_sells) tuples for coins already in the coins
+    table. Timestamps are bucketed to `resolution` seconds; a later
+    observation in the same bucket replaces the earlier one.
+    """
+    timestamp = int(timestamp if timestamp is not None else time.time())
+    bucket = timestamp - timestamp % resolution
+    conn.executemany("""
+        INSERT INTO market_snapshots (coin_id, timestamp, resolution, price_usd, liquidity, market_cap, volume_h24, txns_h24_buys, txns_h24_sells)
+        SELECT id, ?, ?, ?, ?, ?, ?, ?, ? FROM coins WHERE mint_address = ?
+        ON CONFLICT(coin_id, timestamp) DO UPDATE SET
+            price_usd = excluded.price_usd,
+            liquidity = excluded.liquidity,
+            market_cap = excluded.market_cap,
+            volume_h24 = excluded.volume_h24,
+            txns_h24_buys = excluded.txns_h24_buys,
+            txns_h24_sells = excluded.txns_h24_sells
+    """, [(bucket, resolution, *row[1:], row[0]) for row in rows])
+
+def apply_retention(conn, raw_retention_hours=24, hourly_retention_days=30, now=None):
+    """
+    Downsamples and expires snapshots.
+
+    Raw snapshots older than `raw_retention_hours` are rolled up into one
+    snapshot per coin and hour, holding the last observation of that hour.
+    Hourly snapshots older than `hourly_retention_days` are deleted.
+    Must be called inside a write transaction.
+    Returns the number of (rolled up, deleted) rows.
+    """
+    now = int(now if now is not None else time.time())
+    # Align the cutoff to an hour so that every hour is rolled up exactly once.
+    raw_cutoff = now - int(raw_retention_hours * 3600)
+    raw_cutoff -= raw_cutoff % HOURLY_RESOLUTION
+    hourly_cutoff = now - int(hourly_retention_days * 86400)
+
+    conn.execute("DROP TABLE IF EXISTS temp.snapshot_rollup")
+    # SQLite takes the bare columns of a MAX() aggregate from the row holding
+    # the maximum, so this picks each hour's last observation.
+    conn.execute("""
+        CREATE TEMP TABLE snapshot_rollup AS
+        SELECT coin_id, timestamp - timestamp % ? AS bucket, MAX(timestamp) AS last_timestamp,
+            price_usd, liquidity, market_cap, volume_h24, txns_h24_buys, txns_h24_sells
+        FROM market_snapshots
+        WHERE resolution = ? AND timestamp < ?
+        GROUP BY coin_id, bucket
+    """, (HOURLY_RESOLUTION, RAW_RESOLUTION, raw_cutoff))
+    conn.execute("DELETE FROM market_snapshots WHERE resolution = ? AND timestamp < ?", (RAW_RESOLUTION, raw_cutoff))
+    rolled_up = conn.execute("""
+        INSERT OR REPLACE INTO market_snapshots (coin_id, timestamp, resolution, price_usd, liquidity, market_cap, volume_h24, txns_h24_buys, txns_h24_sells)
+        SELECT coin_id, bucket, ?, price_usd, liquidity, market_cap, volume_h24, txns_h24_buys, txns_h24_sells
+        FROM temp.snapshot_rollup
+    """, (HOURLY_RESOLUTION,)).rowcount
+    conn.execute("DROP TABLE temp.snapshot_rollup")
+    deleted = conn.execute(
+        "DELETE FROM market_snapshots WHERE resolution = ? AND timestamp < ?",
+        (HOURLY_RESOLUTION, hourly_cutoff)
+    ).rowcount
+    return rolled_up, deleted
+
+def apply_retention_from_settings(conn, settings=None):
+    """Runs apply_retention with the [Snapshots] settings."""
+    snapshot_settings = (settings or get_settings()).snapshots
+    return apply_retention(conn, snapshot_settings.raw_retention_hours, snapshot_settings.hourly_retention_days)
+
+def get_coin_series(conn, coin_id, since=None, until=None):
+    """
+    Returns a coin's snapshot history as arrays, oldest first.
+
+    The result maps 'timestamp' to an array of ints and every column in
+    SERIES_COLUMNS to an array of floats, with NULLs read as NaN.
+    """
+    query = f"SELECT timestamp, {', '.join(SERIES_COLUMNS)} FROM market_snapshots WHERE coin_id = ?"
+    params = [coin_id]
+    if since is not None:
+        query += " AND timestamp >= ?"
+        params.append(int(since))
+    if until is not None:
+        query += " AND timestamp < ?"
+        params.append(int(until))
+    query += " ORDER BY timestamp"
+
+    series = {'timestamp': array('q')}
+    for column in SERIES_COLUMNS:
+        series[column] = array('d')
+    for row in conn.execute(query, params):
+        series['timestamp'].append(row[0])
+        for i, column in enumerate(SERIES_COLUMNS, start=1):
+            series[column].append(math.nan if row[i] is None else float(row[i]))
+    return series
@@ -0,0 +1,263 @@
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+import requests
+from src import metrics
+from src.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Responses worth retrying: the provider is throttling us or briefly unavailable.
+THROTTLED_STATUS = 429
+TRANSIENT_STATUSES = frozenset({THROTTLED_STATUS, 500, 502, 503, 504})
+TRANSIENT_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+REQUESTS = metrics.counter('outbound_requests_total', 'Outbound API requests by host and outcome.', ('host', 'outcome'))
+RETRIES = metrics.counter('outbound_retries_total', 'Outbound API requests retried after a transient failure.', ('host',))
+WAIT_SECONDS = metrics.histogram('outbound_wait_seconds', 'Time spent waiting for an outbound request slot.', ('host',))
+RATE = metrics.gauge('outbound_rate_per_second', 'The request rate currently allowed per host.', ('host',))
+CIRCUIT_OPEN = metrics.gauge('outbound_circuit_open', 'Whether the circuit breaker of a host is open.', ('host',))
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of sending a request to a host whose circuit breaker is open."""
+
+def host_of(url):
+    """Returns the host (and port) part of a URL."""
+    return urlsplit(url).netloc
+
+def parse_retry_after(value, now=None):
+    """
+    Returns the number of seconds a Retry-After header asks to wait, or None.
+    The header holds either a number of seconds or an HTTP date.
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(retry_at.timestamp() - (now if now is not None else time.time()), 0.0)
+
+def backoff_delay(attempt, settings):
+    """Returns a random delay of up to base * 2^attempt seconds, capped at the max ("full jitter")."""
+    return random.uniform(0, min(settings.backoff_max_seconds, settings.backoff_base_seconds * 2 ** attempt))
+
+class HostGovernor:
+    """
+    The request budget and health of one host.
+
+    Requests are paced by a token bucket that refills at `rate` requests per
+    second and holds up to `burst_seconds` worth of them. The rate adapts
+    to the host: every success adds `rate_increase` of the host's `limit`
+    back, up to the limit, and every 429 response multiplies it by
+    `rate_decrease` (down to `min_rate_fraction` of the limit) and holds the
+    following requests back for the Retry-After time. This keeps the rate
+    just under what the provider accepts, even when its real limit is lower
+    than the configured one. Hosts without a limit are not paced, but still
+    honor Retry-After.
+
+    After `failure_threshold` failures in a row the circuit opens: requests
+    fail fast with CircuitOpenError for `open_seconds`. Then one trial
+    request is let through, which closes the circuit if it succeeds and
+    opens it again if it fails. Safe to share between threads.
+    """
+    def __init__(self, host, limit=None, settings=None, clock=time.monotonic, sleep=time.sleep):
+        self.host = host
+        self.settings = settings or get_settings().governor
+        self.limit = limit if limit and limit > 0 else None
+        self.rate = self.limit
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = self._capacity()
+        self.failures = 0
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+        if self.rate:
+            RATE.set(self.rate, host=host)
+
+    @property
+    def state(self):
+        """'closed', 'open' or 'half_open'."""
+        if self._opened_at is None:
+            return 'closed'
+        if self._trial or self.clock() - self._opened_at < self.settings.open_seconds:
+            return 'open'
+        return 'half_open'
+
+    def _capacity(self):
+        return max(1.0, self.rate * self.settings.burst_seconds) if self.rate else 0.0
+
+    def _refill(self, now):
+        if self.rate:
+            self.tokens = min(self._capacity(), self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Blocks until a request may be sent. Raises CircuitOpenError while the circuit is open."""
+        with self._lock:
+            now = self.clock()
+            if self._opened_at is not None:
+                if self._trial or now - self._opened_at < self.settings.open_seconds:
+                    REQUESTS.inc(host=self.host, outcome='rejected')
+                    raise CircuitOpenError(f"Circuit breaker open for {self.host}")
+                self._trial = True
+            self._refill(now)
+            wait = max(self._paused_until - now, 0.0)
+            if self.rate:
+                self.tokens -= 1
+                wait = max(wait, -self.tokens / self.rate)
+        if wait > 0:
+            WAIT_SECONDS.observe(wait, host=self.host)
+            self.sleep(wait)
+
+    def record_success(self):
+        """Records a response from a healthy host and probes for a higher rate."""
+        with self._lock:
+            self._close()
+            if self.rate:
+                self._refill(self.clock())
+                self.rate = min(self.limit, self.rate + self.limit * self.settings.rate_increase)
+                RATE.set(self.rate, host=self.host)
+        REQUESTS.inc(host=self.host, outcome='success')
+
+    def record_throttle(self, pause):
+        """Records a 429 response: slows down and holds requests back for `pause` seconds."""
+        with self._lock:
+            # Being throttled still shows the host is up.
+            self._close()
+            now = self.clock()
+            self._refill(now)
+            if self.rate:
+                self.rate = max(self.limit * self.settings.min_rate_fraction, self.rate * self.settings.rate_decrease)
+                # Go into debt, so queued requests resume one slot apart after the pause.
+                self.tokens = min(self.tokens, 0.0) - pause * self.rate
+                RATE.set(self.rate, host=self.host)
+            else:
+                self._paused_until = max(self._paused_until, now + pause)
+        REQUESTS.inc(host=self.host, outcome='throttled')
+        logger.info("Throttled by %s", self.host, extra={'host': self.host, 'pause_seconds': round(pause, 3), 'rate': self.rate})
+
+    def record_failure(self):
+        """Records a failed request, opening the circuit once too many failed in a row."""
+        with self._lock:
+            self.failures += 1
+            opened = self._trial or (self._opened_at is None and self.failures >= self.settings.failure_threshold)
+            if opened:
+                self._opened_at = self.clock()
+                self._trial = False
+        REQUESTS.inc(host=self.host, outcome='failure')
+        if opened:
+            CIRCUIT_OPEN.set(1, host=self.host)
+            logger.warning("Circuit breaker opened for %s after %d failures", self.host, self.failures,
+                           extra={'host': self.host, 'open_seconds': self.settings.open_seconds})
+
+    def _close(self):
+        if self._opened_at is not None:
+            CIRCUIT_OPEN.set(0, host=self.host)
+            logger.info("Circuit breaker closed for %s", self.host, extra={'host': self.host})
+        self.failures = 0
+        self._opened_at = None
+        self._trial = False
+
+class Governor:
+    """
+    The outbound call governor shared by the rugcheck and Dexscreener clients.
+
+    Every host gets its own HostGovernor, created on first use. Hosts are
+    limited to `limits` (host -> requests per second), which defaults to
+    the Dexscreener `requests_per_minute` and the rugcheck
+    `rugcheck_requests_per_second`; other hosts are not paced. Requests go
+    through `get`, which retries transient failures with jittered backoff
+    as configured in the [Governor] section.
+    """
+    def __init__(self, settings=None, limits=None, clock=time.monotonic, sleep=time.sleep):
+        self.settings = settings or get_settings()
+        self.limits = {
+            host_of(self.settings.api.dexscreener_api_url): self.settings.dexscreener.requests_per_minute / 60,
+            host_of(self.settings.api.rugcheck_api_url): self.settings.analysis.rugcheck_requests_per_second,
+        }
+        self.limits.update(limits or {})
+        self.clock = clock
+        self.sleep = sleep
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def host(self, url):
+        """Returns the HostGovernor of a URL's host."""
+        host = host_of(url)
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = HostGovernor(host, self.limits.get(host), self.settings.governor, self.clock, self.sleep)
+            return self._hosts[host]
+
+    def get(self, http, url, **kwargs):
+        """
+        GETs `url` with `http` (a requests session or the requests module)
+        and returns the response.
+
+        Connection errors, timeouts, 429 and 5xx responses are retried up to
+        `max_retries` times. A 429 waits for its Retry-After time, the other
+        failures for a jittered exponential backoff. Once the retries are
+        used up, the last response is returned or the last exception raised,
+        so callers check the status as usual. Raises CircuitOpenError while
+        the host's circuit breaker is open.
+        """
+        host = self.host(url)
+        settings = self.settings.governor
+        attempt = 0
+        while True:
+            host.acquire()
+            try:
+                response = http.get(url, **kwargs)
+            except requests.exceptions.RequestException as e:
+                host.record_failure()
+                if attempt >= settings.max_retries or not isinstance(e, TRANSIENT_ERRORS):
+                    raise
+                delay = backoff_delay(attempt, settings)
+            else:
+                status = response.status_code
+                if status not in TRANSIENT_STATUSES:
+                    host.record_success()
+                    return response
+                delay = backoff_delay(attempt, settings)
+                if status == THROTTLED_STATUS:
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                    host.record_throttle(delay if retry_after is None else retry_after)
+                    # The host holds the next request back by itself.
+                    delay = 0
+                else:
+                    host.record_failure()
+                if attempt >= settings.max_retries:
+                    return response
+                response.close()
+            RETRIES.inc(host=host.host)
+            if delay:
+                self.sleep(delay)
+            attempt += 1
+
+_governor = None
+_governor_lock = threading.Lock()
+
+def get_governor():
+    """Returns the process-wide governor, creating it from the settings on first use."""
+    global _governor
+    with _governor_lock:
+        if _governor is None:
+            _governor = Governor()
+        return _governor
+
+def set_governor(governor):
+    """Replaces the process-wide governor, e.g. after loading other settings."""
+    global _governor
+    with _governor_lock:
+        _governor = governor
@@ -0,0 +1,60 @@
+import json
+import logging
+import sys
+import time
+
+# Attributes every LogRecord has; anything else was passed through `extra`.
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+def record_fields(record):
+    """Returns the structured fields passed to a log call with `extra`."""
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+
+class StructuredFormatter(logging.Formatter):
+    """
+    Formats records with their structured fields.
+
+    As text, fields follow the message as key=value pairs:
+        2024-05-01T12:00:00Z INFO src.analysis.analyzer: Analyzed coins coins=500 seconds=0.21
+    As JSON, every record is one object per line.
+    """
+    def __init__(self, json_output=False):
+        super().__init__()
+        self.json_output = json_output
+
+    def formatTime(self, record, datefmt=None):
+        return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f".{int(record.msecs):03d}Z"
+
+    def format(self, record):
+        fields = record_fields(record)
+        if self.json_output:
+            entry = {
+                'ts': self.formatTime(record),
+                'level': record.levelname,
+                'logger': record.name,
+                'msg': record.getMessage(),
+                **fields,
+            }
+            if record.exc_info:
+                entry['exc'] = self.formatException(record.exc_info)
+            return json.dumps(entry, default=str)
+
+        line = f"{self.formatTime(record)} {record.levelname} {record.name}: {record.getMessage()}"
+        if fields:
+            line += ' ' + ' '.join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_info:
+            line += '\n' + self.formatException(record.exc_info)
+        return line
+
+def configure_logging(logging_settings, stream=None):
+    """Sends the bot's logs to stderr at the configured level and format."""
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(StructuredFormatter(json_output=logging_settings.format == 'json'))
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(logging_settings.level)
+    # Keep third-party libraries quiet unless they have something important to say.
+    for name in ('websockets', 'urllib3'):
+        logging.getLogger(name).setLevel(max(logging.WARNING, root.level))
@@ -0,0 +1,271 @@
+import asyncio
+import bisect
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, from 1 ms to 10 s
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def format_labels(labels):
+    """Formats labels the Prometheus way: {name="value",...}, or '' without labels."""
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in labels.values())
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + '}'
+
+class Metric:
+    """
+    Base class of the metric types: a named family of values, one per
+    combination of label values. Updates are thread-safe.
+    """
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Metric {self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key):
+        return dict(zip(self.labelnames, key))
+
+    def label_sets(self):
+        """Returns the label combinations that have values."""
+        with self._lock:
+            return [self._labels(key) for key in self._values]
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+class Counter(Metric):
+    """A value that only goes up, such as a number of messages."""
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name, self._labels(key), value
+
+class Gauge(Counter):
+    """A value that can go up and down, such as a queue depth."""
+    type = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+class Histogram(Metric):
+    """
+    Counts observations, typically durations, into cumulative buckets and
+    keeps their count and sum.
+    """
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'counts': [0] * (len(self.buckets) + 1), 'count': 0, 'sum': 0.0}
+            state['counts'][index] += 1
+            state['count'] += 1
+            state['sum'] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observes the time spent in the `with` block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self, **labels):
+        """Returns the count, sum and per-bucket counts observed for some labels."""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            if state is None:
+                return {'count': 0, 'sum': 0.0, 'counts': [0] * (len(self.buckets) + 1)}
+            return {'count': state['count'], 'sum': state['sum'], 'counts': list(state['counts'])}
+
+    def quantile(self, q, **labels):
+        """Estimates a quantile as the upper bound of the bucket it falls in."""
+        snapshot = self.snapshot(**labels)
+        return self._quantile(snapshot, q)
+
+    def _quantile(self, snapshot, q):
+        if not snapshot['count']:
+            return None
+        rank = q * snapshot['count']
+        seen = 0
+        for bound, count in zip(self.buckets + (math.inf,), snapshot['counts']):
+            seen += count
+            if seen >= rank:
+                return bound
+        return math.inf
+
+    def samples(self):
+        with self._lock:
+            items = [(key, {'count': state['count'], 'sum': state['sum'], 'counts': list(state['counts'])})
+                     for key, state in self._values.items()]
+        for key, state in items:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), state['counts']):
+                cumulative += count
+                yield f"{self.name}_bucket", {**labels, 'le': '+Inf' if bound == math.inf else repr(bound)}, cumulative
+            yield f"{self.name}_count", labels, state['count']
+            yield f"{self.name}_sum", labels, state['sum']
+
+class MetricsRegistry:
+    """
+    Holds the process's metrics. Metrics are created on first use and
+    shared afterwards, so modules can declare the ones they update at
+    import time.
+    """
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif type(metric) is not cls or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} is already registered as a {metric.type} with labels {metric.labelnames}")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._get(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def metrics(self):
+        with self._lock:
+            return sorted(self._metrics.values(), key=lambda metric: metric.name)
+
+    def reset(self):
+        """Clears every metric's values, e.g. between benchmark phases."""
+        for metric in self.metrics():
+            metric.reset()
+
+    def render_prometheus(self):
+        """Renders every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """
+        Formats a compact human-readable dump: counter and gauge values, and
+        for histograms the count, mean and estimated p50/p99.
+        """
+        lines = []
+        for metric in self.metrics():
+            if isinstance(metric, Histogram):
+                for labels in metric.label_sets():
+                    snapshot = metric.snapshot(**labels)
+                    mean = snapshot['sum'] / snapshot['count']
+                    lines.append(
+                        f"{metric.name}{format_labels(labels)} count={snapshot['count']} "
+                        f"mean={mean * 1000:.2f}ms p50<={metric._quantile(snapshot, 0.5) * 1000:g}ms "
+                        f"p99<={metric._quantile(snapshot, 0.99) * 1000:g}ms"
+                    )
+            else:
+                for name, labels, value in metric.samples():
+                    lines.append(f"{name}{format_labels(labels)} {value}")
+        return "\n".join(lines)
+
+REGISTRY = MetricsRegistry()
+
+def counter(name, documentation, labelnames=()):
+    """Returns the process-wide counter `name`, creating it on first use."""
+    return REGISTRY.counter(name, documentation, labelnames)
+
+def gauge(name, documentation, labelnames=()):
+    """Returns the process-wide gauge `name`, creating it on first use."""
+    return REGISTRY.gauge(name, documentation, labelnames)
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    """Returns the process-wide histogram `name`, creating it on first use."""
+    return REGISTRY.histogram(name, documentation, labelnames, buckets)
+
+class MetricsServer:
+    """Serves the registry in the Prometheus text format at http://host:port/metrics."""
+    def __init__(self, host='127.0.0.1', port=0, registry=REGISTRY):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name='metrics-server', daemon=True)
+        self._thread.start()
+        logger.info("Serving metrics on http://%s:%d/metrics", *self.server.server_address[:2])
+
+    def close(self):
+        if self._thread is not None:
+            self.server.shutdown()
+            self._thread.join()
+        self.server.server_close()
+
+async def dump_metrics_periodically(interval, registry=REGISTRY):
+    """Logs the registry summary every `interval` seconds until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        logger.info("Metrics:\n%s", registry.summary())
@@ -1,17 +1,26 @@
 import unittest
 import configparser
-from src.analysis.analyzer import is_coin_blacklisted, is_developer_blacklisted, is_coin_filtered, has_fake_volume_custom, get_rugcheck_data, is_contract_good, has_bundled_supply
+import os
+import requests
+from src.analysis.analyzer import is_coin_blacklisted, is_developer_blacklisted, is_coin_filtered, has_fake_volume_custom, get_rugcheck_data, is_contract_good, has_bundled_supply, analyze_all_coins, iter_coin_chunks, perform_rugcheck, RUGCHECK_HEADERS
+from src.analysis.vectorized import load_numeric_columns
+from src.analysis.detectors import MomentumScorer, RugPullDetector, set_momentum_scorer, set_rug_pull_detector
+from src.config import Settings
+from src.data.database import get_db_connection, create_tables
+from src.data.fetcher import store_dexscreener_pairs
+from src.governor import Governor
 from unittest.mock import patch, MagicMock
 
 class TestAnalyzer(unittest.TestCase):
 
     def setUp(self):
         """Set up a mock config object for testing."""
-        self.config = configparser.ConfigParser()
-        self.config['CoinBlacklist'] = {'tokens': 'addr1,addr2'}
-        self.config['DeveloperBlacklist'] = {'developers': 'dev1,dev2'}
-        self.config['Filters'] = {'min_market_cap': '1000', 'min_liquidity': '5000'}
-        self.config['FakeVolume'] = {'max_volume_to_liquidity_ratio': '3', 'min_txns_24h': '10', 'max_buy_sell_ratio': '10'}
+        parser = configparser.ConfigParser()
+        parser['CoinBlacklist'] = {'tokens': 'addr1,addr2'}
+        parser['DeveloperBlacklist'] = {'developers': 'dev1,dev2'}
+        parser['Filters'] = {'min_market_cap': '1000', 'min_liquidity': '5000'}
+        parser['FakeVolume'] = {'max_volume_to_liquidity_ratio': '3', 'min_txns_24h': '10', 'max_buy_sell_ratio': '10'}
+        self.config = Settings.from_parser(parser)
 
     def test_is_coin_blacklisted(self):
         """Test the is_coin_blacklisted function."""
@@ -67,7 +76,36 @@ class TestAnalyzer(unittest.TestCase):
 
         result = get_rugcheck_data("test_address")
         self.assertEqual(result, mock_rugcheck_data)
-        mock_perform_rugcheck.assert_called_once_with("test_address")
+        mock_perform_rugcheck.assert_called_once_with("test_address", None)
+
+    @patch('requests.get')
+    def test_perform_rugcheck(self, mock_get):
+        """Test that rugcheck reports are wrapped with a verdict and failures raise instead of exiting."""
+        governor = Governor(self.config, sleep=lambda seconds: None)
+        mock_get.return_value = MagicMock(status_code=200)
+        mock_get.return_value.json.return_value = {'score': 6000, 'rugged': False, 'risks': [{'name': 'Single holder ownership'}]}
+
+        report = perform_rugcheck("mint1", governor)
+
+        mock_get.assert_called_once_with("https://api.rugcheck.xyz/v1/tokens/mint1/report", headers=RUGCHECK_HEADERS)
+        self.assertEqual((report.token_address, report.result, report.rugged), ("mint1", 'Danger', False))
+        self.assertTrue(has_bundled_supply(report))
+
+        # A partial report degrades to not rugged, with no risks, instead of raising.
+        mock_get.return_value.json.return_value = {'score': 10, 'risks': [{'level': 'warn'}]}
+        report = perform_rugcheck("mint1", governor)
+        self.assertEqual((report.result, report.rugged), ('Good', False))
+        self.assertTrue(is_contract_good(report))
+        self.assertFalse(has_bundled_supply(report))
+        mock_get.return_value.json.return_value = {}
+        report = perform_rugcheck("mint1", governor)
+        self.assertEqual((report.result, report.rugged, report.risks), (None, False, []))
+
+        mock_get.return_value = MagicMock(status_code=404)
+        mock_get.return_value.raise_for_status.side_effect = requests.exceptions.HTTPError("404")
+        with self.assertRaises(requests.exceptions.HTTPError):
+            perform_rugcheck("mint1", governor)
+        self.assertIsNone(get_rugcheck_data("mint1", governor=governor))
 
     def test_is_contract_good(self):
         """Test the is_contract_good function."""
@@ -101,5 +139,193 @@ class TestAnalyzer(unittest.TestCase):
         no_risks_data = MagicMock(risks=[])
         self.assertFalse(has_bundled_supply(no_risks_data))
 
+class TestAnalyzeAllCoins(unittest.TestCase):
+
+    test_db_name = "test_analyzer.db"
+
+    def setUp(self):
+        """Set up a test database with a few coins."""
+        self.conn = get_db_connection(self.test_db_name)
+        create_tables(self.conn)
+        for i in range(5):
+            self.conn.execute(
+                "INSERT INTO coins (mint_address, symbol, market_cap, liquidity, volume_h24, txns_h24_buys, txns_h24_sells) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (f"mint{i}", f"C{i}", 20000, 10000, 20000, 50, 45)
+            )
+        self.conn.commit()
+
+    def tearDown(self):
+        """Tear down the test database."""
+        self.conn.close()
+        os.remove(self.test_db_name)
+
+    @patch('src.analysis.analyzer.get_rugcheck_data')
+    def test_analyze_all_coins_concurrently(self, mock_get_rugcheck_data):
+        """Test that every coin is looked up once and flagged as before."""
+        risk = MagicMock()
+        risk.name = "Single holder ownership"
+        mock_get_rugcheck_data.return_value = MagicMock(rugged=False, result='Good', risks=[risk])
+
+        analyzed = analyze_all_coins(self.conn, max_workers=4, requests_per_second=1000)
+
+        self.assertEqual(analyzed, 5)
+        looked_up = sorted(call.args[0] for call in mock_get_rugcheck_data.call_args_list)
+        self.assertEqual(looked_up, [f"mint{i}" for i in range(5)])
+        flagged = self.conn.execute("SELECT COUNT(*) FROM coins WHERE bundled_supply = TRUE").fetchone()[0]
+        self.assertEqual(flagged, 5)
+
+    @patch('src.analysis.analyzer.perform_rugcheck')
+    def test_rerun_within_ttl_makes_no_external_calls(self, mock_perform_rugcheck):
+        """Test that a second sweep is served entirely from the rugcheck cache."""
+        mock_perform_rugcheck.return_value = MagicMock(rugged=False, result='Good', risks=[])
+
+        analyze_all_coins(self.conn, max_workers=2, requests_per_second=1000)
+        self.assertEqual(mock_perform_rugcheck.call_count, 5)
+
+        analyze_all_coins(self.conn, max_workers=2, requests_per_second=1000)
+        self.assertEqual(mock_perform_rugcheck.call_count, 5)
+
+    @patch('src.analysis.analyzer.get_rugcheck_data')
+    def test_incremental_analysis(self, mock_get_rugcheck_data):
+        """Test that incremental sweeps only pick up new, changed or stale coins."""
+        mock_get_rugcheck_data.return_value = MagicMock(rugged=False, result='Good', risks=[])
+
+        self.assertEqual(analyze_all_coins(self.conn, requests_per_second=1000, incremental=True), 5)
+        self.assertEqual(analyze_all_coins(self.conn, requests_per_second=1000, incremental=True), 0)
+
+        # mint0's market data changed, mint1 is due for a recheck and mint5 is new.
+        self.conn.execute("UPDATE coins SET analysis_status = 'pending' WHERE mint_address = 'mint0'")
+        self.conn.execute("UPDATE coins SET next_analysis_at = datetime('now', '-1 minute') WHERE mint_address = 'mint1'")
+        self.conn.execute("INSERT INTO coins (mint_address, symbol) VALUES ('mint5', 'C5')")
+        self.conn.commit()
+
+        self.assertEqual(analyze_all_coins(self.conn, requests_per_second=1000, incremental=True), 3)
+        self.assertEqual(analyze_all_coins(self.conn, requests_per_second=1000, incremental=False), 6)
+
+    @patch('src.analysis.analyzer.get_rugcheck_data')
+    def test_local_checks_run_before_rugcheck(self, mock_get_rugcheck_data):
+        """Test that coins dropped by local checks are never looked up on rugcheck."""
+        mock_get_rugcheck_data.return_value = MagicMock(rugged=False, result='Good', risks=[])
+        self.conn.execute("UPDATE coins SET liquidity = 100 WHERE mint_address IN ('mint1', 'mint3')")
+        self.conn.commit()
+
+        self.assertEqual(analyze_all_coins(self.conn, requests_per_second=1000, incremental=False), 5)
+
+        looked_up = sorted(call.args[0] for call in mock_get_rugcheck_data.call_args_list)
+        self.assertEqual(looked_up, ['mint0', 'mint2', 'mint4'])
+
+    @patch('src.analysis.analyzer.load_numeric_columns', wraps=load_numeric_columns)
+    @patch('src.analysis.analyzer.get_rugcheck_data')
+    def test_local_rules_share_one_column_load(self, mock_get_rugcheck_data, mock_load_numeric_columns):
+        """Test that the filters and fake volume rules load the numeric columns once per chunk."""
+        mock_get_rugcheck_data.return_value = MagicMock(rugged=False, result='Good', risks=[])
+        self.conn.execute("UPDATE coins SET liquidity = 100 WHERE mint_address = 'mint1'")
+        self.conn.execute("UPDATE coins SET txns_h24_buys = 1, txns_h24_sells = 1 WHERE mint_address = 'mint3'")
+        self.conn.commit()
+
+        analyze_all_coins(self.conn, requests_per_second=1000, incremental=False, chunk_size=5)
+
+        self.assertEqual(mock_load_numeric_columns.call_count, 1)
+        looked_up = sorted(call.args[0] for call in mock_get_rugcheck_data.call_args_list)
+        self.assertEqual(looked_up, ['mint0', 'mint2', 'mint4'])
+
+    def test_iter_coin_chunks(self):
+        """Test that coins are streamed in fixed-size chunks."""
+        chunks = list(iter_coin_chunks(self.conn, False, 2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertEqual([coin['mint_address'] for chunk in chunks for coin in chunk], [f"mint{i}" for i in range(5)])
+
+    @patch('src.analysis.analyzer.get_rugcheck_data')
+    def test_chunked_updates_keep_flags(self, mock_get_rugcheck_data):
+        """Test that skipped coins the scorer has not seen keep their verdict flags and the others get them set."""
+        mock_get_rugcheck_data.side_effect = lambda mint, *args: (
+            None if mint == 'mint0' else MagicMock(rugged=False, result='Good', risks=[])
+        )
+        self.conn.execute("UPDATE coins SET pump = TRUE")
+        self.conn.commit()
+        scorer = MomentumScorer()
+        for i in range(1, 5):
+            scorer.update(f"mint{i}", 1.0, 20000, 20000, 50, 45, timestamp=0)
+        set_momentum_scorer(scorer)
+        self.addCleanup(set_momentum_scorer, None)
+
+        analyze_all_coins(self.conn, requests_per_second=1000, incremental=False, chunk_size=2)
+
+        rows = self.conn.execute("SELECT mint_address, pump, last_analyzed_timestamp FROM coins ORDER BY id").fetchall()
+        self.assertEqual([row['pump'] for row in rows], [1, 0, 0, 0, 0])
+        self.assertTrue(all(row['last_analyzed_timestamp'] for row in rows))
+
+    @patch('src.analysis.analyzer.get_rugcheck_data')
+    def test_pump_flag_set_on_eliminated_coins(self, mock_get_rugcheck_data):
+        """Test that a pump is flagged even though its volume trips the fake volume rule."""
+        mock_get_rugcheck_data.return_value = MagicMock(rugged=False, result='Good', risks=[])
+        parser = configparser.ConfigParser()
+        parser['FakeVolume'] = {'max_volume_to_liquidity_ratio': '10'}
+        settings = Settings.from_parser(parser)
+        self.conn.execute("UPDATE coins SET volume_h24 = 500000 WHERE mint_address = 'mint2'")
+        self.conn.commit()
+        scorer = MomentumScorer(min_observations=2, pump_price_z=0, pump_volume_z=0, pump_min_imbalance=0)
+        for timestamp in (0, 60):
+            scorer.update("mint2", 1.0, 20000, 500000, 50, 45, timestamp=timestamp)
+        set_momentum_scorer(scorer)
+        self.addCleanup(set_momentum_scorer, None)
+
+        analyze_all_coins(self.conn, requests_per_second=1000, incremental=False, settings=settings)
+
+        self.assertNotIn('mint2', [call.args[0] for call in mock_get_rugcheck_data.call_args_list])
+        rows = self.conn.execute("SELECT pump FROM coins ORDER BY id").fetchall()
+        self.assertEqual([row['pump'] for row in rows], [0, 0, 1, 0, 0])
+
+    @patch('src.analysis.analyzer.get_rugcheck_data')
+    def test_rug_pull_flag_from_detector(self, mock_get_rugcheck_data):
+        """Test that coins flagged by the rug pull detector get rug_pull set."""
+        mock_get_rugcheck_data.return_value = MagicMock(rugged=False, result='Good', risks=[])
+        detector = RugPullDetector(min_drop_seconds=0)
+        detector.update('mint1', 1.0, 50000, timestamp=0)
+        detector.update('mint1', 1.0, 100, timestamp=10)
+        detector.update('mint2', 1.0, 50000, timestamp=0)
+        set_rug_pull_detector(detector)
+        self.addCleanup(set_rug_pull_detector, None)
+
+        analyze_all_coins(self.conn, requests_per_second=1000, incremental=False)
+
+        rows = self.conn.execute("SELECT rug_pull FROM coins ORDER BY id").fetchall()
+        self.assertEqual([row['rug_pull'] for row in rows], [0, 1, 0, 0, 0])
+
+    @patch('src.analysis.analyzer.get_rugcheck_data')
+    def test_rug_pull_flag_survives_filters_and_cold_detector(self, mock_get_rugcheck_data):
+        """Test that a rug pull flagged at ingest is stored even when the coin fails the filters, and stays set."""
+        mock_get_rugcheck_data.return_value = MagicMock(rugged=False, result='Good', risks=[])
+        parser = configparser.ConfigParser()
+        parser['Filters'] = {'min_liquidity': '5000'}
+        parser['RugPull'] = {'min_drop_seconds': '0'}
+        settings = Settings.from_parser(parser)
+        set_rug_pull_detector(RugPullDetector.from_settings(settings))
+        self.addCleanup(set_rug_pull_detector, None)
+
+        def pair(liquidity):
+            return {
+                "baseToken": {"address": "mint1", "name": "mint1", "symbol": "C1"},
+                "marketCap": 20000, "liquidity": {"usd": liquidity}, "priceUsd": "1.0",
+                "volume": {"h24": 20000}, "txns": {"h24": {"buys": 50, "sells": 45}},
+            }
+        store_dexscreener_pairs([pair(50000)], self.conn, settings)
+        store_dexscreener_pairs([pair(100)], self.conn, settings)
+        rug_pull = lambda: self.conn.execute("SELECT rug_pull FROM coins WHERE mint_address = 'mint1'").fetchone()[0]
+        self.assertEqual(rug_pull(), 1)
+
+        analyze_all_coins(self.conn, requests_per_second=1000, incremental=False, settings=settings)
+        self.assertEqual(rug_pull(), 1)
+        self.assertNotIn('mint1', [call.args[0] for call in mock_get_rugcheck_data.call_args_list])
+
+        # A restarted detector has not seen the drop and reports False; the stored flag is kept.
+        detector = RugPullDetector.from_settings(settings)
+        detector.update('mint1', 1.0, 50000)
+        set_rug_pull_detector(detector)
+        self.conn.execute("UPDATE coins SET liquidity = 50000 WHERE mint_address = 'mint1'")
+        self.conn.commit()
+        analyze_all_coins(self.conn, requests_per_second=1000, incremental=False, settings=settings)
+        self.assertEqual(rug_pull(), 1)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+import requests
+from benchmarks.run import compare_to_baseline, run_benchmarks
+from benchmarks.servers import DexscreenerStub, make_fake_rugcheck
+from src.config import Settings, set_settings
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_compare_to_baseline(self):
+        """Test that slower throughput and higher memory beyond the tolerance are regressions."""
+        baseline = {'ingest_msgs_per_sec': 100, 'upsert_rows_per_sec': 100, 'analyzer_coins_per_sec': 100, 'peak_rss_mb': 100}
+        results = {'ingest_msgs_per_sec': 70, 'upsert_rows_per_sec': 90, 'analyzer_coins_per_sec': 200, 'peak_rss_mb': 130}
+        regressed = {row[0]: row[4] for row in compare_to_baseline(results, baseline, tolerance=0.2)}
+        self.assertEqual(regressed, {
+            'ingest_msgs_per_sec': True, 'upsert_rows_per_sec': False,
+            'analyzer_coins_per_sec': False, 'peak_rss_mb': True,
+        })
+
+    def test_dexscreener_stub(self):
+        """Test that the stub serves searches and multi-token lookups."""
+        with DexscreenerStub(pairs_per_query=3) as stub:
+            search = requests.get(f"{stub.api_url}dex/search?q=PEPE").json()
+            tokens = requests.get(f"{stub.api_url}dex/tokens/a,b").json()
+        self.assertEqual(len(search['pairs']), 3)
+        self.assertEqual([pair['baseToken']['address'] for pair in tokens['pairs']], ['a', 'b'])
+
+    def test_fake_rugcheck(self):
+        """Test that the fake rugcheck reports every n-th lookup as dangerous."""
+        fake_rugcheck = make_fake_rugcheck(danger_every=2)
+        self.assertEqual([fake_rugcheck(f"mint{i}").result for i in range(4)], ['Good', 'Danger', 'Good', 'Danger'])
+
+    def test_run_benchmarks(self):
+        """Test a tiny end-to-end benchmark run."""
+        self.addCleanup(set_settings, None)
+        results = run_benchmarks(Settings(), rows=200, events=50, event_rate=0, queries=2, pairs_per_query=5, rugcheck_latency=0)
+        self.assertEqual(set(results), {'ingest_msgs_per_sec', 'upsert_rows_per_sec', 'analyzer_coins_per_sec', 'peak_rss_mb'})
+        self.assertTrue(all(value > 0 for value in results.values()))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+import configparser
+import os
+from src.config import Settings, load_settings, parse_list
+
+class TestConfig(unittest.TestCase):
+
+    test_list_file = "test_blacklist.txt"
+
+    def tearDown(self):
+        """Remove the blacklist file if a test created one."""
+        if os.path.exists(self.test_list_file):
+            os.remove(self.test_list_file)
+
+    def test_parse_list_strips_quotes_and_whitespace(self):
+        """Test that a quoted, spaced list is normalized into a set."""
+        self.assertEqual(parse_list('"addr1, addr2 ,,addr3"'), frozenset({'addr1', 'addr2', 'addr3'}))
+        self.assertEqual(parse_list(''), frozenset())
+
+    def test_shipped_config(self):
+        """Test that the shipped config file parses into typed values."""
+        settings = load_settings()
+        self.assertIsInstance(settings.filters.min_market_cap, float)
+        self.assertIsInstance(settings.fake_volume.min_txns_24h, int)
+        self.assertIn('token_address_1', settings.blacklists.tokens)
+        self.assertIn('developer_address_2', settings.blacklists.developers)
+
+    def test_blacklist_file(self):
+        """Test that blacklist entries can be loaded from an external file."""
+        with open(self.test_list_file, 'w') as f:
+            f.write("# known ruggers\nfile_addr1\n\nfile_addr2  # serial\n")
+        parser = configparser.ConfigParser()
+        parser['CoinBlacklist'] = {'tokens': 'addr1', 'tokens_file': self.test_list_file}
+
+        settings = Settings.from_parser(parser)
+        self.assertEqual(settings.blacklists.tokens, frozenset({'addr1', 'file_addr1', 'file_addr2'}))
+
+    def test_missing_sections_use_defaults(self):
+        """Test that sections missing from the config fall back to defaults."""
+        settings = Settings.from_parser(configparser.ConfigParser())
+        self.assertEqual(settings.database.db_name, 'coins.db')
+        self.assertEqual(settings.blacklists.tokens, frozenset())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+import unittest
+import asyncio
+import configparser
+import os
+import signal
+import time
+from src.config import Settings
+from src.daemon import Daemon, Scheduler, run_maintenance, vacuum
+from src.data.database import Database, close_databases, create_tables, get_db_connection
+from src.data.snapshots import HOURLY_RESOLUTION, record_snapshots
+from unittest.mock import MagicMock, patch
+
+class TestScheduler(unittest.TestCase):
+
+    def test_tasks_run_on_their_own_intervals(self):
+        """Test that every task runs at its own interval until the scheduler stops."""
+        async def scenario():
+            scheduler = Scheduler()
+            fast, slow = [], []
+
+            async def run_fast():
+                fast.append(time.monotonic())
+
+            async def run_slow():
+                slow.append(time.monotonic())
+
+            scheduler.add('fast', 0.02, run_fast)
+            scheduler.add('slow', 0.1, run_slow)
+            self.assertIsNone(scheduler.add('disabled', 0, run_slow))
+            asyncio.get_running_loop().call_later(0.25, scheduler.stop)
+            await scheduler.run()
+            return fast, slow
+
+        fast, slow = asyncio.run(scenario())
+        self.assertGreaterEqual(len(fast), 8)
+        self.assertIn(len(slow), (2, 3))
+
+    def test_overrunning_task_skips_ticks(self):
+        """Test that a run longer than the interval is never overlapped and skips the missed ticks."""
+        async def scenario():
+            scheduler = Scheduler()
+            running = 0
+            overlaps = 0
+
+            async def run_slow():
+                nonlocal running, overlaps
+                running += 1
+                overlaps += running > 1
+                await asyncio.sleep(0.065)
+                running -= 1
+
+            task = scheduler.add('slow', 0.02, run_slow)
+            asyncio.get_running_loop().call_later(0.2, scheduler.stop)
+            await scheduler.run()
+            return task, overlaps
+
+        task, overlaps = asyncio.run(scenario())
+        self.assertEqual(overlaps, 0)
+        self.assertIn(task.runs, (3, 4))
+        self.assertGreaterEqual(task.skipped, 2 * (task.runs - 1))
+
+    def test_failed_run_does_not_stop_the_task(self):
+        """Test that a failing task is run again at its next tick."""
+        async def scenario():
+            scheduler = Scheduler()
+
+            async def fail():
+                raise RuntimeError("boom")
+
+            task = scheduler.add('failing', 0.02, fail)
+            asyncio.get_running_loop().call_later(0.1, scheduler.stop)
+            await scheduler.run()
+            return task
+
+        task = asyncio.run(scenario())
+        self.assertGreaterEqual(task.failures, 3)
+        self.assertEqual(task.failures, task.runs)
+
+    def test_stop_waits_for_runs_in_flight(self):
+        """Test that stopping lets the current run finish and starts no new one."""
+        async def scenario():
+            scheduler = Scheduler()
+            finished = []
+
+            async def work():
+                await asyncio.sleep(0.1)
+                finished.append(True)
+
+            task = scheduler.add('work', 0.01, work)
+            asyncio.get_running_loop().call_later(0.05, scheduler.stop)
+            await scheduler.run()
+            return task, finished
+
+        task, finished = asyncio.run(scenario())
+        self.assertEqual(task.runs, 1)
+        self.assertEqual(finished, [True])
+
+class TestDaemon(unittest.TestCase):
+
+    test_db_name = "test_daemon.db"
+
+    def setUp(self):
+        """Set up a test database with a few coins and old snapshots."""
+        self.conn = get_db_connection(self.test_db_name)
+        create_tables(self.conn)
+        for i in range(3):
+            self.conn.execute(
+                "INSERT INTO coins (mint_address, symbol, market_cap, liquidity, volume_h24, txns_h24_buys, txns_h24_sells) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (f"mint{i}", f"C{i}", 20000, 10000, 20000, 50, 45)
+            )
+        old = int(time.time()) - 3 * 86400
+        old -= old % 3600
+        for minute in range(3):
+            record_snapshots(self.conn, [("mint0", 1.0 + minute, 10.0, 100.0, 5.0, 1, 1)], timestamp=old + minute * 60)
+        self.conn.commit()
+
+    def tearDown(self):
+        """Tear down the database, connections and the shared databases."""
+        self.conn.close()
+        close_databases()
+        os.remove(self.test_db_name)
+
+    def make_settings(self, **daemon):
+        parser = configparser.ConfigParser()
+        parser['database'] = {'db_name': self.test_db_name}
+        parser['Refresh'] = {'cycle_seconds': '0.05'}
+        parser['Daemon'] = {'analysis_interval_seconds': '0.05', 'maintenance_interval_seconds': '0', 'vacuum_interval_hours': '0', **daemon}
+        parser['RugcheckCache'] = {'enabled': 'false'}
+        return Settings.from_parser(parser)
+
+    def test_maintenance_applies_retention(self):
+        """Test that maintenance rolls old snapshots up and vacuuming keeps the data."""
+        database = Database(self.test_db_name)
+        try:
+            rolled_up, deleted = run_maintenance(database, self.make_settings())
+            vacuum(database)
+        finally:
+            database.close()
+
+        self.assertEqual((rolled_up, deleted), (1, 0))
+        rows = self.conn.execute("SELECT resolution, price_usd FROM market_snapshots").fetchall()
+        self.assertEqual([tuple(row) for row in rows], [(HOURLY_RESOLUTION, 3.0)])
+
+    @patch('src.data.refresher.fetch_dexscreener_tokens', return_value=[])
+    @patch('src.analysis.workers.get_rugcheck_data')
+    def test_daemon_runs_tasks_until_sigterm(self, mock_get_rugcheck_data, mock_fetch_tokens):
+        """Test that the daemon refreshes and analyzes coins, then stops gracefully on SIGTERM."""
+        mock_get_rugcheck_data.return_value = MagicMock(rugged=False, result='Good', risks=[])
+        daemon = Daemon(self.make_settings(), pump_fun=False)
+
+        async def scenario():
+            asyncio.get_running_loop().call_later(0.3, os.kill, os.getpid(), signal.SIGTERM)
+            await daemon.run()
+
+        asyncio.run(scenario())
+
+        tasks = {task.name: task for task in daemon.scheduler.tasks}
+        self.assertEqual(set(tasks), {'refresh', 'analysis'})
+        self.assertGreaterEqual(tasks['analysis'].runs, 2)
+        self.assertEqual(tasks['analysis'].failures, 0)
+        self.assertTrue(mock_fetch_tokens.called)
+        self.assertEqual(daemon.worker.analyzed, 3)
+        analyzed = self.conn.execute("SELECT COUNT(*) FROM coins WHERE analysis_status = 'analyzed'").fetchone()[0]
+        self.assertEqual(analyzed, 3)
+        # The handler is removed again once the daemon has stopped.
+        self.assertEqual(signal.getsignal(signal.SIGTERM), signal.SIG_DFL)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,8 @@
 import unittest
 import sqlite3
 import os
-from src.data.database import get_db_connection, create_tables
+import threading
+from src.data.database import get_db_connection, create_tables, schema_version, Database, MIGRATIONS
 
 class TestDatabase(unittest.TestCase):
 
@@ -29,5 +30,116 @@ class TestDatabase(unittest.TestCase):
         table_exists = cursor.fetchone()
         self.assertIsNotNone(table_exists)
 
+    def test_pragmas(self):
+        """Test that connections use WAL and the configured pragmas."""
+        self.assertEqual(self.conn.execute("PRAGMA journal_mode").fetchone()[0], 'wal')
+        self.assertEqual(self.conn.execute("PRAGMA synchronous").fetchone()[0], 1)  # NORMAL
+        self.assertEqual(self.conn.execute("PRAGMA busy_timeout").fetchone()[0], 5000)
+
+    def test_migrations_upgrade_an_old_database(self):
+        """Test that an old coins table gets the analysis state columns with its state kept."""
+        self.conn.close()
+        os.remove(self.test_db_name)
+        self.conn = get_db_connection(self.test_db_name)
+        self.conn.execute("CREATE TABLE coins (id INTEGER PRIMARY KEY AUTOINCREMENT, mint_address TEXT UNIQUE NOT NULL, "
+                          "last_updated_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, source TEXT, "
+                          "rug_pull BOOLEAN DEFAULT FALSE, pump BOOLEAN DEFAULT FALSE, tier1 BOOLEAN DEFAULT FALSE, "
+                          "bundled_supply BOOLEAN DEFAULT FALSE)")
+        self.conn.execute("INSERT INTO coins (mint_address) VALUES ('new')")
+        self.conn.commit()
+        create_tables(self.conn)
+        self.assertEqual(schema_version(self.conn), len(MIGRATIONS))
+        self.conn.execute("INSERT INTO coins (mint_address, last_analyzed_timestamp) VALUES ('analyzed', datetime('now', '+1 minute'))")
+        self.conn.commit()
+
+        # Running the migrations again is a no-op.
+        create_tables(self.conn)
+        self.assertEqual(schema_version(self.conn), len(MIGRATIONS))
+        status = dict(self.conn.execute("SELECT mint_address, analysis_status FROM coins").fetchall())
+        self.assertEqual(status, {'new': 'pending', 'analyzed': 'pending'})
+
+    def test_analysis_state_backfill(self):
+        """Test that coins analyzed before the migration are scheduled for a recheck."""
+        self.conn.execute("PRAGMA user_version = 1")
+        self.conn.execute("INSERT INTO coins (mint_address, last_updated_timestamp, last_analyzed_timestamp) "
+                          "VALUES ('fresh', '2024-01-01 00:00:00', '2024-01-02 00:00:00'), "
+                          "('changed', '2024-01-03 00:00:00', '2024-01-02 00:00:00')")
+        self.conn.commit()
+        create_tables(self.conn)
+
+        rows = {row['mint_address']: row for row in self.conn.execute("SELECT * FROM coins")}
+        self.assertEqual(rows['fresh']['analysis_status'], 'analyzed')
+        self.assertEqual(rows['fresh']['next_analysis_at'], '2024-01-03 00:00:00')
+        self.assertEqual(rows['changed']['analysis_status'], 'pending')
+
+    def test_selective_queries_use_indexes(self):
+        """Test that pending, flagged and per-source coins are found through indexes."""
+        queries = [
+            "SELECT * FROM coins WHERE analysis_status = 'pending' AND id > 0 ORDER BY id",
+            "SELECT * FROM coins WHERE rug_pull = 1 ORDER BY last_updated_timestamp DESC",
+            "SELECT * FROM coins WHERE source = 'pumpfun'",
+            "SELECT * FROM coins WHERE next_analysis_at <= datetime('now')",
+        ]
+        for query in queries:
+            plan = ' '.join(row[3] for row in self.conn.execute(f"EXPLAIN QUERY PLAN {query}"))
+            self.assertIn('USING INDEX', plan, query)
+
+class TestDatabaseManager(unittest.TestCase):
+
+    test_db_name = "test_database_manager.db"
+
+    def setUp(self):
+        """Set up a test database and a connection manager for it."""
+        conn = get_db_connection(self.test_db_name)
+        create_tables(conn)
+        conn.close()
+        self.database = Database(self.test_db_name)
+
+    def tearDown(self):
+        """Close the manager and remove the test database."""
+        self.database.close()
+        os.remove(self.test_db_name)
+
+    def test_reader_is_reused_per_thread(self):
+        """Test that each thread keeps its own read connection."""
+        self.assertIs(self.database.reader(), self.database.reader())
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(self.database.reader()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], self.database.reader())
+
+    def test_concurrent_writes_are_serialized(self):
+        """Test that writes from many threads all succeed through the shared writer."""
+        errors = []
+
+        def insert(start):
+            try:
+                for i in range(start, start + 50):
+                    with self.database.writer() as conn:
+                        conn.execute("INSERT INTO coins (mint_address) VALUES (?)", (f"mint{i}",))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=insert, args=(n * 50,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        count = self.database.reader().execute("SELECT COUNT(*) FROM coins").fetchone()[0]
+        self.assertEqual(count, 200)
+
+    def test_failed_write_is_rolled_back(self):
+        """Test that an exception inside a write transaction rolls it back."""
+        with self.assertRaises(sqlite3.IntegrityError):
+            with self.database.writer() as conn:
+                conn.execute("INSERT INTO coins (mint_address) VALUES ('mint1')")
+                conn.execute("INSERT INTO coins (mint_address) VALUES ('mint1')")
+        count = self.database.reader().execute("SELECT COUNT(*) FROM coins").fetchone()[0]
+        self.assertEqual(count, 0)
+
 if __name__ == '__main__':
     unittest.main()
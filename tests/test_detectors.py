@@ -0,0 +1,227 @@
+import unittest
+import math
+import os
+import numpy as np
+from src.analysis.detectors import MomentumScorer, RugPullDetector
+from src.data.database import get_db_connection, create_tables
+from src.data.snapshots import record_snapshots
+
+class TestRugPullDetector(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a detector that flags drops lasting a minute."""
+        self.detector = RugPullDetector(liquidity_drop_ratio=0.8, price_drop_ratio=0.9, min_peak_liquidity=1000, min_drop_seconds=60)
+
+    def test_unknown_coin(self):
+        """Test that coins never observed have no verdict."""
+        self.assertIsNone(self.detector.is_rug_pull("mint1"))
+        self.assertIsNone(self.detector.state("mint1"))
+
+    def test_liquidity_drop_must_persist(self):
+        """Test that a liquidity drop is only flagged after min_drop_seconds."""
+        self.assertFalse(self.detector.update("mint1", 1.0, 50000, timestamp=0))
+        self.assertFalse(self.detector.update("mint1", 1.0, 5000, timestamp=100))
+        self.assertEqual(self.detector.state("mint1")['seconds_since_drop'], 0)
+        self.assertFalse(self.detector.update("mint1", 1.0, 4000, timestamp=130))
+        self.assertTrue(self.detector.update("mint1", 1.0, 4000, timestamp=160))
+
+        state = self.detector.state("mint1")
+        self.assertEqual(state['peak_liquidity'], 50000)
+        self.assertAlmostEqual(state['liquidity_drawdown'], 0.92)
+        self.assertEqual(state['seconds_since_drop'], 60)
+        self.assertTrue(self.detector.is_rug_pull("mint1"))
+
+    def test_recovery_resets_drop(self):
+        """Test that a coin recovering before min_drop_seconds is not flagged."""
+        self.detector.update("mint1", 1.0, 50000, timestamp=0)
+        self.detector.update("mint1", 1.0, 5000, timestamp=10)
+        self.detector.update("mint1", 1.0, 45000, timestamp=20)
+        self.assertIsNone(self.detector.state("mint1")['seconds_since_drop'])
+        self.assertFalse(self.detector.update("mint1", 1.0, 45000, timestamp=200))
+
+    def test_price_drop(self):
+        """Test that a price collapse is flagged even when liquidity holds."""
+        self.detector.update("mint1", 2.0, 50000, timestamp=0)
+        self.detector.update("mint1", 0.1, 50000, timestamp=10)
+        self.assertTrue(self.detector.update("mint1", 0.1, 50000, timestamp=70))
+
+    def test_small_coins_and_missing_data_are_ignored(self):
+        """Test that coins below min_peak_liquidity and missing values do not flag."""
+        self.detector.update("small", 1.0, 500, timestamp=0)
+        self.assertFalse(self.detector.update("small", 0.01, 10, timestamp=500))
+
+        self.detector.update("mint1", 1.0, 50000, timestamp=0)
+        self.assertFalse(self.detector.update("mint1", None, None, timestamp=500))
+        self.assertEqual(self.detector.state("mint1")['liquidity_drawdown'], 0)
+
+    def test_flag_is_sticky(self):
+        """Test that a flagged coin stays flagged after liquidity returns."""
+        self.detector.update("mint1", 1.0, 50000, timestamp=0)
+        self.detector.update("mint1", 1.0, 100, timestamp=10)
+        self.detector.update("mint1", 1.0, 100, timestamp=100)
+        self.assertTrue(self.detector.update("mint1", 1.0, 60000, timestamp=200))
+
+    def test_update_many_returns_newly_flagged(self):
+        """Test that a batch reports only coins flagged by that batch."""
+        self.detector.update_many([("mint1", 1.0, 50000), ("mint2", 1.0, 50000)], timestamp=0)
+        self.detector.update_many([("mint1", 1.0, 100), ("mint2", 1.0, 50000)], timestamp=10)
+        self.assertEqual(self.detector.update_many([("mint1", 1.0, 100), ("mint2", 1.0, 50000)], timestamp=100), ["mint1"])
+        self.assertEqual(self.detector.update_many([("mint1", 1.0, 100)], timestamp=200), [])
+        self.assertEqual(len(self.detector), 2)
+
+class TestRugPullDetectorWarmup(unittest.TestCase):
+
+    test_db_name = "test_detectors.db"
+
+    def setUp(self):
+        """Set up a test database with a rugged coin's snapshots."""
+        self.conn = get_db_connection(self.test_db_name)
+        create_tables(self.conn)
+        self.conn.execute("INSERT INTO coins (mint_address, symbol) VALUES (?, ?)", ("mint1", "RUG"))
+        record_snapshots(self.conn, [("mint1", 1.0, 50000, 100000, 0, 0, 0)], timestamp=0)
+        record_snapshots(self.conn, [("mint1", 1.0, 100, 100000, 0, 0, 0)], timestamp=600)
+        record_snapshots(self.conn, [("mint1", 1.0, 100, 100000, 0, 0, 0)], timestamp=1200)
+        self.conn.commit()
+
+    def tearDown(self):
+        """Tear down the test database."""
+        self.conn.close()
+        os.remove(self.test_db_name)
+
+    def test_warm_from_snapshots(self):
+        """Test that replaying snapshots rebuilds the rolling state."""
+        detector = RugPullDetector(min_drop_seconds=60)
+        self.assertEqual(detector.warm_from_snapshots(self.conn), 3)
+        self.assertTrue(detector.is_rug_pull("mint1"))
+
+    def test_warm_from_snapshots_since(self):
+        """Test that only snapshots after `since` are replayed."""
+        detector = RugPullDetector(min_drop_seconds=60)
+        self.assertEqual(detector.warm_from_snapshots(self.conn, since=600), 2)
+        self.assertFalse(detector.is_rug_pull("mint1"))
+
+class TestMomentumScorer(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a scorer with a one-minute half-life and a one-hour tier 1 band."""
+        self.scorer = MomentumScorer(
+            halflife_seconds=60, min_observations=5, pump_price_z=3, pump_volume_z=2, pump_min_imbalance=0.1,
+            tier1_min_market_cap=1000000, tier1_max_market_cap=0, tier1_min_seconds=3600
+        )
+
+    def feed_steady(self, mint, count=20, market_cap=50000):
+        """Feeds a noisy but flat price and volume history, one minute apart."""
+        for i in range(count):
+            wobble = 1 + 0.01 * (-1) ** i
+            self.scorer.update(mint, 1.0 * wobble, market_cap, 10000 * wobble, 55, 45, timestamp=i * 60)
+
+    def test_unknown_coin(self):
+        """Test that coins never observed have no verdict."""
+        self.assertEqual(self.scorer.score("mint1"), (None, None))
+        self.assertIsNone(self.scorer.state("mint1"))
+
+    def test_ewma_tracks_mean(self):
+        """Test that the weighted means follow the observations."""
+        self.feed_steady("mint1")
+        state = self.scorer.state("mint1")
+        self.assertEqual(state['observations'], 20)
+        self.assertAlmostEqual(state['price_mean'], 1.0, places=2)
+        self.assertAlmostEqual(state['imbalance_mean'], 0.1)
+        self.assertGreater(state['price_var'], 0)
+
+    def test_pump_on_price_and_volume_spike(self):
+        """Test that a spike in price and volume with net buying is a pump."""
+        self.feed_steady("mint1")
+        self.assertEqual(self.scorer.score("mint1"), (False, False))
+        self.scorer.update("mint1", 2.0, 100000, 50000, 90, 10, timestamp=20 * 60)
+        self.assertEqual(self.scorer.score("mint1"), (True, False))
+
+    def test_no_pump_before_min_observations(self):
+        """Test that a coin is not scored before it has enough history."""
+        self.feed_steady("mint1", count=3)
+        self.scorer.update("mint1", 2.0, 100000, 50000, 90, 10, timestamp=180)
+        self.assertEqual(self.scorer.score("mint1"), (False, False))
+
+    def test_tier1_needs_sustained_band(self):
+        """Test that tier 1 requires the market cap to stay in the band."""
+        for minute in range(0, 61, 10):
+            self.scorer.update("mint1", 1.0, 2000000, 10000, 50, 50, timestamp=minute * 60)
+        self.assertTrue(self.scorer.score("mint1")[1])
+
+        for minute in range(0, 61, 10):
+            market_cap = 10000 if minute == 30 else 2000000
+            self.scorer.update("mint2", 1.0, market_cap, 10000, 50, 50, timestamp=minute * 60)
+        self.assertFalse(self.scorer.score("mint2")[1])
+
+    def test_score_all(self):
+        """Test that all tracked coins are scored in one batch."""
+        self.feed_steady("steady")
+        self.feed_steady("pumped")
+        self.scorer.update("pumped", 2.0, 100000, 50000, 90, 10, timestamp=20 * 60)
+        mints, pump, tier1 = self.scorer.score_all()
+        self.assertEqual(dict(zip(mints, pump.tolist())), {"steady": False, "pumped": True})
+        self.assertFalse(tier1.any())
+
+        mints, pump, tier1 = self.scorer.score_all(["pumped", "unknown", "steady"])
+        self.assertEqual(dict(zip(mints, pump.tolist())), {"pumped": True, "steady": False})
+        self.assertEqual(len(self.scorer.score_all([])[0]), 0)
+
+    def test_growth_beyond_capacity(self):
+        """Test that the state grows past its initial capacity."""
+        scorer = MomentumScorer(capacity=2)
+        for i in range(5):
+            scorer.update(f"mint{i}", 1.0, 1000, 1000, 1, 1, timestamp=0)
+        self.assertEqual(len(scorer), 5)
+        self.assertEqual(scorer.state("mint4")['observations'], 1)
+
+class TestMomentumScorerPersistence(unittest.TestCase):
+
+    test_db_name = "test_detectors.db"
+
+    def setUp(self):
+        """Set up a test database."""
+        self.conn = get_db_connection(self.test_db_name)
+        create_tables(self.conn)
+
+    def tearDown(self):
+        """Tear down the test database."""
+        self.conn.close()
+        os.remove(self.test_db_name)
+
+    def assert_same_state(self, first, second, mint):
+        np.testing.assert_array_equal(list(first.state(mint).values()), list(second.state(mint).values()))
+
+    def test_save_and_load(self):
+        """Test that saved statistics are restored by a new scorer."""
+        scorer = MomentumScorer()
+        for i in range(3):
+            scorer.update("mint1", 1.0 + i, 50000, 10000, 60, 40, timestamp=i * 60)
+        scorer.update("mint2", 1.0, 50000, 10000, None, None, timestamp=0)
+        self.assertEqual(scorer.save(self.conn), 2)
+        self.assertEqual(scorer.save(self.conn), 0)
+
+        restored = MomentumScorer()
+        self.assertEqual(restored.load(self.conn), 2)
+        self.assert_same_state(restored, scorer, "mint1")
+        self.assertTrue(math.isnan(restored.state("mint2")['imbalance_mean']))
+
+        scorer.update("mint1", 5.0, 50000, 10000, 60, 40, timestamp=180)
+        restored.update("mint1", 5.0, 50000, 10000, 60, 40, timestamp=180)
+        self.assert_same_state(restored, scorer, "mint1")
+
+    def test_load_selected_coins(self):
+        """Test that loading selected coins replaces their stale statistics only."""
+        scorer = MomentumScorer()
+        for mint in ("mint1", "mint2", "mint3"):
+            scorer.update(mint, 1.0, 50000, 10000, 60, 40, timestamp=0)
+        stale = MomentumScorer()
+        stale.update("mint1", 9.0, 50000, 10000, 60, 40, timestamp=0)
+        scorer.save(self.conn)
+
+        self.assertEqual(stale.load(self.conn, ["mint1", "mint2", "mint4"], chunk_size=2), 2)
+        self.assert_same_state(stale, scorer, "mint1")
+        self.assert_same_state(stale, scorer, "mint2")
+        self.assertIsNone(stale.state("mint3"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,188 @@
+import unittest
+import asyncio
+import configparser
+import json
+import os
+import tempfile
+import threading
+from src.analysis.analyzer import analyze_all_coins
+from src.analysis.developers import BloomFilter, DeveloperBlacklist, blacklisted_developers
+from src.config import Settings
+from src.data.database import get_db_connection, create_tables
+from src.data.pump_fetcher import PumpFunListener
+from unittest.mock import patch, MagicMock
+
+class TestBloomFilter(unittest.TestCase):
+
+    def test_no_false_negatives_and_few_false_positives(self):
+        """Test that every added item is found and unknown items rarely are."""
+        bloom = BloomFilter(10000, 0.01)
+        for i in range(10000):
+            bloom.add(f"dev{i}")
+
+        self.assertTrue(all(f"dev{i}" in bloom for i in range(10000)))
+        false_positives = sum(f"other{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+        self.assertEqual(len(bloom), 10000)
+        self.assertLess(len(bloom.bits), 10000 * 1.3)
+
+class TestDeveloperBlacklist(unittest.TestCase):
+
+    test_db_name = "test_developers.db"
+
+    def setUp(self):
+        """Set up a test database and a blacklist file."""
+        self.conn = get_db_connection(self.test_db_name, check_same_thread=False)
+        create_tables(self.conn)
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+            f.write("# Known ruggers\nfile_dev1\nfile_dev2  # second\n\n")
+        self.blacklist_file = f.name
+
+    def tearDown(self):
+        """Tear down the database, connection and blacklist file."""
+        self.conn.close()
+        os.remove(self.test_db_name)
+        os.remove(self.blacklist_file)
+
+    def make_settings(self, max_rug_pulls=2, **sections):
+        parser = configparser.ConfigParser()
+        parser['DeveloperBlacklist'] = {
+            'developers': 'inline_dev', 'developers_file': self.blacklist_file, 'max_rug_pulls': str(max_rug_pulls),
+        }
+        parser['api'] = {'pumpportal_websocket_url': 'ws://localhost:1'}
+        parser['PumpFun'] = {'batch_max_delay_ms': '10'}
+        for name, values in sections.items():
+            parser[name] = values
+        return Settings.from_parser(parser)
+
+    def test_load_imports_config_and_serial_ruggers(self):
+        """Test that configured developers and serial ruggers are blacklisted."""
+        self.conn.execute("INSERT INTO developers (address) VALUES ('rugger'), ('unlucky')")
+        self.conn.executemany("INSERT INTO coins (mint_address, developer_address, rug_pull) VALUES (?, ?, ?)", [
+            ('m1', 'rugger', 1), ('m2', 'rugger', 1), ('m3', 'rugger', 0), ('m4', 'unlucky', 1),
+        ])
+        self.conn.commit()
+        blacklist = DeveloperBlacklist(self.conn, self.make_settings())
+
+        self.assertEqual(blacklist.load(), 4)
+
+        for developer in ('inline_dev', 'file_dev1', 'file_dev2', 'rugger'):
+            self.assertIn(developer, blacklist)
+        self.assertNotIn('unlucky', blacklist)
+        self.assertNotIn(None, blacklist)
+        rug_pulls = dict(self.conn.execute("SELECT address, rug_pulls FROM developers WHERE address IN ('rugger', 'unlucky')").fetchall())
+        self.assertEqual(rug_pulls, {'rugger': 2, 'unlucky': 1})
+        self.assertEqual(blacklisted_developers(self.conn, ['rugger', 'unlucky', None]), {'rugger'})
+
+    def test_listener_rejects_blacklisted_developers(self):
+        """Test that tokens from blacklisted developers are never stored and others record their developer."""
+        analyzed = []
+
+        async def on_new_token(row, received_at):
+            analyzed.append(row[0])
+
+        async def run():
+            listener = PumpFunListener(self.make_settings(), on_new_token, target=self.conn)
+            listener.developer_blacklist.load()
+            await listener.process(json.dumps({'mint': 'bad', 'traderPublicKey': 'file_dev2'}), 0)
+            await listener.process(json.dumps({'mint': 'good', 'traderPublicKey': 'new_dev'}), 0)
+            await listener.writer.close()
+            return listener.stats()
+
+        stats = asyncio.run(run())
+
+        self.assertEqual(stats['rejected'], 1)
+        self.assertEqual(analyzed, ['good'])
+        coins = self.conn.execute("SELECT mint_address, developer_address FROM coins").fetchall()
+        self.assertEqual([tuple(coin) for coin in coins], [('good', 'new_dev')])
+        developer = self.conn.execute("SELECT coins_launched, blacklisted FROM developers WHERE address = 'new_dev'").fetchone()
+        self.assertEqual(tuple(developer), (1, 0))
+
+    def test_duplicate_tokens_do_not_count_as_launches(self):
+        """Test that replayed and duplicate tokens are not counted as new launches of their developer."""
+        async def run():
+            listener = PumpFunListener(self.make_settings(), target=self.conn)
+            listener.developer_blacklist.load()
+            for mint in ('m1', 'm2', 'm1'):
+                await listener.process(json.dumps({'mint': mint, 'traderPublicKey': 'new_dev'}), 0)
+            await listener.writer.flush()
+            await listener.process(json.dumps({'mint': 'm2', 'traderPublicKey': 'new_dev'}), 0)
+            await listener.writer.close()
+
+        asyncio.run(run())
+
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM coins").fetchone()[0], 2)
+        launched = self.conn.execute("SELECT coins_launched FROM developers WHERE address = 'new_dev'").fetchone()[0]
+        self.assertEqual(launched, 2)
+
+    def test_reload_runs_in_the_background(self):
+        """Test that a stale blacklist is reloaded without holding up messages, then swapped in."""
+        release = threading.Event()
+
+        async def run():
+            listener = PumpFunListener(self.make_settings(), target=self.conn)
+            blacklist = listener.developer_blacklist
+            blacklist.load()
+            self.conn.execute("INSERT INTO developers (address, blacklisted) VALUES ('late_dev', 1)")
+            self.conn.commit()
+            blacklist.loaded_at -= 10 ** 6
+            load = blacklist.load
+            blacklist.load = lambda: release.wait(5) and load()
+
+            await listener.process(json.dumps({'mint': 'early', 'traderPublicKey': 'late_dev'}), 0)
+            rejected_during_reload = listener.rejected
+            release.set()
+            await blacklist.wait_for_reload()
+            await listener.process(json.dumps({'mint': 'late', 'traderPublicKey': 'late_dev'}), 0)
+            await listener.writer.close()
+            return rejected_during_reload, listener.rejected
+
+        self.assertEqual(asyncio.run(run()), (0, 1))
+        coins = self.conn.execute("SELECT mint_address FROM coins").fetchall()
+        self.assertEqual([coin[0] for coin in coins], ['early'])
+
+    def test_missing_blacklist_file_stops_the_listener(self):
+        """Test that the listener fails at startup when the blacklist file does not exist."""
+        settings = self.make_settings(DeveloperBlacklist={'developers_file': 'no_such_blacklist.txt'})
+        listener = PumpFunListener(settings, target=self.conn)
+
+        with self.assertRaises(FileNotFoundError):
+            asyncio.run(listener.run())
+        self.assertEqual(listener.stats()['received'], 0)
+
+    def test_failed_reload_keeps_the_filter(self):
+        """Test that a failing reload is logged and the loaded blacklist stays in use."""
+        async def run():
+            listener = PumpFunListener(self.make_settings(), target=self.conn)
+            blacklist = listener.developer_blacklist
+            blacklist.load()
+            blacklist.loaded_at -= 10 ** 6
+            blacklist.load = MagicMock(side_effect=OSError("database is locked"))
+
+            with self.assertLogs('src.analysis.developers', 'ERROR'):
+                await listener.process(json.dumps({'mint': 'bad', 'traderPublicKey': 'file_dev1'}), 0)
+                await blacklist.wait_for_reload()
+            await listener.process(json.dumps({'mint': 'bad2', 'traderPublicKey': 'file_dev2'}), 0)
+            await listener.writer.close()
+            return listener.rejected, blacklist.stale
+
+        self.assertEqual(asyncio.run(run()), (2, False))
+
+    @patch('src.analysis.analyzer.get_rugcheck_data')
+    def test_analyzer_skips_blacklisted_developers(self, mock_get_rugcheck_data):
+        """Test that coins of blacklisted developers are eliminated before rugcheck."""
+        mock_get_rugcheck_data.return_value = MagicMock(rugged=False, result='Good', risks=[])
+        settings = self.make_settings()
+        DeveloperBlacklist(self.conn, settings).load()
+        self.conn.executemany("INSERT INTO coins (mint_address, developer_address) VALUES (?, ?)", [
+            ('m1', 'file_dev1'), ('m2', 'inline_dev'), ('m3', 'new_dev'), ('m4', None),
+        ])
+        self.conn.commit()
+
+        analyze_all_coins(self.conn, requests_per_second=1000, incremental=False, settings=settings)
+
+        looked_up = sorted(call.args[0] for call in mock_get_rugcheck_data.call_args_list)
+        self.assertEqual(looked_up, ['m3', 'm4'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import numpy as np
+from src.data.database import get_db_connection, create_tables
+from src.data.export import export_database, load_table, open_read_only
+from src.data.snapshots import record_snapshots
+
+class TestExport(unittest.TestCase):
+
+    test_db_name = "test_export.db"
+
+    def setUp(self):
+        """Set up a test database with coins and snapshots, and an export directory."""
+        self.conn = get_db_connection(self.test_db_name)
+        create_tables(self.conn)
+        self.conn.executemany("""
+            INSERT INTO coins (mint_address, name, market_cap, last_updated_timestamp) VALUES (?, ?, ?, ?)
+        """, [
+            ('mint1', 'Coin 1', 1000.0, '2024-01-01 00:00:00'),
+            ('mint2', None, None, '2024-01-02 00:00:00'),
+            ('mint3', 'Coin 3', 3000.0, '2024-01-03 00:00:00'),
+        ])
+        record_snapshots(self.conn, [('mint1', 1.0, 10.0, 1000.0, 5.0, 1, 2)], timestamp=1704067200)
+        record_snapshots(self.conn, [('mint1', 2.0, 20.0, 2000.0, 6.0, None, 3)], timestamp=1704067260)
+        self.conn.commit()
+        self.out_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Tear down the database, connection and export directory."""
+        self.conn.close()
+        os.remove(self.test_db_name)
+        shutil.rmtree(self.out_dir)
+
+    def read_manifest(self):
+        with open(os.path.join(self.out_dir, 'manifest.json')) as f:
+            return json.load(f)
+
+    def test_full_export_in_chunks(self):
+        """Test that every row is exported in parts of at most chunk_rows rows."""
+        counts = export_database(self.out_dir, self.test_db_name, chunk_rows=2)
+
+        self.assertEqual(counts, {'coins': 3, 'market_snapshots': 2})
+        parts = self.read_manifest()['tables']['coins']['parts']
+        self.assertEqual([part['rows'] for part in parts], [2, 1])
+
+        coins = load_table(self.out_dir, 'coins')
+        self.assertEqual(list(coins['mint_address']), ['mint1', 'mint2', 'mint3'])
+        self.assertEqual(coins['last_updated_timestamp'][0], np.datetime64('2024-01-01T00:00:00'))
+        snapshots = load_table(self.out_dir, 'market_snapshots')
+        self.assertEqual(list(snapshots['price_usd']), [1.0, 2.0])
+        self.assertEqual(list(snapshots['resolution']), [60, 60])
+
+    def test_nulls(self):
+        """Test that NULLs become empty strings, NaN, NaT and -1."""
+        export_database(self.out_dir, self.test_db_name)
+
+        coins = load_table(self.out_dir, 'coins')
+        self.assertEqual(coins['name'][1], '')
+        self.assertTrue(np.isnan(coins['market_cap'][1]))
+        self.assertTrue(np.isnat(coins['last_analyzed_timestamp'][1]))
+        self.assertEqual(coins['rug_pull'][1], 0)
+        self.assertEqual(coins['developer_address'][1], '')
+        snapshots = load_table(self.out_dir, 'market_snapshots')
+        self.assertTrue(np.isnan(snapshots['txns_h24_buys'][1]))
+
+    def test_incremental_export_appends_changed_rows(self):
+        """Test that a second export only appends the rows changed since the watermark."""
+        export_database(self.out_dir, self.test_db_name)
+        self.conn.execute("""
+            UPDATE coins SET rug_pull = 1, analysis_status = 'analyzed', last_analyzed_timestamp = '2024-02-01 00:00:00'
+            WHERE mint_address = 'mint1'
+        """)
+        self.conn.execute("""
+            INSERT INTO coins (mint_address, last_updated_timestamp) VALUES ('mint4', '2024-02-02 00:00:00')
+        """)
+        self.conn.commit()
+
+        counts = export_database(self.out_dir, self.test_db_name)
+
+        # mint3 sits on the old watermark, so it is exported again.
+        self.assertEqual(counts['coins'], 3)
+        self.assertEqual(len(self.read_manifest()['tables']['coins']['parts']), 2)
+        every_version = load_table(self.out_dir, 'coins', ['mint_address'], latest=False)
+        self.assertEqual(len(every_version['mint_address']), 6)
+
+        coins = load_table(self.out_dir, 'coins', ['mint_address', 'rug_pull'])
+        self.assertEqual(list(coins['mint_address']), ['mint2', 'mint1', 'mint3', 'mint4'])
+        self.assertEqual(list(coins['rug_pull']), [0, 1, 0, 0])
+
+        # Nothing changed since, so only the rows on the watermark are exported.
+        self.assertEqual(export_database(self.out_dir, self.test_db_name)['coins'], 1)
+
+    def test_full_export_starts_over(self):
+        """Test that a full export replaces the earlier parts."""
+        export_database(self.out_dir, self.test_db_name)
+        export_database(self.out_dir, self.test_db_name)
+
+        counts = export_database(self.out_dir, self.test_db_name, full=True)
+
+        self.assertEqual(counts['coins'], 3)
+        self.assertEqual(len(self.read_manifest()['tables']['coins']['parts']), 1)
+        self.assertEqual(len(load_table(self.out_dir, 'coins', latest=False)['id']), 3)
+
+    def test_export_selected_tables(self):
+        """Test that only the requested tables are exported."""
+        counts = export_database(self.out_dir, self.test_db_name, tables=['market_snapshots'])
+
+        self.assertEqual(counts, {'market_snapshots': 2})
+        self.assertEqual(list(self.read_manifest()['tables']), ['market_snapshots'])
+
+    def test_export_reads_without_blocking_writers(self):
+        """Test that the export connection is read-only and a writer can commit meanwhile."""
+        reader = open_read_only(self.test_db_name)
+        with self.assertRaises(sqlite3.OperationalError):
+            reader.execute("DELETE FROM coins")
+        reader.execute("BEGIN")
+        reader.execute("SELECT COUNT(*) FROM coins").fetchone()
+
+        self.conn.execute("UPDATE coins SET pump = 1")
+        self.conn.commit()
+
+        reader.execute("COMMIT")
+        reader.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,25 @@
 import unittest
 from unittest.mock import patch, MagicMock
+import asyncio
 import os
 import sqlite3
-from src.data.fetcher import fetch_and_store_dexscreener_pairs
-from src.data.database import get_db_connection, create_tables
+import threading
+import time
+import dataclasses
+from src.config import get_settings
+from src.data.fetcher import PAIRS_SKIPPED, PAIRS_UPSERTED, fetch_and_store_dexscreener_pairs, fetch_and_store_many_dexscreener_pairs, select_pairs, store_dexscreener_pairs
+from src.data.database import get_db_connection, create_tables, write_transaction
+from src.data.snapshots import HOURLY_RESOLUTION, record_snapshots
+
+def make_pair(address, liquidity=1000, volume=100, price="1.0"):
+    return {
+        "baseToken": {"address": address, "name": address, "symbol": address.upper()},
+        "marketCap": 1000000,
+        "liquidity": {"usd": liquidity},
+        "priceUsd": price,
+        "volume": {"h24": volume},
+        "txns": {"h24": {"buys": 10, "sells": 5}},
+    }
 
 class TestFetcher(unittest.TestCase):
 
@@ -11,7 +27,7 @@ class TestFetcher(unittest.TestCase):
 
     def setUp(self):
         """Set up a test database and connection."""
-        self.conn = get_db_connection(self.test_db_name)
+        self.conn = get_db_connection(self.test_db_name, check_same_thread=False)
         create_tables(self.conn)
 
     def tearDown(self):
@@ -59,5 +75,133 @@ class TestFetcher(unittest.TestCase):
         self.assertEqual(coin['volume_h24'], 500000)
         self.assertEqual(coin['txns_h24_buys'], 100)
 
+    @patch('requests.get')
+    def test_unchanged_pair_keeps_timestamp(self, mock_get):
+        """Test that re-fetching identical market data does not mark the coin as updated."""
+        pair = {
+            "baseToken": {"address": "test_token_address", "name": "Test Token", "symbol": "TEST"},
+            "marketCap": 1000000,
+            "liquidity": {"usd": 50000},
+            "priceUsd": "1.23",
+            "volume": {"h24": 500000},
+            "txns": {"h24": {"buys": 100, "sells": 50}}
+        }
+        mock_response = MagicMock()
+        mock_response.json.return_value = {"pairs": [pair]}
+        mock_get.return_value = mock_response
+
+        fetch_and_store_dexscreener_pairs("TEST/SOL", self.conn)
+        self.conn.execute("UPDATE coins SET last_updated_timestamp = '2000-01-01 00:00:00'")
+        self.conn.commit()
+
+        fetch_and_store_dexscreener_pairs("TEST/SOL", self.conn)
+        coin = self.conn.execute("SELECT last_updated_timestamp FROM coins").fetchone()
+        self.assertEqual(coin['last_updated_timestamp'], '2000-01-01 00:00:00')
+
+        pair["priceUsd"] = "1.50"
+        fetch_and_store_dexscreener_pairs("TEST/SOL", self.conn)
+        coin = self.conn.execute("SELECT last_updated_timestamp FROM coins").fetchone()
+        self.assertNotEqual(coin['last_updated_timestamp'], '2000-01-01 00:00:00')
+
+    def test_store_keeps_one_pair_per_token(self):
+        """Test that duplicate pairs of a token are collapsed into its deepest one."""
+        pairs = [make_pair("mint1", liquidity=10, price="1.0"), make_pair("mint1", liquidity=500, price="2.0"),
+                 make_pair("mint1", liquidity=50, price="3.0"), make_pair("mint2")]
+
+        store_dexscreener_pairs(pairs, self.conn)
+
+        rows = self.conn.execute("SELECT mint_address, price_usd, liquidity FROM coins ORDER BY mint_address").fetchall()
+        self.assertEqual([tuple(row) for row in rows], [("mint1", 2.0, 500), ("mint2", 1.0, 1000)])
+
+    def test_store_skips_unchanged_rows(self):
+        """Test that only new and changed coins are written."""
+        store_dexscreener_pairs([make_pair("mint1"), make_pair("mint2")], self.conn)
+        written, unchanged = PAIRS_UPSERTED.value(), PAIRS_SKIPPED.value(reason='unchanged')
+
+        store_dexscreener_pairs([make_pair("mint1"), make_pair("mint2", price="2.0"), make_pair("mint3")], self.conn)
+
+        self.assertEqual(PAIRS_UPSERTED.value() - written, 2)
+        self.assertEqual(PAIRS_SKIPPED.value(reason='unchanged') - unchanged, 1)
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM coins").fetchone()[0], 3)
+
+    def test_store_joins_the_callers_transaction(self):
+        """Test that the stored pairs are rolled back with the caller's transaction."""
+        with self.assertRaises(sqlite3.OperationalError):
+            with write_transaction(self.conn):
+                store_dexscreener_pairs([make_pair("mint1")], self.conn)
+                self.conn.execute("INSERT INTO no_such_table VALUES (1)")
+
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM coins").fetchone()[0], 0)
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM market_snapshots").fetchone()[0], 0)
+
+    def test_store_skips_invalid_pairs(self):
+        """Test that a malformed pair does not prevent the rest of the response from being stored."""
+        store_dexscreener_pairs([make_pair("mint1"), make_pair("mint2", price="n/a")], self.conn)
+        mints = [row[0] for row in self.conn.execute("SELECT mint_address FROM coins")]
+        self.assertEqual(mints, ["mint1"])
+
+    def test_select_pairs_policies(self):
+        """Test the pair selection policies."""
+        pairs = [make_pair("mint1", liquidity=10, volume=900), make_pair("mint1", liquidity=500, volume=100)]
+        self.assertEqual(select_pairs(pairs, 'liquidity')["mint1"]["liquidity"]["usd"], 500)
+        self.assertEqual(select_pairs(pairs, 'volume')["mint1"]["volume"]["h24"], 900)
+        self.assertEqual(select_pairs(pairs, 'first')["mint1"]["liquidity"]["usd"], 10)
+        with self.assertRaises(ValueError):
+            select_pairs(pairs, 'newest')
+
+        settings = get_settings()
+        settings = dataclasses.replace(settings, dexscreener=dataclasses.replace(settings.dexscreener, pair_policy='volume'))
+        store_dexscreener_pairs(pairs, self.conn, settings)
+        self.assertEqual(self.conn.execute("SELECT liquidity FROM coins").fetchone()[0], 10)
+
+    @patch('requests.Session.get')
+    def test_fetch_and_store_many_runs_concurrently(self, mock_session_get):
+        """Test that many queries are fetched concurrently through the shared session."""
+        in_flight = []
+        max_in_flight = []
+        lock = threading.Lock()
+
+        def fake_get(url):
+            query = url.split('q=')[1]
+            with lock:
+                in_flight.append(query)
+                max_in_flight.append(len(in_flight))
+            time.sleep(0.05)
+            with lock:
+                in_flight.remove(query)
+            response = MagicMock()
+            response.json.return_value = {"pairs": [{"baseToken": {"address": f"mint_{query}", "symbol": query}}]}
+            return response
+
+        mock_session_get.side_effect = fake_get
+        queries = [f"Q{i}" for i in range(6)]
+
+        asyncio.run(fetch_and_store_many_dexscreener_pairs(queries, self.conn, concurrency=3))
+
+        self.assertEqual(mock_session_get.call_count, 6)
+        self.assertEqual(max(max_in_flight), 3)
+        count = self.conn.execute("SELECT COUNT(*) FROM coins").fetchone()[0]
+        self.assertEqual(count, 6)
+
+    @patch('requests.Session.get')
+    def test_fetch_and_store_many_applies_snapshot_retention(self, mock_session_get):
+        """Test that old raw snapshots are rolled up once the queries are stored."""
+        self.conn.execute("INSERT INTO coins (mint_address) VALUES ('old')")
+        old = int(time.time()) - 3 * 86400
+        old -= old % 3600
+        for minute in range(3):
+            record_snapshots(self.conn, [("old", 1.0 + minute, 10.0, 100.0, 5.0, 1, 1)], timestamp=old + minute * 60)
+        self.conn.commit()
+        mock_session_get.return_value.json.return_value = {"pairs": [make_pair("new")]}
+
+        asyncio.run(fetch_and_store_many_dexscreener_pairs(["Q"], self.conn))
+
+        rows = self.conn.execute("""
+            SELECT coins.mint_address, market_snapshots.resolution, market_snapshots.price_usd
+            FROM market_snapshots JOIN coins ON coins.id = market_snapshots.coin_id ORDER BY coins.id
+        """).fetchall()
+        self.assertEqual([tuple(row) for row in rows][0], ("old", HOURLY_RESOLUTION, 3.0))
+        self.assertEqual(len(rows), 2)
+
 if __name__ == '__main__':
     unittest.main()
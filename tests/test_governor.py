@@ -0,0 +1,217 @@
+import unittest
+import configparser
+import time
+import requests
+from unittest.mock import MagicMock, patch
+from src.config import Settings
+from src.governor import CircuitOpenError, Governor, HostGovernor, parse_retry_after
+
+class FakeClock:
+    """A monotonic clock that only moves when the governor sleeps."""
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+def make_response(status=200, retry_after=None):
+    response = MagicMock(status_code=status)
+    response.headers = {'Retry-After': retry_after} if retry_after is not None else {}
+    return response
+
+def make_settings(**governor):
+    parser = configparser.ConfigParser()
+    parser['api'] = {'dexscreener_api_url': 'https://dex.test/latest/', 'rugcheck_api_url': 'https://rug.test/v1/'}
+    parser['Dexscreener'] = {'requests_per_minute': '600'}
+    parser['Governor'] = {'backoff_base_seconds': '0.5', **{key: str(value) for key, value in governor.items()}}
+    return Settings.from_parser(parser)
+
+class TestHostGovernor(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.settings = make_settings().governor
+
+    def make_host(self, limit=10):
+        return HostGovernor('api.test', limit, self.settings, self.clock, self.clock.sleep)
+
+    def test_token_bucket_paces_requests(self):
+        """Test that requests beyond the burst are spaced at the rate."""
+        host = self.make_host(limit=10)
+        for _ in range(30):
+            host.acquire()
+        # One second of burst, then 20 requests at 10 per second.
+        self.assertAlmostEqual(self.clock.now - 1000.0, 2.0)
+
+    def test_real_clock_spacing(self):
+        """Test that the bucket does not exceed its rate with the real clock."""
+        host = HostGovernor('api.test', 50, make_settings(burst_seconds=0).governor)
+        start = time.monotonic()
+        for _ in range(6):
+            host.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 5 / 50)
+
+    def test_throttle_halves_rate_and_pauses(self):
+        """Test that a 429 halves the rate and holds the next request back for the pause."""
+        host = self.make_host(limit=10)
+        host.record_throttle(3.0)
+        self.assertEqual(host.rate, 5)
+
+        host.acquire()
+        self.assertAlmostEqual(self.clock.now - 1000.0, 3.2)
+        host.acquire()
+        self.assertAlmostEqual(self.clock.now - 1000.0, 3.4)
+
+    def test_rate_recovers_additively_up_to_the_limit(self):
+        """Test that successes raise the rate back to the limit, never above it."""
+        host = self.make_host(limit=10)
+        for _ in range(3):
+            host.record_throttle(0)
+        self.assertAlmostEqual(host.rate, 1.25)
+        for _ in range(10):
+            host.record_success()
+        self.assertAlmostEqual(host.rate, 6.25)
+        for _ in range(20):
+            host.record_success()
+        self.assertEqual(host.rate, 10)
+
+    def test_rate_floor(self):
+        """Test that repeated throttling stops at the minimum rate."""
+        host = self.make_host(limit=10)
+        for _ in range(20):
+            host.record_throttle(0)
+        self.assertAlmostEqual(host.rate, 0.5)
+
+    def test_unlimited_host_honors_pause(self):
+        """Test that a host without a limit is not paced but still waits after a 429."""
+        host = self.make_host(limit=None)
+        for _ in range(100):
+            host.acquire()
+        self.assertEqual(self.clock.slept, [])
+        host.record_throttle(2.0)
+        host.acquire()
+        self.assertEqual(self.clock.slept, [2.0])
+
+    def test_circuit_breaker(self):
+        """Test that the circuit opens after repeated failures and closes after a good trial."""
+        host = self.make_host()
+        for _ in range(self.settings.failure_threshold):
+            host.acquire()
+            host.record_failure()
+        self.assertEqual(host.state, 'open')
+        with self.assertRaises(CircuitOpenError):
+            host.acquire()
+
+        self.clock.now += self.settings.open_seconds
+        self.assertEqual(host.state, 'half_open')
+        host.acquire()
+        # Only one trial request is let through.
+        with self.assertRaises(CircuitOpenError):
+            host.acquire()
+        host.record_success()
+        self.assertEqual(host.state, 'closed')
+        host.acquire()
+
+    def test_failed_trial_reopens_the_circuit(self):
+        """Test that a failed trial request opens the circuit again."""
+        host = self.make_host()
+        for _ in range(self.settings.failure_threshold):
+            host.record_failure()
+        self.clock.now += self.settings.open_seconds
+        host.acquire()
+        host.record_failure()
+        self.assertEqual(host.state, 'open')
+        with self.assertRaises(CircuitOpenError):
+            host.acquire()
+
+class TestGovernor(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def make_governor(self, **governor):
+        return Governor(make_settings(**governor), clock=self.clock, sleep=self.clock.sleep)
+
+    def test_hosts_get_their_configured_limits(self):
+        """Test that each API host gets its own bucket with its configured rate."""
+        governor = self.make_governor()
+        dexscreener = governor.host('https://dex.test/latest/dex/search?q=PEPE')
+        self.assertIs(dexscreener, governor.host('https://dex.test/latest/dex/tokens/a,b'))
+        self.assertEqual(dexscreener.limit, 10)
+        self.assertEqual(governor.host('https://rug.test/v1/tokens/a/report').limit, 1.0)
+        self.assertIsNone(governor.host('http://127.0.0.1:8080/').limit)
+
+    def test_get_retries_throttled_requests_after_retry_after(self):
+        """Test that a 429 is retried once its Retry-After time has passed."""
+        governor = self.make_governor()
+        http = MagicMock()
+        http.get.side_effect = [make_response(429, '2'), make_response(200)]
+
+        response = governor.get(http, 'https://dex.test/latest/dex/search?q=PEPE')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(http.get.call_count, 2)
+        # The pause, then one slot at the halved rate of 5 per second.
+        self.assertAlmostEqual(self.clock.now - 1000.0, 2.2)
+
+    @patch('src.governor.random.uniform', side_effect=lambda low, high: high)
+    def test_get_retries_transient_errors_with_backoff(self, mock_uniform):
+        """Test that connection errors and 5xx responses are retried with exponential backoff."""
+        governor = self.make_governor()
+        http = MagicMock()
+        http.get.side_effect = [requests.exceptions.ConnectionError(), make_response(503), make_response(200)]
+
+        response = governor.get(http, 'http://127.0.0.1/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.clock.slept, [0.5, 1.0])
+
+    def test_get_gives_up_after_max_retries(self):
+        """Test that the last response is returned once the retries are used up."""
+        governor = self.make_governor(max_retries=2)
+        http = MagicMock()
+        http.get.return_value = make_response(500)
+
+        response = governor.get(http, 'http://127.0.0.1/')
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(http.get.call_count, 3)
+
+    def test_client_errors_are_not_retried(self):
+        """Test that 4xx responses other than 429 are returned right away."""
+        governor = self.make_governor()
+        http = MagicMock()
+        http.get.return_value = make_response(404)
+
+        self.assertEqual(governor.get(http, 'http://127.0.0.1/').status_code, 404)
+        self.assertEqual(http.get.call_count, 1)
+
+    def test_open_circuit_stops_requests(self):
+        """Test that a host that keeps failing is not called again until the circuit closes."""
+        governor = self.make_governor(max_retries=10, failure_threshold=3)
+        http = MagicMock()
+        http.get.side_effect = requests.exceptions.ConnectionError()
+
+        with self.assertRaises(CircuitOpenError):
+            governor.get(http, 'http://127.0.0.1/')
+        self.assertEqual(http.get.call_count, 3)
+        with self.assertRaises(requests.exceptions.RequestException):
+            governor.get(http, 'http://127.0.0.1/')
+        self.assertEqual(http.get.call_count, 3)
+
+class TestParseRetryAfter(unittest.TestCase):
+
+    def test_seconds_and_dates(self):
+        """Test that Retry-After is read as seconds or as an HTTP date."""
+        self.assertEqual(parse_retry_after('5'), 5.0)
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:10 GMT', now=1445412480), 10.0)
+        self.assertIsNone(parse_retry_after('soon'))
+        self.assertIsNone(parse_retry_after(None))
+
+if __name__ == '__main__':
+    unittest.main()
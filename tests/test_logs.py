@@ -0,0 +1,46 @@
+import io
+import json
+import logging
+import unittest
+from src.config import LoggingSettings
+from src.logs import StructuredFormatter, configure_logging
+
+class TestLogs(unittest.TestCase):
+
+    def make_record(self, **fields):
+        record = logging.LogRecord('src.test', logging.INFO, __file__, 1, "Stored %d pairs", (3,), None)
+        record.__dict__.update(fields)
+        return record
+
+    def test_text_format_appends_fields(self):
+        """Test that text lines carry the structured fields as key=value pairs."""
+        line = StructuredFormatter().format(self.make_record(query='PEPE/SOL', seconds=0.5))
+        self.assertTrue(line.endswith("INFO src.test: Stored 3 pairs query=PEPE/SOL seconds=0.5"))
+
+    def test_json_format(self):
+        """Test that JSON lines hold the message and the structured fields."""
+        entry = json.loads(StructuredFormatter(json_output=True).format(self.make_record(query='PEPE/SOL')))
+        self.assertEqual(entry['level'], 'INFO')
+        self.assertEqual(entry['logger'], 'src.test')
+        self.assertEqual(entry['msg'], 'Stored 3 pairs')
+        self.assertEqual(entry['query'], 'PEPE/SOL')
+
+    def test_configure_logging_applies_the_level(self):
+        """Test that messages below the configured level are dropped."""
+        root = logging.getLogger()
+        handlers, level = list(root.handlers), root.level
+        stream = io.StringIO()
+        try:
+            configure_logging(LoggingSettings(level='WARNING', format='json'), stream)
+            logging.getLogger('src.test').info("hidden")
+            logging.getLogger('src.test').warning("shown", extra={'coins': 2})
+        finally:
+            root.handlers[:] = handlers
+            root.setLevel(level)
+
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])['coins'], 2)
+
+if __name__ == '__main__':
+    unittest.main()
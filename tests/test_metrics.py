@@ -0,0 +1,84 @@
+import unittest
+import urllib.error
+import urllib.request
+from src.metrics import MetricsRegistry, MetricsServer
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counter_and_gauge(self):
+        """Test that counters add up per label set and gauges keep the last value."""
+        messages = self.registry.counter('messages_total', 'Messages.', ('outcome',))
+        messages.inc(outcome='ok')
+        messages.inc(2, outcome='ok')
+        messages.inc(outcome='invalid')
+        depth = self.registry.gauge('queue_depth', 'Queue depth.')
+        depth.set(5)
+        depth.set(3)
+
+        self.assertEqual(messages.value(outcome='ok'), 3)
+        self.assertEqual(messages.value(outcome='invalid'), 1)
+        self.assertEqual(depth.value(), 3)
+        with self.assertRaises(ValueError):
+            messages.inc(source='ws')
+
+    def test_registry_returns_the_same_metric(self):
+        """Test that a metric is created once and a conflicting registration fails."""
+        first = self.registry.counter('requests_total', 'Requests.')
+        self.assertIs(self.registry.counter('requests_total', 'Requests.'), first)
+        with self.assertRaises(ValueError):
+            self.registry.histogram('requests_total', 'Requests.')
+
+    def test_histogram_buckets_and_quantiles(self):
+        """Test that observations land in cumulative buckets with their count and sum."""
+        latency = self.registry.histogram('latency_seconds', 'Latency.', ('stage',), buckets=(0.01, 0.1, 1.0))
+        for value in (0.005, 0.05, 0.05, 0.5, 5.0):
+            latency.observe(value, stage='decode')
+
+        snapshot = latency.snapshot(stage='decode')
+        self.assertEqual(snapshot['count'], 5)
+        self.assertAlmostEqual(snapshot['sum'], 5.605)
+        self.assertEqual(snapshot['counts'], [1, 2, 1, 1])
+        self.assertEqual(latency.quantile(0.5, stage='decode'), 0.1)
+        self.assertEqual(latency.quantile(0.99, stage='decode'), float('inf'))
+        self.assertIsNone(latency.quantile(0.5, stage='write'))
+
+        with latency.time(stage='write'):
+            pass
+        self.assertEqual(latency.snapshot(stage='write')['count'], 1)
+
+    def test_render_prometheus(self):
+        """Test the Prometheus text exposition of counters and histograms."""
+        self.registry.counter('messages_total', 'Messages.', ('outcome',)).inc(outcome='ok')
+        self.registry.histogram('latency_seconds', 'Latency.', buckets=(0.1,)).observe(0.05)
+
+        text = self.registry.render_prometheus()
+
+        self.assertIn('# TYPE messages_total counter', text)
+        self.assertIn('messages_total{outcome="ok"} 1', text)
+        self.assertIn('# TYPE latency_seconds histogram', text)
+        self.assertIn('latency_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 1', text)
+        self.assertIn('latency_seconds_count 1', text)
+        self.assertIn('latency_seconds_sum 0.05', text)
+        self.assertIn('latency_seconds count=1', self.registry.summary())
+
+    def test_server_serves_metrics(self):
+        """Test that the metrics server exposes the registry at /metrics."""
+        self.registry.counter('messages_total', 'Messages.').inc(7)
+        server = MetricsServer('127.0.0.1', 0, self.registry)
+        server.start()
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics") as response:
+                body = response.read().decode()
+            with self.assertRaises(urllib.error.HTTPError):
+                urllib.request.urlopen(f"http://127.0.0.1:{server.port}/other")
+        finally:
+            server.close()
+
+        self.assertIn('messages_total 7', body)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+import unittest
+import asyncio
+import configparser
+import json
+import os
+import websockets
+from src.config import Settings
+from src.data.pump_fetcher import PumpFunListener, TokenBatchWriter
+from src.data.database import get_db_connection, create_tables
+
+class TestTokenBatchWriter(unittest.TestCase):
+
+    test_db_name = "test_pump_fetcher.db"
+
+    def setUp(self):
+        """Set up a test database and connection."""
+        self.conn = get_db_connection(self.test_db_name, check_same_thread=False)
+        create_tables(self.conn)
+
+    def tearDown(self):
+        """Tear down the database and connection."""
+        self.conn.close()
+        os.remove(self.test_db_name)
+
+    def make_row(self, i):
+        return (f"mint{i}", f"Token {i}", f"T{i}", "", "", 'pump.fun', f"dev{i}")
+
+    def count_coins(self):
+        return self.conn.execute("SELECT COUNT(*) FROM coins").fetchone()[0]
+
+    def test_flush_on_size_threshold(self):
+        """Test that a full batch is written without waiting for the time threshold."""
+        async def run():
+            writer = TokenBatchWriter(self.conn, max_rows=3, max_delay=60)
+            writer.start()
+            for i in range(3):
+                writer.add(self.make_row(i))
+            await asyncio.sleep(0.1)
+            self.assertEqual(self.count_coins(), 3)
+            await writer.close()
+            return writer.stats()
+
+        stats = asyncio.run(run())
+        self.assertEqual(stats['queued'], 3)
+        self.assertEqual(stats['flushed'], 3)
+        self.assertEqual(stats['flushes'], 1)
+
+    def test_flush_on_time_threshold(self):
+        """Test that a partial batch is written after the delay."""
+        async def run():
+            writer = TokenBatchWriter(self.conn, max_rows=500, max_delay=0.05)
+            writer.start()
+            writer.add(self.make_row(0))
+            await asyncio.sleep(0.2)
+            self.assertEqual(self.count_coins(), 1)
+            await writer.close()
+
+        asyncio.run(run())
+
+    def test_close_flushes_pending_rows(self):
+        """Test that rows still buffered at shutdown are written."""
+        async def run():
+            writer = TokenBatchWriter(self.conn, max_rows=500, max_delay=60)
+            writer.start()
+            for i in range(5):
+                writer.add(self.make_row(i))
+            writer.add(self.make_row(0))
+            await writer.close()
+            return writer.stats()
+
+        stats = asyncio.run(run())
+        self.assertEqual(self.count_coins(), 5)
+        self.assertEqual(stats['pending'], 0)
+        self.assertEqual(stats['flushed'], 6)
+
+class TestPumpFunListener(unittest.TestCase):
+
+    test_db_name = "test_pump_fetcher.db"
+
+    def setUp(self):
+        """Set up a test database and connection."""
+        self.conn = get_db_connection(self.test_db_name, check_same_thread=False)
+        create_tables(self.conn)
+
+    def tearDown(self):
+        """Tear down the database and connection."""
+        self.conn.close()
+        os.remove(self.test_db_name)
+
+    def make_settings(self, uri='ws://localhost:1', queue_size=100, overflow_policy='drop_oldest'):
+        parser = configparser.ConfigParser()
+        parser['api'] = {'pumpportal_websocket_url': uri}
+        parser['PumpFun'] = {
+            'batch_max_delay_ms': '10', 'queue_size': str(queue_size), 'overflow_policy': overflow_policy,
+            'reconnect_min_delay': '0.01', 'reconnect_max_delay': '0.05',
+        }
+        return Settings.from_parser(parser)
+
+    def count_coins(self):
+        return self.conn.execute("SELECT COUNT(*) FROM coins").fetchone()[0]
+
+    def test_reconnects_and_resubscribes(self):
+        """Test that a dropped connection is re-established and subscribed again."""
+        subscriptions = []
+
+        async def handler(websocket):
+            subscriptions.append(json.loads(await websocket.recv()))
+            connection = len(subscriptions)
+            for i in range(3):
+                await websocket.send(json.dumps({'mint': f"mint{connection}-{i}", 'name': 'Token', 'symbol': 'TKN'}))
+            await websocket.send("not json")
+            # Closing the connection simulates a network blip.
+
+        async def run():
+            async with websockets.serve(handler, 'localhost', 0) as server:
+                port = server.sockets[0].getsockname()[1]
+                listener = PumpFunListener(self.make_settings(f"ws://localhost:{port}"), target=self.conn)
+                task = asyncio.create_task(listener.run())
+                while listener.processed < 8:
+                    await asyncio.sleep(0.01)
+                await listener.stop()
+                await task
+                return listener.stats()
+
+        stats = asyncio.run(run())
+        self.assertGreaterEqual(len(subscriptions), 2)
+        self.assertTrue(all(subscription == {'method': 'subscribeNewToken'} for subscription in subscriptions))
+        self.assertGreaterEqual(stats['reconnects'], 1)
+        self.assertGreaterEqual(stats['invalid'], 2)
+        self.assertEqual(stats['dropped'], 0)
+        self.assertGreaterEqual(self.count_coins(), 6)
+
+    def test_connection_errors_back_off(self):
+        """Test that failed connections are retried with jittered, growing delays."""
+        listener = PumpFunListener(self.make_settings(), target=self.conn)
+        delays = [listener.reconnect_delay(attempt) for attempt in range(10)]
+        self.assertTrue(all(0.01 <= delay <= 0.05 for delay in delays))
+
+        async def run():
+            task = asyncio.create_task(listener.run())
+            while listener.reconnects < 2:
+                await asyncio.sleep(0.01)
+            await listener.stop()
+            await task
+
+        asyncio.run(run())
+        self.assertEqual(listener.received, 0)
+
+    def test_overflow_policies(self):
+        """Test that a full queue drops the newest or the oldest message as configured."""
+        async def fill(policy):
+            listener = PumpFunListener(self.make_settings(queue_size=2, overflow_policy=policy), target=self.conn)
+            for i in range(5):
+                await listener.enqueue(f"message{i}", 0)
+            queued = [listener.queue.get_nowait()[0] for _ in range(listener.queue.qsize())]
+            return queued, listener.stats()
+
+        queued, stats = asyncio.run(fill('drop_newest'))
+        self.assertEqual(queued, ['message0', 'message1'])
+        self.assertEqual((stats['received'], stats['dropped'], stats['max_queue_depth']), (5, 3, 2))
+
+        queued, stats = asyncio.run(fill('drop_oldest'))
+        self.assertEqual(queued, ['message3', 'message4'])
+        self.assertEqual(stats['dropped'], 3)
+
+    def test_unknown_overflow_policy(self):
+        """Test that an unknown overflow policy is rejected."""
+        with self.assertRaises(ValueError):
+            PumpFunListener(self.make_settings(overflow_policy='explode'), target=self.conn)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import unittest
+import asyncio
+import configparser
+import os
+import time
+from src.analysis.realtime import RealtimeAnalyzer
+from src.config import Settings
+from src.data.database import get_db_connection, create_tables
+from src.data.pump_fetcher import TokenBatchWriter
+from unittest.mock import patch, MagicMock
+
+class TestRealtimeAnalyzer(unittest.TestCase):
+
+    test_db_name = "test_realtime.db"
+
+    def setUp(self):
+        """Set up a test database and settings."""
+        self.conn = get_db_connection(self.test_db_name, check_same_thread=False)
+        create_tables(self.conn)
+        parser = configparser.ConfigParser()
+        parser['CoinBlacklist'] = {'tokens': 'blacklisted'}
+        self.settings = Settings.from_parser(parser)
+
+    def tearDown(self):
+        """Tear down the database and connection."""
+        self.conn.close()
+        os.remove(self.test_db_name)
+
+    def make_row(self, mint):
+        return (mint, f"Token {mint}", mint.upper(), "", "", 'pump.fun', f"dev_{mint}")
+
+    def get_coin(self, mint):
+        return self.conn.execute("SELECT * FROM coins WHERE mint_address = ?", (mint,)).fetchone()
+
+    @patch('src.analysis.realtime.get_rugcheck_data')
+    def test_new_token_gets_verdict_before_batch_flush(self, mock_get_rugcheck_data):
+        """Test that a token not yet stored by the batch writer is inserted with its flags."""
+        risk = MagicMock()
+        risk.name = "Top 10 holders high ownership"
+        mock_get_rugcheck_data.return_value = MagicMock(rugged=False, result='Good', risks=[risk])
+
+        async def run():
+            analyzer = RealtimeAnalyzer(self.settings, target=self.conn, workers=2, queue_size=10)
+            analyzer.start()
+            await analyzer.submit(self.make_row("mint1"), time.monotonic())
+            await analyzer.close()
+            return analyzer.stats()
+
+        stats = asyncio.run(run())
+        coin = self.get_coin("mint1")
+        self.assertEqual(coin['name'], "Token mint1")
+        self.assertEqual(coin['source'], 'pump.fun')
+        self.assertTrue(coin['bundled_supply'])
+        self.assertIsNotNone(coin['last_analyzed_timestamp'])
+        self.assertEqual(stats['analyzed'], 1)
+        self.assertEqual(stats['failed'], 0)
+        self.assertLessEqual(stats['latency']['p50'], stats['latency']['p99'])
+
+    @patch('src.analysis.realtime.get_rugcheck_data')
+    def test_rejected_token_skips_rugcheck(self, mock_get_rugcheck_data):
+        """Test that a blacklisted token is marked analyzed without a rugcheck lookup."""
+        self.conn.execute(
+            "INSERT INTO coins (mint_address, name, symbol, pump) VALUES (?, ?, ?, ?)",
+            ("blacklisted", "Token", "BL", True)
+        )
+        self.conn.commit()
+
+        async def run():
+            analyzer = RealtimeAnalyzer(self.settings, target=self.conn, workers=1, queue_size=10)
+            analyzer.start()
+            await analyzer.submit(self.make_row("blacklisted"))
+            await analyzer.close()
+
+        asyncio.run(run())
+        mock_get_rugcheck_data.assert_not_called()
+        coin = self.get_coin("blacklisted")
+        self.assertTrue(coin['pump'])
+        self.assertIsNotNone(coin['last_analyzed_timestamp'])
+
+    @patch('src.analysis.realtime.get_rugcheck_data')
+    def test_launches_are_counted_once_with_the_batch_writer(self, mock_get_rugcheck_data):
+        """Test that each new token counts one launch whether the verdict or the batch writer inserts it."""
+        mock_get_rugcheck_data.return_value = MagicMock(rugged=False, result='Good', risks=[])
+        rows = [self.make_row(mint) for mint in ("mint1", "mint2", "mint3")]
+        rows = [row[:6] + ("dev",) for row in rows]
+
+        async def run():
+            writer = TokenBatchWriter(self.conn)
+            analyzer = RealtimeAnalyzer(self.settings, target=self.conn, workers=1, queue_size=10)
+            analyzer.start()
+            # mint1 is stored by the batch writer first, the others get their verdicts first.
+            writer.add(rows[0])
+            await writer.flush()
+            for row in rows:
+                await analyzer.submit(row)
+                writer.add(row)
+            await analyzer.close()
+            await writer.close()
+
+        asyncio.run(run())
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM coins").fetchone()[0], 3)
+        launched = self.conn.execute("SELECT coins_launched FROM developers WHERE address = 'dev'").fetchone()[0]
+        self.assertEqual(launched, 3)
+
+    def test_full_queue_applies_backpressure(self):
+        """Test that submit waits while the queue is full."""
+        async def run():
+            analyzer = RealtimeAnalyzer(self.settings, target=self.conn, workers=1, queue_size=1)
+            await analyzer.submit(self.make_row("mint1"))
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(analyzer.submit(self.make_row("mint2")), timeout=0.05)
+            await analyzer.close(drain=False)
+
+        asyncio.run(run())
+
+    def test_latency_percentiles_without_samples(self):
+        """Test that no latency is reported before any token is analyzed."""
+        async def run():
+            return RealtimeAnalyzer(self.settings, target=self.conn).latency_percentiles()
+
+        self.assertIsNone(asyncio.run(run()))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,178 @@
+import unittest
+import configparser
+import os
+import time
+import requests
+from unittest.mock import MagicMock
+from src.config import Settings
+from src.data.database import get_db_connection, create_tables
+from src.data.refresher import RefreshScheduler, next_interval, select_pairs
+from src.data.snapshots import HOURLY_RESOLUTION, RAW_RESOLUTION, record_snapshots
+
+def make_pair(mint, price=1.0, liquidity=50000):
+    return {
+        "baseToken": {"address": mint, "name": mint, "symbol": mint.upper()},
+        "marketCap": 1000000,
+        "liquidity": {"usd": liquidity},
+        "priceUsd": str(price),
+        "volume": {"h24": 500000},
+        "txns": {"h24": {"buys": 100, "sells": 50}},
+    }
+
+class TestNextInterval(unittest.TestCase):
+
+    def setUp(self):
+        """Set up the default refresh settings."""
+        self.refresh = Settings().refresh
+
+    def test_interval_grows_with_age(self):
+        """Test that older coins are refreshed less often."""
+        self.assertEqual(next_interval(0, 0, 0, self.refresh), 60)
+        self.assertEqual(next_interval(3600, 0, 0, self.refresh), 120)
+        self.assertEqual(next_interval(1000 * 3600, 0, 0, self.refresh), 3600)
+
+    def test_volatile_coins_are_refreshed_sooner(self):
+        """Test that a price move shortens the interval."""
+        self.assertEqual(next_interval(3 * 3600, 0.1, 0, self.refresh), 120)
+
+    def test_backoff_and_dead_coins(self):
+        """Test that misses back off exponentially and dead coins are retried rarely."""
+        self.assertEqual(next_interval(0, 0, 3, self.refresh), 480)
+        self.assertEqual(next_interval(0, 0, 10, self.refresh), 24 * 3600)
+
+    def test_select_pairs_keeps_deepest_liquidity(self):
+        """Test that each token gets its deepest pair and unrequested tokens are ignored."""
+        pairs = [make_pair("mint1", liquidity=10), make_pair("mint1", liquidity=500), make_pair("other")]
+        selected = select_pairs(pairs, 'liquidity', {"mint1"})
+        self.assertEqual(list(selected), ["mint1"])
+        self.assertEqual(selected["mint1"]["liquidity"]["usd"], 500)
+
+class TestRefreshScheduler(unittest.TestCase):
+
+    test_db_name = "test_refresher.db"
+
+    def setUp(self):
+        """Set up a test database with coins discovered on pump.fun."""
+        self.conn = get_db_connection(self.test_db_name)
+        create_tables(self.conn)
+        self.conn.executemany(
+            "INSERT INTO coins (mint_address, name, symbol, source) VALUES (?, ?, ?, 'pump.fun')",
+            [(f"mint{i}", f"Token {i}", f"T{i}") for i in range(65)]
+        )
+        self.conn.commit()
+        self.session = MagicMock()
+        self.session.get.side_effect = self.respond
+        self.missing = set()
+
+    def tearDown(self):
+        """Tear down the test database."""
+        self.conn.close()
+        os.remove(self.test_db_name)
+
+    def respond(self, url):
+        mints = url.rsplit('/', 1)[1].split(',')
+        response = MagicMock()
+        response.json.return_value = {"pairs": [make_pair(mint) for mint in mints if mint not in self.missing]}
+        return response
+
+    def make_scheduler(self, requests_per_minute=6000, cycle_seconds=60):
+        parser = configparser.ConfigParser()
+        parser['Refresh'] = {'requests_per_minute': str(requests_per_minute), 'cycle_seconds': str(cycle_seconds)}
+        return RefreshScheduler(self.conn, Settings.from_parser(parser), self.session)
+
+    def requested_mints(self):
+        return [call.args[0].rsplit('/', 1)[1].split(',') for call in self.session.get.call_args_list]
+
+    def test_refresh_fills_market_data_in_batches(self):
+        """Test that tracked coins are refreshed with up to 30 addresses per request."""
+        stats = self.make_scheduler().run_once()
+
+        self.assertEqual(stats, {'due': 65, 'requests': 3, 'refreshed': 65, 'failed': 0})
+        self.assertEqual([len(mints) for mints in self.requested_mints()], [30, 30, 5])
+        self.assertIn("/dex/tokens/", self.session.get.call_args_list[0].args[0])
+        missing = self.conn.execute("SELECT COUNT(*) FROM coins WHERE market_cap IS NULL").fetchone()[0]
+        self.assertEqual(missing, 0)
+        scheduled = self.conn.execute("SELECT COUNT(*) FROM refresh_schedule").fetchone()[0]
+        self.assertEqual(scheduled, 65)
+
+    def test_request_budget(self):
+        """Test that a cycle stops at its request budget, newest coins first."""
+        stats = self.make_scheduler(requests_per_minute=120, cycle_seconds=1).run_once()
+
+        self.assertEqual(stats['requests'], 2)
+        self.assertEqual(stats['due'], 60)
+        self.assertEqual(self.requested_mints()[0][0], "mint64")
+
+    def test_coins_are_not_refreshed_before_due(self):
+        """Test that a second cycle right away only picks up coins that are not scheduled yet."""
+        scheduler = self.make_scheduler()
+        scheduler.run_once()
+        self.conn.execute("INSERT INTO coins (mint_address) VALUES ('new')")
+        self.conn.commit()
+
+        self.assertEqual([coin['mint_address'] for coin in scheduler.due_coins(100)], ['new'])
+        self.assertEqual(len(scheduler.due_coins(100, now=time.time() + 3600)), 66)
+
+    def test_due_coins_use_the_schedule_indexes(self):
+        """Test that new coins get a schedule row and due coins are found without scanning coins."""
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM refresh_schedule").fetchone()[0], 65)
+        scheduler = self.make_scheduler()
+        scheduler.run_once()
+        self.conn.execute("INSERT INTO coins (mint_address) VALUES ('new')")
+        self.conn.execute("UPDATE refresh_schedule SET next_refresh_at = 0 WHERE coin_id = 1")
+        self.conn.commit()
+
+        self.assertEqual([coin['mint_address'] for coin in scheduler.due_coins(100)], ['new', 'mint0'])
+        for plan in (
+            "SELECT * FROM refresh_schedule WHERE last_refreshed_at IS NULL ORDER BY coin_id DESC LIMIT 10",
+            "SELECT * FROM refresh_schedule WHERE next_refresh_at <= 0 AND last_refreshed_at IS NOT NULL ORDER BY next_refresh_at LIMIT 10",
+        ):
+            details = " ".join(row[3] for row in self.conn.execute("EXPLAIN QUERY PLAN " + plan))
+            self.assertIn("USING INDEX", details)
+            self.assertNotIn("TEMP B-TREE", details)
+
+    def test_missing_and_stale_coins_back_off(self):
+        """Test that coins without new data are retried later and later."""
+        self.missing = {"mint0"}
+        scheduler = self.make_scheduler()
+        now = time.time()
+        scheduler.run_once(now)
+        scheduler.run_once(now + 7200)
+
+        rows = {
+            row['mint_address']: row for row in self.conn.execute("""
+                SELECT coins.mint_address, refresh_schedule.misses, refresh_schedule.next_refresh_at
+                FROM coins JOIN refresh_schedule ON refresh_schedule.coin_id = coins.id
+            """)
+        }
+        # mint0 was never returned, the others came back unchanged the second time:
+        # two hours old makes 3 minutes, doubled for the miss.
+        self.assertEqual(rows["mint0"]['misses'], 2)
+        self.assertEqual(rows["mint1"]['misses'], 1)
+        self.assertAlmostEqual(rows["mint1"]['next_refresh_at'] - (now + 7200), 360, delta=5)
+
+    def test_cycle_applies_snapshot_retention(self):
+        """Test that a refresh cycle rolls up the raw snapshots past their retention."""
+        old = int(time.time()) - 3 * 86400
+        old -= old % 3600
+        for minute in range(3):
+            record_snapshots(self.conn, [("mint0", 1.0 + minute, 10.0, 100.0, 5.0, 1, 1)], timestamp=old + minute * 60)
+        self.conn.commit()
+        self.make_scheduler().run_once()
+
+        rows = self.conn.execute("SELECT resolution, COUNT(*) FROM market_snapshots GROUP BY resolution ORDER BY resolution").fetchall()
+        self.assertEqual([tuple(row) for row in rows], [(RAW_RESOLUTION, 65), (HOURLY_RESOLUTION, 1)])
+
+    def test_failed_request_leaves_coins_due(self):
+        """Test that coins in a failed request are retried in the next cycle."""
+        self.session.get.side_effect = None
+        self.session.get.return_value.raise_for_status.side_effect = requests.exceptions.HTTPError("429")
+        stats = self.make_scheduler().run_once()
+
+        self.assertEqual(stats['failed'], 65)
+        refreshed = self.conn.execute("SELECT COUNT(*) FROM refresh_schedule WHERE last_refreshed_at IS NOT NULL").fetchone()[0]
+        self.assertEqual(refreshed, 0)
+        self.assertEqual(len(self.make_scheduler().due_coins(100)), 65)
+
+if __name__ == '__main__':
+    unittest.main()
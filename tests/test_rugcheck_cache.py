@@ -0,0 +1,93 @@
+import unittest
+import os
+import time
+from unittest.mock import patch, MagicMock
+from src.analysis.rugcheck_cache import RugcheckCache
+from src.analysis.analyzer import get_rugcheck_data, write_coin_updates
+from src.data.database import get_db_connection, create_tables
+
+class TestRugcheckCache(unittest.TestCase):
+
+    test_db_name = "test_rugcheck_cache.db"
+
+    def setUp(self):
+        """Set up a test database and cache."""
+        self.conn = get_db_connection(self.test_db_name)
+        create_tables(self.conn)
+        self.cache = RugcheckCache(self.test_db_name, good_ttl=60, danger_ttl=60, error_ttl=60)
+
+    def tearDown(self):
+        """Tear down the cache and test database."""
+        self.cache.close()
+        self.conn.close()
+        os.remove(self.test_db_name)
+
+    def test_round_trip(self):
+        """Test that a stored result is returned with its fields intact."""
+        risk = MagicMock()
+        risk.name = "Single holder ownership"
+        self.cache.put("mint1", MagicMock(rugged=False, result='Good', risks=[risk]))
+
+        hit, data = self.cache.get("mint1")
+        self.assertTrue(hit)
+        self.assertFalse(data.rugged)
+        self.assertEqual(data.result, 'Good')
+        self.assertEqual(data.risks[0].name, "Single holder ownership")
+
+    def test_error_is_cached(self):
+        """Test that a failed lookup is cached as a hit with no data."""
+        self.cache.put("mint1", None)
+        self.assertEqual(self.cache.get("mint1"), (True, None))
+
+    def test_expired_entry_is_a_miss(self):
+        """Test that entries older than their outcome's TTL are ignored."""
+        self.cache.ttls['danger'] = 0.01
+        self.cache.put("mint1", MagicMock(rugged=True, result='Danger', risks=[]))
+        time.sleep(0.02)
+        self.assertEqual(self.cache.get("mint1"), (False, None))
+
+    def test_puts_are_buffered_until_flush(self):
+        """Test that results are served from the buffer and written together by flush."""
+        self.cache.put("mint1", MagicMock(rugged=False, result='Good', risks=[]))
+        self.cache.put("mint2", None)
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM rugcheck_cache").fetchone()[0], 0)
+        self.assertTrue(self.cache.get("mint1")[0])
+
+        self.assertEqual(self.cache.flush(), 2)
+        self.assertEqual(self.cache.flush(), 0)
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM rugcheck_cache").fetchone()[0], 2)
+        self.assertEqual(self.cache.get("mint2"), (True, None))
+
+    def test_flush_joins_the_chunk_transaction(self):
+        """Test that write_coin_updates stores the buffered results in its own transaction."""
+        self.conn.execute("INSERT INTO coins (mint_address, symbol) VALUES ('mint1', 'C1')")
+        self.conn.commit()
+        self.cache.put("mint1", MagicMock(rugged=False, result='Good', risks=[]))
+
+        write_coin_updates(self.conn, [(False, False, None, None, None, 1)], 24, cache=self.cache)
+
+        self.assertFalse(self.conn.in_transaction)
+        other = get_db_connection(self.test_db_name)
+        try:
+            self.assertEqual(other.execute("SELECT COUNT(*) FROM rugcheck_cache").fetchone()[0], 1)
+        finally:
+            other.close()
+
+    def test_in_memory_database_is_rejected(self):
+        """Test that a cache without a database file fails instead of using the default database."""
+        with self.assertRaises(ValueError):
+            RugcheckCache('')
+
+    @patch('src.analysis.analyzer.perform_rugcheck')
+    def test_get_rugcheck_data_uses_cache(self, mock_perform_rugcheck):
+        """Test that a second lookup within the TTL makes no external call."""
+        mock_perform_rugcheck.return_value = MagicMock(rugged=False, result='Good', risks=[])
+
+        get_rugcheck_data("mint1", self.cache)
+        data = get_rugcheck_data("mint1", self.cache)
+
+        mock_perform_rugcheck.assert_called_once_with("mint1", None)
+        self.assertEqual(data.result, 'Good')
+
+if __name__ == '__main__':
+    unittest.main()
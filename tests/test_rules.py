@@ -0,0 +1,53 @@
+import unittest
+import configparser
+from src.config import Settings
+from src.analysis.analyzer import build_rule_pipeline
+from src.analysis.rules import Rule, RuleContext, RulePipeline
+
+class TestRulePipeline(unittest.TestCase):
+
+    def test_rules_run_cheapest_first_and_short_circuit(self):
+        """Test that expensive rules only see the survivors of cheaper ones."""
+        seen = {}
+
+        def make_rule(name, cost, drop):
+            def evaluate(coins, context):
+                seen[name] = [coin['id'] for coin in coins]
+                return [coin['id'] in drop for coin in coins]
+            return Rule(name, cost, evaluate)
+
+        pipeline = RulePipeline([
+            make_rule('remote', 100, {3}),
+            make_rule('local', 1, {1, 2}),
+        ])
+        coins = [{'id': i} for i in range(5)]
+
+        survivors = pipeline.run(coins, RuleContext(None))
+
+        self.assertEqual([coin['id'] for coin in survivors], [0, 4])
+        self.assertEqual(seen['local'], [0, 1, 2, 3, 4])
+        self.assertEqual(seen['remote'], [0, 3, 4])
+        self.assertEqual(pipeline.stats['local']['eliminated'], 2)
+        self.assertEqual(pipeline.stats['remote']['evaluated'], 3)
+        self.assertEqual(pipeline.stats['remote']['eliminated'], 1)
+        self.assertIn("remote (cost 100): evaluated 3, eliminated 1", pipeline.report())
+
+    def test_pipeline_from_config(self):
+        """Test that rule costs come from config and rules can be disabled."""
+        parser = configparser.ConfigParser()
+        parser['Rules'] = {'fake_volume': '0.5', 'rugcheck': 'off'}
+
+        pipeline = build_rule_pipeline(Settings.from_parser(parser))
+
+        self.assertEqual([rule.name for rule in pipeline.rules], ['fake_volume', 'blacklist', 'developer_blacklist', 'filters'])
+
+    def test_unknown_rule_is_rejected(self):
+        """Test that a misspelled rule name in config is reported."""
+        parser = configparser.ConfigParser()
+        parser['Rules'] = {'rugchek': '10'}
+
+        with self.assertRaises(ValueError):
+            build_rule_pipeline(Settings.from_parser(parser))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import math
+import os
+from src.data.database import get_db_connection, create_tables
+from src.data.fetcher import store_dexscreener_pairs
+from src.data.snapshots import record_snapshots, apply_retention, get_coin_series, HOURLY_RESOLUTION
+
+DAY = 86400
+
+class TestSnapshots(unittest.TestCase):
+
+    test_db_name = "test_snapshots.db"
+
+    def setUp(self):
+        """Set up a test database with one coin."""
+        self.conn = get_db_connection(self.test_db_name)
+        create_tables(self.conn)
+        self.conn.execute("INSERT INTO coins (mint_address, symbol) VALUES ('mint1', 'ONE')")
+        self.conn.commit()
+        self.coin_id = self.conn.execute("SELECT id FROM coins").fetchone()[0]
+
+    def tearDown(self):
+        """Tear down the test database."""
+        self.conn.close()
+        os.remove(self.test_db_name)
+
+    def observe(self, timestamp, price, liquidity=None):
+        record_snapshots(self.conn, [('mint1', price, liquidity, None, None, None, None)], timestamp)
+
+    def test_series_as_arrays(self):
+        """Test that a coin's history comes back in time order with NaN for NULLs."""
+        self.observe(120, 2.0)
+        self.observe(60, 1.0, 500)
+
+        series = get_coin_series(self.conn, self.coin_id)
+        self.assertEqual(list(series['timestamp']), [60, 120])
+        self.assertEqual(list(series['price_usd']), [1.0, 2.0])
+        self.assertEqual(series['liquidity'][0], 500)
+        self.assertTrue(math.isnan(series['liquidity'][1]))
+
+    def test_same_minute_keeps_latest(self):
+        """Test that observations within one bucket collapse to the latest."""
+        self.observe(60, 1.0)
+        self.observe(119, 1.5)
+
+        series = get_coin_series(self.conn, self.coin_id)
+        self.assertEqual(list(series['timestamp']), [60])
+        self.assertEqual(list(series['price_usd']), [1.5])
+
+    def test_retention_downsamples_and_expires(self):
+        """Test that old minute data becomes hourly and very old data is dropped."""
+        now = 40 * DAY
+        old_hour = now - 2 * DAY
+        old_hour -= old_hour % HOURLY_RESOLUTION
+        for minute in range(3):
+            self.observe(old_hour + minute * 60, float(minute))
+        self.observe(now - 35 * DAY, 9.0)
+        self.observe(now - 60, 5.0)
+        self.conn.commit()
+
+        rolled_up, deleted = apply_retention(self.conn, raw_retention_hours=24, hourly_retention_days=30, now=now)
+        self.conn.commit()
+
+        self.assertEqual((rolled_up, deleted), (2, 1))
+        series = get_coin_series(self.conn, self.coin_id)
+        self.assertEqual(list(series['timestamp']), [old_hour, now - 60])
+        self.assertEqual(list(series['price_usd']), [2.0, 5.0])
+
+    def test_dexscreener_ingest_records_snapshot(self):
+        """Test that storing Dexscreener pairs appends to the history."""
+        pair = {
+            "baseToken": {"address": "mint1", "symbol": "ONE"},
+            "priceUsd": "1.23",
+            "liquidity": {"usd": 50000},
+        }
+        store_dexscreener_pairs([pair], self.conn)
+
+        series = get_coin_series(self.conn, self.coin_id)
+        self.assertEqual(list(series['price_usd']), [1.23])
+        self.assertEqual(list(series['liquidity']), [50000])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+import configparser
+import itertools
+from src.config import Settings
+from src.analysis.analyzer import is_coin_filtered, has_fake_volume_custom
+from src.analysis.vectorized import load_numeric_columns, filter_mask, fake_volume_mask
+
+class TestVectorized(unittest.TestCase):
+
+    def setUp(self):
+        """Set up settings and a grid of coins covering NULLs, zeros and edge values."""
+        parser = configparser.ConfigParser()
+        parser['CoinBlacklist'] = {'tokens': 'addr1'}
+        parser['Filters'] = {'min_market_cap': '1000', 'min_liquidity': '5000'}
+        parser['FakeVolume'] = {'max_volume_to_liquidity_ratio': '3', 'min_txns_24h': '10', 'max_buy_sell_ratio': '10'}
+        self.settings = Settings.from_parser(parser)
+
+        market_caps = [None, 0, 500, 20000]
+        liquidities = [None, 0, 4000, 10000]
+        volumes = [None, 0, 20000, 50000]
+        txn_counts = [None, 0, 4, 5, 50, 100]
+        self.coins = [
+            {'mint_address': f"mint{i}", 'symbol': f"C{i}", 'market_cap': mc, 'liquidity': liq,
+             'volume_h24': vol, 'txns_h24_buys': buys, 'txns_h24_sells': sells}
+            for i, (mc, liq, vol, buys, sells) in enumerate(
+                itertools.product(market_caps, liquidities, volumes, txn_counts, txn_counts)
+            )
+        ]
+
+    def test_filter_mask_matches_scalar(self):
+        """Test that the filter mask agrees with is_coin_filtered on every coin."""
+        expected = [is_coin_filtered(coin, self.settings) for coin in self.coins]
+        mask = filter_mask(load_numeric_columns(self.coins), self.settings)
+        self.assertEqual(mask.tolist(), expected)
+
+    def test_fake_volume_mask_matches_scalar(self):
+        """Test that the fake-volume mask agrees with has_fake_volume_custom on every coin."""
+        expected = [has_fake_volume_custom(coin, self.settings) for coin in self.coins]
+        mask = fake_volume_mask(load_numeric_columns(self.coins), self.settings)
+        self.assertEqual(mask.tolist(), expected)
+
+if __name__ == '__main__':
+    unittest.main()
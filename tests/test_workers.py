@@ -0,0 +1,143 @@
+import unittest
+import configparser
+import os
+import tempfile
+import threading
+from src.analysis.analyzer import write_coin_updates
+from src.analysis.detectors import MomentumScorer, set_momentum_scorer
+from src.analysis.workers import AnalysisWorker, claim_coins, run_worker_processes
+from src.config import Settings
+from src.data.database import Database, close_databases, create_tables, get_db_connection
+from unittest.mock import patch, MagicMock
+
+class TestAnalysisWorkers(unittest.TestCase):
+
+    test_db_name = "test_workers.db"
+
+    def setUp(self):
+        """Set up a test database with coins waiting for analysis."""
+        self.conn = get_db_connection(self.test_db_name, check_same_thread=False)
+        create_tables(self.conn)
+        self.conn.executemany("INSERT INTO coins (mint_address, symbol) VALUES (?, ?)",
+                              [(f"mint{i}", f"C{i}") for i in range(20)])
+        self.conn.commit()
+        parser = configparser.ConfigParser()
+        parser['Workers'] = {'batch_size': '3', 'lease_seconds': '60', 'poll_seconds': '0.01'}
+        self.settings = Settings.from_parser(parser)
+
+    def tearDown(self):
+        """Tear down the database and connection."""
+        self.conn.close()
+        close_databases()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.test_db_name + suffix):
+                os.remove(self.test_db_name + suffix)
+
+    def test_claims_do_not_overlap(self):
+        """Test that coins leased by one worker are not claimed by another."""
+        first = claim_coins(self.conn, 'a', 8, 60, now=1000)
+        second = claim_coins(self.conn, 'b', 8, 60, now=1000)
+
+        self.assertEqual([coin['id'] for coin in first], list(range(1, 9)))
+        self.assertEqual([coin['id'] for coin in second], list(range(9, 17)))
+        owners = dict(self.conn.execute("SELECT mint_address, lease_owner FROM coins WHERE id IN (1, 9)").fetchall())
+        self.assertEqual(owners, {'mint0': 'a', 'mint8': 'b'})
+
+    def test_expired_leases_are_reclaimed(self):
+        """Test that the coins of a worker that never finished become claimable again."""
+        claim_coins(self.conn, 'crashed', 20, 60, now=1000)
+        self.assertEqual(claim_coins(self.conn, 'b', 20, 60, now=1030), [])
+        self.assertEqual(len(claim_coins(self.conn, 'b', 20, 60, now=1061)), 20)
+
+    def test_late_results_do_not_overwrite_the_new_lease(self):
+        """Test that a worker whose lease expired cannot write over the coin's new owner."""
+        claim_coins(self.conn, 'slow', 1, 60, now=1000)
+        claim_coins(self.conn, 'fast', 1, 60, now=1061)
+        flags = (True, True, True, True, True)
+
+        self.assertEqual(write_coin_updates(self.conn, [(*flags, 1)], owner='slow'), 0)
+        row = self.conn.execute("SELECT lease_owner, analysis_status, pump FROM coins WHERE id = 1").fetchone()
+        self.assertEqual(tuple(row), ('fast', 'pending', 0))
+
+        self.assertEqual(write_coin_updates(self.conn, [(*flags, 1)], owner='fast'), 1)
+        row = self.conn.execute("SELECT lease_owner, analysis_status, pump FROM coins WHERE id = 1").fetchone()
+        self.assertEqual(tuple(row), (None, 'analyzed', 1))
+
+    def test_due_coins_are_claimed_after_pending_ones(self):
+        """Test that analyzed coins are only claimed again once their recheck is due."""
+        self.conn.execute("UPDATE coins SET analysis_status = 'analyzed', next_analysis_at = datetime('now', '+1 hour') WHERE id > 2")
+        self.conn.execute("UPDATE coins SET next_analysis_at = datetime('now', '-1 minute') WHERE id = 20")
+        self.conn.commit()
+
+        claimed = claim_coins(self.conn, 'a', 10, 60)
+
+        self.assertEqual([coin['id'] for coin in claimed], [1, 2, 20])
+
+    @patch('src.analysis.workers.get_rugcheck_data')
+    def test_concurrent_workers_analyze_each_coin_once(self, mock_get_rugcheck_data):
+        """Test that workers sharing a database split the coins between them."""
+        looked_up = []
+        lock = threading.Lock()
+
+        def fake_rugcheck(mint_address, cache, limiter):
+            with lock:
+                looked_up.append(mint_address)
+            return MagicMock(rugged=False, result='Good', risks=[])
+
+        mock_get_rugcheck_data.side_effect = fake_rugcheck
+        database = Database(self.test_db_name)
+        workers = [AnalysisWorker(f"worker{i}", database, self.settings, requests_per_second=1000) for i in range(3)]
+        threads = [threading.Thread(target=worker.run, args=(True,)) for worker in workers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for worker in workers:
+            worker.close()
+        database.close()
+
+        self.assertEqual(sorted(looked_up), sorted(f"mint{i}" for i in range(20)))
+        self.assertEqual(sum(worker.analyzed for worker in workers), 20)
+        rows = self.conn.execute("SELECT analysis_status, lease_owner FROM coins").fetchall()
+        self.assertTrue(all(tuple(row) == ('analyzed', None) for row in rows))
+
+    @patch('src.analysis.workers.get_rugcheck_data')
+    def test_worker_reloads_the_batch_scores(self, mock_get_rugcheck_data):
+        """Test that a worker scores its batch with the statistics the ingest saved since it started."""
+        mock_get_rugcheck_data.return_value = MagicMock(rugged=False, result='Good', risks=[])
+        set_momentum_scorer(MomentumScorer())
+        self.addCleanup(set_momentum_scorer, None)
+        worker = AnalysisWorker("worker", self.conn, self.settings, requests_per_second=1000, reload_scores=True)
+        self.conn.execute("""
+            INSERT INTO coin_scores (mint_address, observations, last_seen, price_z, volume_z, imbalance_mean)
+            VALUES ('mint0', 10, 600, 5, 5, 0.5)
+        """)
+        self.conn.commit()
+        try:
+            worker.run_once()
+        finally:
+            worker.close()
+
+        rows = self.conn.execute("SELECT mint_address, pump FROM coins WHERE id <= 3 ORDER BY id").fetchall()
+        self.assertEqual([tuple(row) for row in rows], [("mint0", 1), ("mint1", 0), ("mint2", 0)])
+
+    def test_worker_processes(self):
+        """Test that worker processes analyze every coin and exit when done."""
+        with tempfile.NamedTemporaryFile('w', suffix='.ini', delete=False) as config:
+            config.write(f"[database]\ndb_name = {os.path.abspath(self.test_db_name)}\n"
+                         "[Rules]\nrugcheck = off\n[Logging]\nlevel = WARNING\n")
+        try:
+            self.assertEqual(run_worker_processes(config.name, 2, once=True, settings=self.settings), 0)
+        finally:
+            os.remove(config.name)
+
+        pending = self.conn.execute("SELECT COUNT(*) FROM coins WHERE analysis_status = 'pending'").fetchone()[0]
+        self.assertEqual(pending, 0)
+
+    def test_worker_processes_need_a_worker(self):
+        """Test that asking for no worker processes is rejected."""
+        with self.assertRaises(ValueError):
+            run_worker_processes("config.ini", 0, settings=self.settings)
+
+if __name__ == '__main__':
+    unittest.main()